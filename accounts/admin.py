@@ -1,10 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import (
     User, UserImage, Language, Interest, InterestCategory, OTPVerification, 
     BlogCategory, BlogPost, BlogTag, BlogPostTag, Newsletter, Friendship,
-    NotificationSettings, PushToken, Notification, Conversation, DirectMessage,
+    NotificationSettings, PushToken, Notification, PushOutbox, Conversation, DirectMessage,
     ActivityGroupChat, ActivityGroupMessage
 )
 
@@ -327,6 +328,23 @@ class NotificationAdmin(admin.ModelAdmin):
     mark_as_unread.short_description = "Mark selected notifications as unread"
 
 
+@admin.register(PushOutbox)
+class PushOutboxAdmin(admin.ModelAdmin):
+    list_display = ['title', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'channel_id', 'created_at']
+    search_fields = ['title', 'body', 'last_error']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'sent_at']
+    raw_id_fields = ['notification']
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} push notifications queued for retry.")
+    retry_now.short_description = "Retry selected push notifications now"
+
+
 class DirectMessageInline(admin.TabularInline):
     model = DirectMessage
     extra = 0
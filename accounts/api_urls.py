@@ -4,7 +4,8 @@ from .api_views import (
     LanguageViewSet, InterestViewSet, UserViewSet,
     FriendshipViewSet, BlogCategoryViewSet, BlogPostViewSet,
     NotificationSettingsViewSet, PushTokenViewSet, NotificationViewSet,
-    ConversationViewSet, DirectMessageViewSet, ActivityGroupChatViewSet
+    ConversationViewSet, DirectMessageViewSet, ActivityGroupChatViewSet, InboxViewSet,
+    MessageSearchViewSet
 )
 
 router = DefaultRouter()
@@ -20,6 +21,8 @@ router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'conversations', ConversationViewSet, basename='conversation')
 router.register(r'messages', DirectMessageViewSet, basename='direct-message')
 router.register(r'activity-chats', ActivityGroupChatViewSet, basename='activity-group-chat')
+router.register(r'inbox', InboxViewSet, basename='inbox')
+router.register(r'message-search', MessageSearchViewSet, basename='message-search')
 
 urlpatterns = [
     path('', include(router.urls)),
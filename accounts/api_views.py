@@ -1,21 +1,31 @@
+import base64
+import json
+
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate, get_user_model
+from django.db import transaction
 from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+from activities.chat_membership import is_chat_member
 from activities.models import Activity
+from config.conditional import ConditionalGetMixin
+from config.pagination import message_sync_window
+from .message_search import MESSAGE_KINDS, get_message_search_backend, load_messages
 from .models import (
     Language, Interest, InterestCategory, UserImage, OTPVerification, 
     Friendship, BlogPost, BlogCategory, NotificationSettings, PushToken, Notification,
-    Conversation, DirectMessage, ActivityGroupChat, ActivityGroupMessage
+    Conversation, DirectMessage, ActivityGroupChat, ActivityGroupChatMember, ActivityGroupMessage
 )
 from .serializers import (
     LanguageSerializer, InterestSerializer, InterestCategorySerializer, UserSerializer, UserPublicSerializer,
     UserImageSerializer, OTPSendSerializer, OTPVerifySerializer,
     UserRegistrationSerializer, FriendshipSerializer, BlogPostSerializer, BlogCategorySerializer,
     NotificationSettingsSerializer, PushTokenSerializer, NotificationSerializer,
-    ConversationSerializer, DirectMessageSerializer
+    ConversationSerializer, DirectMessageSerializer, ActivityGroupChatSerializer, ActivityGroupMessageSerializer
 )
 
 User = get_user_model()
@@ -26,6 +36,7 @@ class LanguageViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Language.objects.all()
     serializer_class = LanguageSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Small lookup table, always returned whole
     
     def get_queryset(self):
         # Order languages: Azerbaijan, Turkish, Russian, English first, then others alphabetically
@@ -49,6 +60,7 @@ class InterestViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Interest.objects.all()
     serializer_class = InterestSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Small lookup table, always returned whole
     
     def get_queryset(self):
         queryset = Interest.objects.all()
@@ -79,7 +91,7 @@ class InterestViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(grouped_data)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for users"""
     queryset = User.objects.all()
     permission_classes = [permissions.IsAuthenticated]
@@ -94,12 +106,31 @@ class UserViewSet(viewsets.ModelViewSet):
             return User.objects.filter(id=self.request.user.id).prefetch_related('languages', 'interests', 'images')
         return User.objects.all().prefetch_related('languages', 'interests', 'images')
     
+    def get_list_row_state(self, obj):
+        # Profile images, languages and interests are embedded but do not touch User.updated_at
+        return self.get_object_validators(obj)[0]
+    
+    def get_object_validators(self, obj):
+        # Languages, interests and images are prefetched by get_queryset()
+        state = (
+            obj.pk,
+            obj.updated_at,
+            tuple(image.pk for image in obj.images.all()),
+            tuple(language.pk for language in obj.languages.all()),
+            tuple(interest.pk for interest in obj.interests.all()),
+        )
+        return state, obj.updated_at
+    
     @action(detail=False, methods=['get', 'put', 'patch'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
         """Get or update current user profile"""
         if request.method == 'GET':
-            serializer = UserSerializer(request.user, context={'request': request})
-            return Response(serializer.data)
+            user = self.get_queryset().get()
+            state, last_modified = self.get_object_validators(user)
+            return self.conditional_response(
+                state, last_modified,
+                lambda: Response(UserSerializer(user, context={'request': request}).data)
+            )
         elif request.method in ['PUT', 'PATCH']:
             serializer = UserSerializer(
                 request.user, 
@@ -506,6 +537,7 @@ class BlogCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = BlogCategory.objects.all()
     serializer_class = BlogCategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Small lookup table, always returned whole
 
 
 class BlogPostViewSet(viewsets.ReadOnlyModelViewSet):
@@ -685,7 +717,7 @@ class PushTokenViewSet(viewsets.ViewSet):
                 'success': True,
                 'message': 'Test notification sent successfully',
                 'tokens_count': len(tokens),
-                'result': result.get('data')
+                'result': result.get('results')
             })
         
         return Response({
@@ -701,7 +733,10 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        queryset = Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        if self.action in ['list', 'retrieve']:
+            queryset = NotificationSerializer.optimize_queryset(queryset, self.request)
+        return queryset
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
@@ -753,7 +788,11 @@ class ConversationViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return Conversation.get_user_conversations(self.request.user).order_by('-updated_at')
+        queryset = Conversation.get_user_conversations(self.request.user).order_by('-updated_at')
+        if self.action in ['list', 'retrieve']:
+            queryset = ConversationSerializer.optimize_queryset(queryset, self.request)
+            queryset = Conversation.with_unread_counts(queryset, self.request.user)
+        return queryset
     
     @action(detail=False, methods=['post'])
     def get_or_create(self, request):
@@ -797,7 +836,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
-        """Get messages for a conversation"""
+        """Get messages for a conversation (?after=<id> for new ones, ?before=<id>&limit= to scroll back)"""
         try:
             conversation = self.get_queryset().get(pk=pk)
         except Conversation.DoesNotExist:
@@ -806,18 +845,26 @@ class ConversationViewSet(viewsets.ModelViewSet):
                 'message': 'Conversation not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Mark messages as read
-        conversation.messages.filter(is_read=False).exclude(sender=request.user).update(
-            is_read=True, 
-            status='read'
-        )
+        messages = DirectMessageSerializer.optimize_queryset(conversation.messages.all(), request)
+        archive = DirectMessageSerializer.optimize_queryset(conversation.archived_messages.all(), request)
+        try:
+            messages, has_more = message_sync_window(messages, request.query_params, archive=archive)
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': 'after, before and limit must be positive integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Move the read watermark up to the newest message returned; an empty poll has nothing to mark
+        if messages:
+            conversation.mark_read(request.user, messages[-1].pk)
         
-        messages = conversation.messages.order_by('created_at')
         serializer = DirectMessageSerializer(messages, many=True, context={'request': request})
         
         return Response({
             'success': True,
-            'messages': serializer.data
+            'messages': serializer.data,
+            'has_more': has_more,
         })
 
 
@@ -827,10 +874,21 @@ class DirectMessageViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return DirectMessage.objects.filter(
+        queryset = DirectMessage.objects.filter(
             Q(conversation__participant1=self.request.user) |
             Q(conversation__participant2=self.request.user)
         )
+        if self.action in ['list', 'retrieve']:
+            queryset = DirectMessageSerializer.optimize_queryset(queryset, self.request)
+        return queryset
+    
+    def perform_destroy(self, instance):
+        from .realtime import publish_direct_message
+        publish_direct_message('deleted', instance)
+        conversation = instance.conversation
+        get_message_search_backend().remove('direct', instance.pk)
+        instance.delete()
+        conversation.refresh_inbox_state()
     
     def create(self, request):
         """Send a direct message"""
@@ -885,19 +943,16 @@ class DirectMessageViewSet(viewsets.ModelViewSet):
                 'message': 'conversation_id or user_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create the message
-        message = DirectMessage.objects.create(
-            conversation=conversation,
-            sender=request.user,
-            message=message_text
-        )
-        
-        # Update conversation timestamp
-        conversation.save()  # This updates updated_at
-        
-        # Send push notification to the other user
-        other_user = conversation.get_other_participant(request.user)
-        self._send_message_notification(request.user, other_user, message_text, conversation)
+        # Create the message and queue the push notification to the other user together
+        with transaction.atomic():
+            message = DirectMessage.objects.create(
+                conversation=conversation,
+                sender=request.user,
+                message=message_text
+            )
+            
+            other_user = conversation.get_other_participant(request.user)
+            self._send_message_notification(request.user, other_user, message_text, conversation)
         
         serializer = DirectMessageSerializer(message, context={'request': request})
         return Response({
@@ -906,27 +961,21 @@ class DirectMessageViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_201_CREATED)
     
     def _send_message_notification(self, sender, recipient, message_text, conversation):
-        """Send push notification for new message"""
+        """Queue push notification for new message"""
         try:
             from .push_service import push_service
             import logging
             logger = logging.getLogger(__name__)
             
-            # Check if user has new_message notifications enabled
-            settings = NotificationSettings.objects.filter(user=recipient).first()
-            if settings and not settings.new_message:
-                logger.info(f"Skipping message notification for {recipient.id} - notifications disabled")
-                return
-            
-            tokens = push_service.get_user_push_tokens(recipient)
-            logger.info(f"Sending message notification to {recipient.id}, tokens: {len(tokens)}")
+            # Truncate message for notification
+            preview = message_text[:100] + '...' if len(message_text) > 100 else message_text
+            logger.info(f"Queueing message notification to {recipient.id}")
             
-            if tokens:
-                # Truncate message for notification
-                preview = message_text[:100] + '...' if len(message_text) > 100 else message_text
-                
-                result = push_service.send_push_notification(
-                    tokens=tokens,
+            # Savepoint: a failed enqueue must not roll back the message
+            with transaction.atomic():
+                push_service.queue_chat_push(
+                    [recipient.id],
+                    f'dm:{conversation.id}',
                     title=f'💬 {sender.get_full_name()}',
                     body=preview,
                     data={
@@ -937,9 +986,6 @@ class DirectMessageViewSet(viewsets.ModelViewSet):
                     },
                     channel_id='messages'
                 )
-                logger.info(f"Push notification result: {result}")
-            else:
-                logger.warning(f"No push tokens for user {recipient.id}")
         except Exception as e:
             import logging
             logging.getLogger(__name__).error(f"Failed to send message notification: {e}", exc_info=True)
@@ -974,22 +1020,11 @@ class ActivityGroupChatViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Get group chats where user is a participant"""
-        from activities.models import ActivityParticipant
-        
-        # Get activities where user is organizer
-        organizer_activities = list(Activity.objects.filter(
-            organizer=self.request.user
-        ).values_list('id', flat=True))
-        
-        # Get activities where user is approved participant
-        participant_activities = list(ActivityParticipant.objects.filter(
-            user=self.request.user,
-            status='approved'
-        ).values_list('activity_id', flat=True))
-        
-        all_activities = set(organizer_activities + participant_activities)
-        
-        return ActivityGroupChat.objects.filter(activity_id__in=all_activities)
+        # Member rows mirror the organizer and approved participants
+        queryset = ActivityGroupChat.objects.filter(members__user=self.request.user)
+        if self.action in ['list', 'retrieve']:
+            queryset = ActivityGroupChatSerializer.optimize_queryset(queryset, self.request)
+        return queryset
     
     @action(detail=False, methods=['get'], url_path='for-activity/(?P<activity_id>[^/.]+)')
     def for_activity(self, request, activity_id=None):
@@ -1003,15 +1038,7 @@ class ActivityGroupChatViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Check if user can access this chat
-        from activities.models import ActivityParticipant
-        is_organizer = activity.organizer == request.user
-        is_participant = ActivityParticipant.objects.filter(
-            activity=activity,
-            user=request.user,
-            status='approved'
-        ).exists()
-        
-        if not is_organizer and not is_participant:
+        if not is_chat_member(activity.pk, request.user.pk):
             return Response({
                 'success': False,
                 'message': 'You are not a participant of this activity'
@@ -1024,7 +1051,7 @@ class ActivityGroupChatViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
-        """Get messages for a group chat"""
+        """Get messages for a group chat (?after=<id> for new ones, ?before=<id>&limit= to scroll back)"""
         group_chat = self.get_object()
         
         if not group_chat.is_participant(request.user):
@@ -1033,10 +1060,25 @@ class ActivityGroupChatViewSet(viewsets.ModelViewSet):
                 'message': 'You are not a participant of this chat'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        messages = group_chat.messages.select_related('sender').order_by('created_at')
         from .serializers import ActivityGroupMessageSerializer
+        messages = ActivityGroupMessageSerializer.optimize_queryset(group_chat.messages.all(), request)
+        archive = ActivityGroupMessageSerializer.optimize_queryset(group_chat.archived_messages.all(), request)
+        try:
+            messages, has_more = message_sync_window(messages, request.query_params, archive=archive)
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': 'after, before and limit must be positive integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if messages:
+            group_chat.mark_read(request.user, messages[-1].pk)
+        
         serializer = ActivityGroupMessageSerializer(messages, many=True, context={'request': request})
-        return Response(serializer.data)
+        # The body stays a bare list for existing clients; older history is flagged in a header
+        response = Response(serializer.data)
+        response['X-Has-More'] = 'true' if has_more else 'false'
+        return response
     
     @action(detail=True, methods=['post'])
     def send_message(self, request, pk=None):
@@ -1063,18 +1105,15 @@ class ActivityGroupChatViewSet(viewsets.ModelViewSet):
                 'message': 'Message is too long (max 2000 characters)'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create the message
-        message = ActivityGroupMessage.objects.create(
-            group_chat=group_chat,
-            sender=request.user,
-            message=message_text
-        )
-        
-        # Update group chat timestamp
-        group_chat.save()
-        
-        # Send push notifications to other participants
-        self._send_group_message_notification(request.user, group_chat, message_text)
+        # Create the message and queue push notifications to other participants together
+        with transaction.atomic():
+            message = ActivityGroupMessage.objects.create(
+                group_chat=group_chat,
+                sender=request.user,
+                message=message_text
+            )
+            
+            self._send_group_message_notification(request.user, group_chat, message_text)
         
         from .serializers import ActivityGroupMessageSerializer
         serializer = ActivityGroupMessageSerializer(message, context={'request': request})
@@ -1084,34 +1123,236 @@ class ActivityGroupChatViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_201_CREATED)
     
     def _send_group_message_notification(self, sender, group_chat, message_text):
-        """Send push notification to all participants except sender"""
+        """Queue push notification to all participants except sender"""
         try:
             from .push_service import push_service
             
-            participants = group_chat.get_participants().exclude(id=sender.id)
+            preview = message_text[:100] + '...' if len(message_text) > 100 else message_text
+            activity = group_chat.activity
             
-            for participant in participants:
-                # Check if user has message notifications enabled
-                settings = NotificationSettings.objects.filter(user=participant).first()
-                if settings and not settings.new_message:
-                    continue
-                
-                tokens = push_service.get_user_push_tokens(participant)
-                if tokens:
-                    preview = message_text[:100] + '...' if len(message_text) > 100 else message_text
-                    
-                    push_service.send_push_notification(
-                        tokens=tokens,
-                        title=f'💬 {group_chat.activity.title}',
-                        body=f'{sender.get_full_name()}: {preview}',
-                        data={
-                            'screen': 'ActivityGroupChat',
-                            'activityId': group_chat.activity.id,
-                            'groupChatId': group_chat.id,
-                            'type': 'group_message'
-                        },
-                        channel_id='messages'
-                    )
+            # Savepoint: a failed enqueue must not roll back the message
+            with transaction.atomic():
+                push_service.queue_chat_push(
+                    group_chat.get_member_ids() - {sender.id},
+                    f'group:{group_chat.id}',
+                    title=f'💬 {activity.title}',
+                    body=f'{sender.get_full_name()}: {preview}',
+                    data={
+                        'screen': 'ActivityGroupChat',
+                        'activityId': activity.id,
+                        'groupChatId': group_chat.id,
+                        'type': 'group_message'
+                    },
+                    channel_id='messages'
+                )
         except Exception as e:
             print(f"Failed to send group message notification: {e}")
 
+
+
+class InboxViewSet(viewsets.ViewSet):
+    """Unified chat inbox: direct conversations and activity group chats by last activity"""
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+    
+    def list(self, request):
+        """List chats newest first (?limit=, ?cursor=<next_cursor of the previous page>)"""
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        if limit <= 0:
+            limit = self.default_limit
+        
+        # Chats are ordered by (last_activity_at, type, id) descending; the
+        # cursor is that key of the last item on the previous page
+        position = None
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                last_activity_at, kind, chat_id = json.loads(
+                    base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+                )
+                last_activity_at = parse_datetime(last_activity_at)
+                if last_activity_at is None or kind not in MESSAGE_KINDS or not isinstance(chat_id, int):
+                    raise ValueError('Malformed cursor')
+                position = (last_activity_at, kind, chat_id)
+            except Exception:
+                return Response({
+                    'success': False,
+                    'message': 'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Chats without messages sort by their creation time
+        conversations = Conversation.get_user_conversations(request.user).annotate(
+            last_activity_at=Coalesce('last_message_at', 'created_at')
+        )
+        memberships = ActivityGroupChatMember.objects.filter(user=request.user).annotate(
+            last_activity_at=Coalesce('group_chat__last_message_at', 'group_chat__created_at')
+        )
+        if position:
+            conversations = conversations.filter(self.after_q(position, 'direct', 'id'))
+            memberships = memberships.filter(self.after_q(position, 'group', 'group_chat_id'))
+        
+        # One page from each source is enough to fill one merged page
+        conversations = Conversation.with_unread_counts(ConversationSerializer.optimize_queryset(
+            conversations.order_by('-last_activity_at', '-id'), request
+        ), request.user)[:limit + 1]
+        memberships = ActivityGroupChatMember.with_unread_counts(memberships).select_related(
+            'group_chat__activity', 'group_chat__last_message_sender'
+        ).prefetch_related('group_chat__activity__images').order_by('-last_activity_at', '-group_chat_id')[:limit + 1]
+        
+        items = [
+            (conversation.last_activity_at, 'direct', conversation.id, conversation)
+            for conversation in conversations
+        ]
+        for membership in memberships:
+            group_chat = membership.group_chat
+            group_chat.my_membership = [membership]
+            items.append((membership.last_activity_at, 'group', group_chat.id, group_chat))
+        items.sort(key=lambda item: item[:3], reverse=True)
+        has_more = len(items) > limit
+        items = items[:limit]
+        
+        context = {'request': request}
+        results = []
+        for last_activity_at, kind, _, chat in items:
+            if kind == 'direct':
+                data = ConversationSerializer(chat, context=context).data
+            else:
+                data = ActivityGroupChatSerializer(chat, context=context).data
+            results.append({
+                'type': kind,
+                'last_activity_at': last_activity_at.isoformat(),
+                'chat': data,
+            })
+        
+        next_cursor = None
+        if has_more:
+            last_activity_at, kind, chat_id, _ = items[-1]
+            next_cursor = base64.urlsafe_b64encode(
+                json.dumps([last_activity_at.isoformat(), kind, chat_id], separators=(',', ':')).encode('utf-8')
+            ).decode('ascii')
+        return Response({
+            'success': True,
+            'results': results,
+            'next_cursor': next_cursor,
+        })
+    
+    @staticmethod
+    def after_q(position, kind, id_field):
+        """Q selecting the `kind` chats ordered after `position` = (last_activity_at, type, id)"""
+        last_activity_at, position_kind, chat_id = position
+        after = Q(last_activity_at__lt=last_activity_at)
+        if kind == position_kind:
+            return after | Q(last_activity_at=last_activity_at, **{f'{id_field}__lt': chat_id})
+        if kind < position_kind:
+            # Ties on the timestamp list every group chat before the direct ones
+            return after | Q(last_activity_at=last_activity_at)
+        return after
+
+
+class MessageSearchViewSet(viewsets.ViewSet):
+    """Full-text search over the user's direct and group chat messages"""
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 50
+    
+    def list(self, request):
+        """Search messages newest first (?q=, ?type=direct|group, ?chat=<id> with type, ?limit=, ?cursor=)"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'success': False,
+                'message': 'q is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        kind = request.query_params.get('type')
+        chat_id = request.query_params.get('chat')
+        if kind not in (None, *MESSAGE_KINDS) or (chat_id and (not kind or not chat_id.isdigit())):
+            return Response({
+                'success': False,
+                'message': 'type must be direct or group, and chat requires type and a numeric id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except (TypeError, ValueError):
+            limit = self.default_limit
+        if limit <= 0:
+            limit = self.default_limit
+        
+        # Per-kind id bounds; a kind missing from the cursor has no more hits
+        bounds = {name: None for name in ((kind,) if kind else MESSAGE_KINDS)}
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                bounds = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+                if not set(bounds) <= set(MESSAGE_KINDS) or not all(
+                    bound is None or isinstance(bound, int) for bound in bounds.values()
+                ):
+                    raise ValueError('Malformed cursor')
+            except Exception:
+                return Response({
+                    'success': False,
+                    'message': 'Invalid cursor'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        chat_ids = {
+            'direct': Conversation.get_user_conversations(request.user).values_list('id', flat=True),
+            'group': ActivityGroupChatMember.objects.filter(user=request.user).values_list('group_chat_id', flat=True),
+        }
+        serializer_classes = {
+            'direct': DirectMessageSerializer,
+            'group': ActivityGroupMessageSerializer,
+        }
+        backend = get_message_search_backend()
+        
+        hits = {}
+        items = []
+        for name, bound in bounds.items():
+            allowed = chat_ids[name]
+            if chat_id:
+                allowed = allowed.filter(**{'id' if name == 'direct' else 'group_chat_id': chat_id})
+            ids = backend.search(name, query, list(allowed), before_id=bound, limit=limit + 1)
+            serializer_class = serializer_classes[name]
+            messages = load_messages(
+                name, ids, prepare=lambda queryset, cls=serializer_class: cls.optimize_queryset(queryset, request)
+            )
+            hits[name] = (ids, messages)
+            items.extend((message.created_at, message.pk, name, message) for message in messages.values())
+        items.sort(key=lambda item: item[:2], reverse=True)
+        page = items[:limit]
+        
+        next_bounds = {}
+        for name, (ids, messages) in hits.items():
+            consumed = [message_id for _, message_id, item_kind, _ in page if item_kind == name]
+            if len(ids) <= limit and len(consumed) == len(messages):
+                continue
+            if consumed:
+                next_bounds[name] = min(consumed)
+            elif not messages and ids:
+                # Only stale index entries on this page; skip past them
+                next_bounds[name] = min(ids)
+            else:
+                next_bounds[name] = bounds[name]
+        
+        context = {'request': request}
+        results = [{
+            'type': name,
+            'chat_id': message.conversation_id if name == 'direct' else message.group_chat_id,
+            'message': serializer_classes[name](message, context=context).data,
+            'context': {'previous_id': message.previous_id, 'next_id': message.next_id},
+        } for _, _, name, message in page]
+        
+        next_cursor = None
+        if next_bounds:
+            next_cursor = base64.urlsafe_b64encode(
+                json.dumps(next_bounds, separators=(',', ':')).encode('utf-8')
+            ).decode('ascii')
+        return Response({
+            'success': True,
+            'results': results,
+            'next_cursor': next_cursor,
+        })
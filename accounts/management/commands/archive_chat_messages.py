@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import ActivityGroupMessage, ArchivedDirectMessage, ArchivedGroupMessage, DirectMessage
+from activities.models import ActivityMessage, ArchivedActivityMessage
+from config.archive import ARCHIVE_BATCH_SIZE, archive_batches
+
+
+class Command(BaseCommand):
+    help = 'Move old chat messages (and chats of completed activities) into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=getattr(settings, 'CHAT_ARCHIVE_AFTER_DAYS', 180),
+            help='Archive messages older than this many days (default: CHAT_ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--completed-activities',
+            action='store_true',
+            help='Also archive every message of completed activities, whatever its age',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help=f'Number of messages moved per transaction (default: {ARCHIVE_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between batches to leave room for live traffic',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many messages would be archived',
+        )
+
+    def handle(self, *args, **options):
+        if options['older_than_days'] < 1:
+            raise CommandError('--older-than-days must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        direct = Q(created_at__lt=cutoff)
+        group = Q(created_at__lt=cutoff)
+        web = Q(created_at__lt=cutoff)
+        if options['completed_activities']:
+            group |= Q(group_chat__activity__status='completed')
+            web |= Q(activity__status='completed')
+
+        targets = [
+            ('direct messages', DirectMessage.objects.filter(direct), ArchivedDirectMessage),
+            ('group chat messages', ActivityGroupMessage.objects.filter(group), ArchivedGroupMessage),
+            ('activity chat messages', ActivityMessage.objects.filter(web), ArchivedActivityMessage),
+        ]
+
+        self.stdout.write(f'Archiving chat messages older than {cutoff:%Y-%m-%d %H:%M}...')
+        for label, queryset, archive_model in targets:
+            if options['dry_run']:
+                self.stdout.write(f'  {label}: {queryset.count()} would be archived')
+                continue
+            total = 0
+            for moved in archive_batches(queryset, archive_model, batch_size=options['batch_size']):
+                total += moved
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(f'  {label}: {total} archived')
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS('Chat archive is up to date'))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.push_service import push_service
+
+
+class Command(BaseCommand):
+    help = 'Fetch Expo push receipts for recorded tickets and deactivate dead push tokens'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age-minutes',
+            type=int,
+            default=getattr(settings, 'PUSH_RECEIPT_DELAY_MINUTES', 15),
+            help='Only check tickets at least this old (default: PUSH_RECEIPT_DELAY_MINUTES)',
+        )
+        parser.add_argument(
+            '--max-age-hours',
+            type=int,
+            default=24,
+            help='Drop tickets older than this without checking; Expo no longer has their receipts',
+        )
+
+    def handle(self, *args, **options):
+        if options['min_age_minutes'] < 0:
+            raise CommandError('--min-age-minutes cannot be negative')
+        if options['max_age_hours'] < 1:
+            raise CommandError('--max-age-hours must be at least 1')
+
+        counts = push_service.process_receipts(
+            min_age=timedelta(minutes=options['min_age_minutes']),
+            max_age=timedelta(hours=options['max_age_hours']),
+        )
+
+        deactivated = counts.pop('deactivated', 0)
+        for outcome, count in sorted(counts.items()):
+            self.stdout.write(f'  {outcome}: {count}')
+        self.stdout.write(self.style.SUCCESS(f'Push receipts processed, {deactivated} tokens deactivated'))
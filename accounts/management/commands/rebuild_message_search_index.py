@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from accounts.message_search import get_message_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the chat message full-text search index from scratch'
+
+    def handle(self, *args, **options):
+        backend = get_message_search_backend()
+        self.stdout.write(f'Rebuilding message search index ({backend.__class__.__name__})...')
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} messages'))
@@ -0,0 +1,89 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from accounts.push_service import PUSH_DEFERRED_RELEASE_BATCH, PUSH_OUTBOX_BATCH_SIZE, push_service
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued push notifications from the push outbox, retrying failures with backoff, '
+        'and release pushes deferred by quiet hours'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=PUSH_OUTBOX_BATCH_SIZE,
+            help=f'Number of outbox rows claimed per batch (default: {PUSH_OUTBOX_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--release-batch',
+            type=int,
+            default=PUSH_DEFERRED_RELEASE_BATCH,
+            help=f'Users whose quiet-hours pushes are released per tick (default: {PUSH_DEFERRED_RELEASE_BATCH})',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds to sleep when the outbox has nothing due',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain everything currently due and exit instead of running forever',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['release_batch'] < 1:
+            raise CommandError('--release-batch must be at least 1')
+        if options['interval'] <= 0:
+            raise CommandError('--interval must be positive')
+
+        retention = timedelta(days=getattr(settings, 'PUSH_OUTBOX_RETENTION_DAYS', 7))
+        purge_every = 3600
+        last_purge = None
+        last_release = None
+
+        self.stdout.write('Push worker started' + (' (single pass)' if options['once'] else ''))
+        try:
+            while True:
+                # Long-running process: drop connections the database has timed out
+                close_old_connections()
+
+                if last_purge is None or time.monotonic() - last_purge >= purge_every:
+                    purged = push_service.purge_outbox(retention)
+                    if purged:
+                        self.stdout.write(f'  purged {purged} delivered notifications')
+                    last_purge = time.monotonic()
+
+                # At most --release-batch users per --interval, so a shared
+                # quiet-hours end is released at a bounded rate
+                released = 0
+                if options['once'] or last_release is None or time.monotonic() - last_release >= options['interval']:
+                    released = push_service.release_deferred(max_users=options['release_batch'])
+                    last_release = time.monotonic()
+                    if released:
+                        self.stdout.write(f'  released quiet-hours pushes for {released} users')
+
+                counts = push_service.process_outbox(batch_size=options['batch_size'])
+                if released or any(counts.values()):
+                    self.stdout.write(
+                        f"  sent {counts['sent']}, retrying {counts['retried']}, failed {counts['failed']}"
+                    )
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS('Push worker stopped'))
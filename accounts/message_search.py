@@ -0,0 +1,195 @@
+"""
+Full-text search over chat history (direct messages and activity group chats).
+
+Message text is folded like activity text (see activities/search.py) and kept
+in a per-kind search index keyed by message id, updated incrementally from
+the message post_save receivers and the delete paths. Archived messages keep
+their ids and stay indexed, so hits are loaded from the live table first and
+from the archive for the rest.
+
+Searches are always restricted to a set of chat ids (the chats the user
+belongs to) and return message ids newest first, below an optional id
+cursor, so results page with a stable keyset.
+
+The backend is pluggable via the MESSAGE_SEARCH_BACKEND setting. SQLite uses
+FTS5 shadow tables; other databases fall back to unindexed icontains matching
+until a dedicated backend is plugged in.
+"""
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BigIntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.module_loading import import_string
+
+from activities.search import fold_text, search_terms
+
+MESSAGE_KINDS = ('direct', 'group')
+
+
+def message_models(kind):
+    """Return (live model, archive model, chat field) for a message kind"""
+    from .models import ActivityGroupMessage, ArchivedDirectMessage, ArchivedGroupMessage, DirectMessage
+
+    if kind == 'direct':
+        return DirectMessage, ArchivedDirectMessage, 'conversation_id'
+    return ActivityGroupMessage, ArchivedGroupMessage, 'group_chat_id'
+
+
+class BaseMessageSearchBackend:
+    """Interface for message search backends"""
+
+    def index(self, kind, message):
+        """Add or refresh a message in the index"""
+        raise NotImplementedError
+
+    def remove(self, kind, message_id):
+        """Drop a message from the index"""
+        raise NotImplementedError
+
+    def search(self, kind, query, chat_ids, before_id=None, limit=20):
+        """Return ids of matching messages in `chat_ids`, newest first, below `before_id`"""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Re-index every live and archived message; returns the number of indexed rows"""
+        count = 0
+        for kind in MESSAGE_KINDS:
+            for model in message_models(kind)[:2]:
+                for message in model.objects.order_by().iterator():
+                    self.index(kind, message)
+                    count += 1
+        return count
+
+
+class SQLiteFTS5MessageBackend(BaseMessageSearchBackend):
+    """FTS5 virtual tables keyed by message id, with the chat id stored unindexed"""
+
+    tables = {
+        'direct': 'accounts_directmessage_fts',
+        'group': 'accounts_groupmessage_fts',
+    }
+
+    def index(self, kind, message):
+        chat_field = message_models(kind)[2]
+        table = self.tables[kind]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [message.pk])
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, message, chat_id) VALUES (%s, %s, %s)',
+                [message.pk, fold_text(message.message), getattr(message, chat_field)],
+            )
+
+    def remove(self, kind, message_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.tables[kind]} WHERE rowid = %s', [message_id])
+
+    def search(self, kind, query, chat_ids, before_id=None, limit=20):
+        terms = search_terms(query)
+        chat_ids = list(chat_ids)
+        if not terms or not chat_ids:
+            return []
+        # Every term must match, each as a prefix
+        match = ' '.join(f'"{term}"*' for term in terms)
+        table = self.tables[kind]
+        sql = (
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s '
+            f'AND chat_id IN ({", ".join(["%s"] * len(chat_ids))})'
+        )
+        params = [match, *chat_ids]
+        if before_id is not None:
+            sql += ' AND rowid < %s'
+            params.append(before_id)
+        sql += ' ORDER BY rowid DESC LIMIT %s'
+        params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            for table in self.tables.values():
+                cursor.execute(f'DELETE FROM {table}')
+        return super().rebuild()
+
+
+class BasicMessageSearchBackend(BaseMessageSearchBackend):
+    """Unindexed icontains matching for databases without a full-text backend"""
+
+    def index(self, kind, message):
+        pass
+
+    def remove(self, kind, message_id):
+        pass
+
+    def search(self, kind, query, chat_ids, before_id=None, limit=20):
+        if not query.strip():
+            return []
+        live_model, archive_model, chat_field = message_models(kind)
+        ids = []
+        for model in (live_model, archive_model):
+            queryset = model.objects.filter(**{f'{chat_field}__in': chat_ids, 'message__icontains': query})
+            if before_id is not None:
+                queryset = queryset.filter(id__lt=before_id)
+            ids.extend(queryset.order_by('-id').values_list('id', flat=True)[:limit])
+        return sorted(ids, reverse=True)[:limit]
+
+    def rebuild(self):
+        return 0
+
+
+def load_messages(kind, ids, prepare=None):
+    """Load messages by id from the live table, then the archive, as {id: message}.
+
+    Each message is annotated with ``previous_id`` / ``next_id``: its
+    neighbours in the same chat, live or archived, for opening the chat
+    around a hit. ``prepare`` can narrow each queryset (e.g. a serializer's
+    ``optimize_queryset``).
+    """
+    live_model, archive_model, chat_field = message_models(kind)
+
+    def neighbour(model, lookup, ordering):
+        return Subquery(model.objects.filter(**{
+            chat_field: OuterRef(chat_field),
+            f'id__{lookup}': OuterRef('id'),
+        }).order_by(ordering).values('id')[:1])
+
+    messages = {}
+    missing = set(ids)
+    for model in (live_model, archive_model):
+        if not missing:
+            break
+        queryset = model.objects.filter(id__in=missing).annotate(
+            # Archived ids are all older than live ones
+            previous_id=Coalesce(
+                neighbour(live_model, 'lt', '-id'), neighbour(archive_model, 'lt', '-id'),
+                output_field=BigIntegerField(),
+            ),
+            next_id=Coalesce(
+                neighbour(archive_model, 'gt', 'id'), neighbour(live_model, 'gt', 'id'),
+                output_field=BigIntegerField(),
+            ),
+        )
+        if prepare is not None:
+            queryset = prepare(queryset)
+        for message in queryset:
+            messages[message.pk] = message
+        missing -= set(messages)
+    return messages
+
+
+_backend = None
+
+
+def get_message_search_backend():
+    """Return the configured message search backend instance"""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'MESSAGE_SEARCH_BACKEND', None)
+        if backend_path:
+            _backend = import_string(backend_path)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTS5MessageBackend()
+        else:
+            _backend = BasicMessageSearchBackend()
+    return _backend
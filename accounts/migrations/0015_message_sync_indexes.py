@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_activitygroupchat_activitygroupmessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitygroupmessage',
+            index=models.Index(fields=['group_chat', 'id'], name='groupmessage_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='directmessage',
+            index=models.Index(fields=['conversation', 'id'], name='directmessage_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+PREVIEW_LENGTH = 200
+
+
+def populate_inbox_state(apps, schema_editor):
+    Conversation = apps.get_model('accounts', 'Conversation')
+    DirectMessage = apps.get_model('accounts', 'DirectMessage')
+    ActivityGroupChat = apps.get_model('accounts', 'ActivityGroupChat')
+    ActivityGroupMessage = apps.get_model('accounts', 'ActivityGroupMessage')
+    ActivityGroupChatMember = apps.get_model('accounts', 'ActivityGroupChatMember')
+    ActivityParticipant = apps.get_model('activities', 'ActivityParticipant')
+
+    for conversation in Conversation.objects.all():
+        last_message = DirectMessage.objects.filter(conversation=conversation).order_by('-id').first()
+        unread = dict(
+            DirectMessage.objects.filter(conversation=conversation, is_read=False)
+            .values_list('sender_id').annotate(total=models.Count('id')).order_by()
+        )
+        if last_message is not None:
+            conversation.last_message_id = last_message.pk
+            conversation.last_message_preview = last_message.message[:PREVIEW_LENGTH]
+            conversation.last_message_sender_id = last_message.sender_id
+            conversation.last_message_at = last_message.created_at
+        conversation.participant1_unread_count = unread.get(conversation.participant2_id, 0)
+        conversation.participant2_unread_count = unread.get(conversation.participant1_id, 0)
+        conversation.save(update_fields=[
+            'last_message_id', 'last_message_preview', 'last_message_sender', 'last_message_at',
+            'participant1_unread_count', 'participant2_unread_count',
+        ])
+
+    members = []
+    for group_chat in ActivityGroupChat.objects.select_related('activity'):
+        last_message = ActivityGroupMessage.objects.filter(group_chat=group_chat).order_by('-id').first()
+        if last_message is not None:
+            group_chat.last_message_id = last_message.pk
+            group_chat.last_message_preview = last_message.message[:PREVIEW_LENGTH]
+            group_chat.last_message_sender_id = last_message.sender_id
+            group_chat.last_message_at = last_message.created_at
+            group_chat.save(update_fields=[
+                'last_message_id', 'last_message_preview', 'last_message_sender', 'last_message_at',
+            ])
+        user_ids = set(ActivityParticipant.objects.filter(
+            activity_id=group_chat.activity_id,
+            status='approved'
+        ).values_list('user_id', flat=True))
+        user_ids.add(group_chat.activity.organizer_id)
+        # Unread history is not tracked per member; everyone starts caught up
+        members.extend(ActivityGroupChatMember(group_chat=group_chat, user_id=user_id) for user_id in user_ids)
+    ActivityGroupChatMember.objects.bulk_create(members, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_message_sync_indexes'),
+        ('activities', '0010_activitycard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitygroupchat',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='activitygroupchat',
+            name='last_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='activitygroupchat',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='activitygroupchat',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='participant1_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='participant2_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ActivityGroupChatMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('group_chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='accounts.activitygroupchat')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_chat_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Activity Group Chat Member',
+                'verbose_name_plural': 'Activity Group Chat Members',
+                'unique_together': {('group_chat', 'user')},
+            },
+        ),
+        migrations.RunPython(populate_inbox_state, migrations.RunPython.noop),
+    ]
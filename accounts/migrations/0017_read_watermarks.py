@@ -0,0 +1,78 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:01
+
+from django.db import migrations, models
+
+
+def watermark_for(messages, unread_count, last_message_id):
+    """Watermark that leaves the newest `unread_count` of `messages` unread"""
+    if not unread_count:
+        return last_message_id or 0
+    oldest_unread = list(messages.order_by('-id').values_list('id', flat=True)[unread_count - 1:unread_count])
+    return oldest_unread[0] - 1 if oldest_unread else 0
+
+
+def populate_read_watermarks(apps, schema_editor):
+    Conversation = apps.get_model('accounts', 'Conversation')
+    DirectMessage = apps.get_model('accounts', 'DirectMessage')
+    ActivityGroupChatMember = apps.get_model('accounts', 'ActivityGroupChatMember')
+    ActivityGroupMessage = apps.get_model('accounts', 'ActivityGroupMessage')
+
+    for conversation in Conversation.objects.all():
+        messages = DirectMessage.objects.filter(conversation=conversation)
+        conversation.participant1_last_read_id = watermark_for(
+            messages.filter(sender_id=conversation.participant2_id),
+            conversation.participant1_unread_count,
+            conversation.last_message_id,
+        )
+        conversation.participant2_last_read_id = watermark_for(
+            messages.filter(sender_id=conversation.participant1_id),
+            conversation.participant2_unread_count,
+            conversation.last_message_id,
+        )
+        conversation.save(update_fields=['participant1_last_read_id', 'participant2_last_read_id'])
+
+    for member in ActivityGroupChatMember.objects.select_related('group_chat'):
+        member.last_read_message_id = watermark_for(
+            ActivityGroupMessage.objects.filter(group_chat_id=member.group_chat_id).exclude(sender_id=member.user_id),
+            member.unread_count,
+            member.group_chat.last_message_id,
+        )
+        member.save(update_fields=['last_read_message_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_chat_inbox_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitygroupchatmember',
+            name='last_read_message_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='participant1_last_read_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='participant2_last_read_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_read_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='activitygroupchatmember',
+            name='unread_count',
+        ),
+        migrations.RemoveField(
+            model_name='conversation',
+            name='participant1_unread_count',
+        ),
+        migrations.RemoveField(
+            model_name='conversation',
+            name='participant2_unread_count',
+        ),
+    ]
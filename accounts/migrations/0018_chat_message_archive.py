@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDirectMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('sent', 'Göndərildi'), ('delivered', 'Çatdırıldı'), ('read', 'Oxundu')], default='sent', max_length=10)),
+                ('is_read', models.BooleanField(default=False)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='accounts.conversation')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Direct Message',
+                'verbose_name_plural': 'Archived Direct Messages',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['conversation', 'id'], name='archiveddm_history_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedGroupMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('sent', 'Göndərildi'), ('delivered', 'Çatdırıldı')], default='sent', max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('group_chat', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='accounts.activitygroupchat')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Group Message',
+                'verbose_name_plural': 'Archived Group Messages',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['group_chat', 'id'], name='archivedgroup_history_idx')],
+            },
+        ),
+    ]
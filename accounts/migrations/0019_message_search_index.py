@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:20
+
+from django.db import migrations
+
+from activities.search import fold_text
+
+FTS_TABLES = {
+    'accounts_directmessage_fts': [('DirectMessage', 'conversation_id'), ('ArchivedDirectMessage', 'conversation_id')],
+    'accounts_groupmessage_fts': [('ActivityGroupMessage', 'group_chat_id'), ('ArchivedGroupMessage', 'group_chat_id')],
+}
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases use the fallback search backend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, sources in FTS_TABLES.items():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"message, chat_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        for model_name, chat_field in sources:
+            model = apps.get_model('accounts', model_name)
+            for message_id, chat_id, message in model.objects.values_list('id', chat_field, 'message').iterator():
+                schema_editor.execute(
+                    f"INSERT INTO {table} (rowid, message, chat_id) VALUES (%s, %s, %s)",
+                    [message_id, fold_text(message), chat_id],
+                )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table in FTS_TABLES:
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_chat_message_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:15
+
+import accounts.models
+from django.db import migrations, models
+
+# NotificationSettings.PREFERENCE_FIELDS when this migration was written
+PREFERENCE_FIELDS = (
+    'push_enabled',
+    'friend_requests',
+    'friend_request_accepted',
+    'friend_new_activity',
+    'activity_join_request',
+    'activity_participant_left',
+    'activity_comment',
+    'activity_update',
+    'activity_cancelled',
+    'activity_reminder',
+    'new_activities_nearby',
+    'new_activities_interests',
+    'new_message',
+    'system_updates',
+    'promotional',
+)
+
+
+def populate_preference_mask(apps, schema_editor):
+    NotificationSettings = apps.get_model('accounts', 'NotificationSettings')
+    rows = list(NotificationSettings.objects.all())
+    for row in rows:
+        row.preference_mask = sum(1 << bit for bit, field in enumerate(PREFERENCE_FIELDS) if getattr(row, field))
+    NotificationSettings.objects.bulk_update(rows, ['preference_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_push_tickets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationsettings',
+            name='preference_mask',
+            field=models.PositiveIntegerField(db_index=True, default=accounts.models.default_preference_mask, editable=False),
+        ),
+        migrations.RunPython(populate_preference_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_notification_preference_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeferredPush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(max_length=30)),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField()),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('channel_id', models.CharField(default='default', max_length=50)),
+                ('release_at', models.DateTimeField()),
+                ('release_bucket', models.PositiveIntegerField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deferred_pushes', to='accounts.notification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deferred_pushes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Deferred Push',
+                'verbose_name_plural': 'Deferred Pushes',
+                'ordering': ['release_at', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_deferred_pushes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pushoutbox',
+            name='coalesced_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='pushoutbox',
+            name='collapse_key',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+    ]
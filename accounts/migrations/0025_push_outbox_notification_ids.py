@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_push_outbox_collapse_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pushoutbox',
+            name='notification_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -1,10 +1,20 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.lookups import Exact
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import RegexValidator
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_time
 import os
 
+# Length of the last-message preview stored on conversations and group chats
+MESSAGE_PREVIEW_LENGTH = 200
+
 
 class UserManager(BaseUserManager):
     """Custom user manager for phone-based authentication"""
@@ -365,6 +375,16 @@ class Conversation(models.Model):
     """Model for direct message conversations between two users"""
     participant1 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_participant1')
     participant2 = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_participant2')
+    
+    # Inbox state, maintained on message write (see record_message)
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=MESSAGE_PREVIEW_LENGTH, blank=True)
+    last_message_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Read watermarks: id of the newest message each participant has read
+    participant1_last_read_id = models.BigIntegerField(default=0)
+    participant2_last_read_id = models.BigIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -405,13 +425,89 @@ class Conversation(models.Model):
         """Get the last message in this conversation"""
         return self.messages.order_by('-created_at').first()
     
+    def other_participant_id(self, user_id):
+        if user_id == self.participant1_id:
+            return self.participant2_id
+        return self.participant1_id
+    
+    def last_read_field(self, user_id):
+        """Name of the read watermark column for a participant"""
+        if user_id == self.participant1_id:
+            return 'participant1_last_read_id'
+        return 'participant2_last_read_id'
+    
+    def get_last_read_id(self, user_id):
+        return getattr(self, self.last_read_field(user_id))
+    
     def get_unread_count(self, user):
         """Get count of unread messages for a user"""
-        return self.messages.filter(is_read=False).exclude(sender=user).count()
+        return self.messages.filter(id__gt=self.get_last_read_id(user.pk)).exclude(sender=user).count()
+    
+    @classmethod
+    def with_unread_counts(cls, queryset, user):
+        """Annotate `unread_count` for `user`: a range count past their watermark on the (conversation, id) index"""
+        unread = DirectMessage.objects.filter(
+            conversation=OuterRef('pk'),
+            id__gt=OuterRef('user_last_read_id'),
+        ).exclude(sender_id=user.pk).order_by().values('conversation').annotate(total=Count('id')).values('total')
+        return queryset.annotate(
+            user_last_read_id=Case(
+                When(participant1_id=user.pk, then=F('participant1_last_read_id')),
+                default=F('participant2_last_read_id'),
+            ),
+        ).annotate(unread_count=Coalesce(Subquery(unread), 0))
+    
+    @classmethod
+    def record_message(cls, message):
+        """Make a new message the conversation's last one"""
+        conversation = message.conversation
+        state = {
+            'last_message_id': message.pk,
+            'last_message_preview': message.message[:MESSAGE_PREVIEW_LENGTH],
+            'last_message_sender_id': message.sender_id,
+            'last_message_at': message.created_at,
+            'updated_at': timezone.now(),
+        }
+        cls.objects.filter(pk=conversation.pk).update(**state)
+        # Keep the caller's instance current so a later save() does not write stale state
+        for field, value in state.items():
+            setattr(conversation, field, value)
+    
+    def mark_read(self, user, message_id=None):
+        """Move a participant's read watermark up to `message_id` (default: the last message)"""
+        if message_id is None:
+            message_id = self.last_message_id
+        field = self.last_read_field(user.pk)
+        if not message_id or message_id <= getattr(self, field):
+            return
+        # One row, and never backwards when two clients read at once
+        Conversation.objects.filter(pk=self.pk).update(**{field: Greatest(F(field), message_id)})
+        setattr(self, field, message_id)
+        from .realtime import publish_read_receipt
+        publish_read_receipt(self, user.pk, message_id)
+    
+    def refresh_inbox_state(self):
+        """Recompute the last message from the messages, e.g. after one was deleted"""
+        last_message = self.messages.order_by('-id').first()
+        self.last_message_id = last_message.pk if last_message else None
+        self.last_message_preview = last_message.message[:MESSAGE_PREVIEW_LENGTH] if last_message else ''
+        self.last_message_sender_id = last_message.sender_id if last_message else None
+        self.last_message_at = last_message.created_at if last_message else None
+        Conversation.objects.filter(pk=self.pk).update(
+            last_message_id=self.last_message_id,
+            last_message_preview=self.last_message_preview,
+            last_message_sender_id=self.last_message_sender_id,
+            last_message_at=self.last_message_at,
+        )
 
 
 class DirectMessage(models.Model):
-    """Model for direct messages between users"""
+    """Model for direct messages between users.
+    
+    Read state lives in the conversation's read watermarks; ``is_read``,
+    ``status='read'`` and ``read_at`` are only kept for messages read before
+    watermarks existed.
+    """
     MESSAGE_STATUS_CHOICES = [
         ('sent', 'Göndərildi'),
         ('delivered', 'Çatdırıldı'),
@@ -429,23 +525,61 @@ class DirectMessage(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Incremental sync: ?after= / ?before= windows within one conversation
+            models.Index(fields=['conversation', 'id'], name='directmessage_sync_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.get_full_name()}: {self.message[:50]}..."
     
+    def is_read_by_recipient(self):
+        """Whether the recipient's read watermark has reached this message"""
+        conversation = self.conversation
+        return self.pk <= conversation.get_last_read_id(conversation.other_participant_id(self.sender_id))
+    
     def mark_as_read(self):
-        """Mark the message as read"""
-        from django.utils import timezone
-        if not self.is_read:
-            self.is_read = True
-            self.status = 'read'
-            self.read_at = timezone.now()
-            self.save(update_fields=['is_read', 'status', 'read_at'])
+        """Mark the message, and every earlier one, as read by the recipient"""
+        conversation = self.conversation
+        recipient = conversation.participant2 if self.sender_id == conversation.participant1_id else conversation.participant1
+        conversation.mark_read(recipient, self.pk)
+
+
+class ArchivedDirectMessage(models.Model):
+    """Direct message moved to cold storage; keeps its original id (see config/archive.py)"""
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='archived_messages')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=DirectMessage.MESSAGE_STATUS_CHOICES, default='sent')
+    is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Archived Direct Message"
+        verbose_name_plural = "Archived Direct Messages"
+        indexes = [
+            models.Index(fields=['conversation', 'id'], name='archiveddm_history_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.sender_id}: {self.message[:50]}..."
+    
+    is_read_by_recipient = DirectMessage.is_read_by_recipient
 
 
 class ActivityGroupChat(models.Model):
     """Group chat for activity participants"""
     activity = models.OneToOneField('activities.Activity', on_delete=models.CASCADE, related_name='group_chat')
+    
+    # Inbox state, maintained on message write (see record_message)
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=MESSAGE_PREVIEW_LENGTH, blank=True)
+    last_message_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -457,32 +591,111 @@ class ActivityGroupChat(models.Model):
     def __str__(self):
         return f"Group Chat: {self.activity.title}"
     
+    def get_member_ids(self):
+        """Ids of the organizer and approved participants, from the membership cache"""
+        from activities.chat_membership import get_chat_members
+        members = get_chat_members(self.activity_id)
+        return members.member_ids if members is not None else frozenset()
+    
     def get_participants(self):
         """Get all approved participants + organizer"""
-        from activities.models import ActivityParticipant
-        participants = list(ActivityParticipant.objects.filter(
-            activity=self.activity,
-            status='approved'
-        ).values_list('user', flat=True))
-        participants.append(self.activity.organizer_id)
-        return User.objects.filter(id__in=participants)
+        return User.objects.filter(id__in=self.get_member_ids())
     
     def is_participant(self, user):
         """Check if user is a participant in this chat"""
-        from activities.models import ActivityParticipant
-        if self.activity.organizer == user:
-            return True
-        return ActivityParticipant.objects.filter(
-            activity=self.activity,
-            user=user,
-            status='approved'
-        ).exists()
+        return user.pk in self.get_member_ids()
     
     @classmethod
     def get_or_create_for_activity(cls, activity):
         """Get or create group chat for an activity"""
         chat, created = cls.objects.get_or_create(activity=activity)
+        if created:
+            chat.sync_members()
         return chat
+    
+    def sync_members(self):
+        """Create member rows for the organizer and every approved participant"""
+        ActivityGroupChatMember.objects.bulk_create(
+            [ActivityGroupChatMember(group_chat=self, user_id=user_id) for user_id in self.get_member_ids()],
+            ignore_conflicts=True,
+        )
+    
+    @classmethod
+    def record_message(cls, message):
+        """Make a new message the chat's last one"""
+        group_chat = message.group_chat
+        state = {
+            'last_message_id': message.pk,
+            'last_message_preview': message.message[:MESSAGE_PREVIEW_LENGTH],
+            'last_message_sender_id': message.sender_id,
+            'last_message_at': message.created_at,
+            'updated_at': timezone.now(),
+        }
+        cls.objects.filter(pk=group_chat.pk).update(**state)
+        for field, value in state.items():
+            setattr(group_chat, field, value)
+    
+    def mark_read(self, user, message_id=None):
+        """Move a member's read watermark up to `message_id` (default: the last message)"""
+        if message_id is None:
+            message_id = self.last_message_id
+        if not message_id:
+            return
+        updated = ActivityGroupChatMember.objects.filter(group_chat=self, user=user).update(
+            last_read_message_id=Greatest(F('last_read_message_id'), message_id)
+        )
+        if not updated:
+            ActivityGroupChatMember.objects.get_or_create(
+                group_chat=self,
+                user=user,
+                defaults={'last_read_message_id': message_id}
+            )
+
+
+class ActivityGroupChatMember(models.Model):
+    """A user's membership of an activity group chat, with their read watermark.
+    
+    Rows mirror the organizer and approved participants; they are kept in sync
+    from ActivityParticipant changes (see activities/models.py).
+    """
+    group_chat = models.ForeignKey(ActivityGroupChat, on_delete=models.CASCADE, related_name='members')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='group_chat_memberships')
+    # Id of the newest message the member has read
+    last_read_message_id = models.BigIntegerField(default=0)
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ('group_chat', 'user')
+        verbose_name = "Activity Group Chat Member"
+        verbose_name_plural = "Activity Group Chat Members"
+    
+    def __str__(self):
+        return f"{self.user_id} in group chat {self.group_chat_id}"
+    
+    @classmethod
+    def with_unread_counts(cls, queryset):
+        """Annotate `unread_count`: a range count past the watermark on the (group_chat, id) index"""
+        unread = ActivityGroupMessage.objects.filter(
+            group_chat=OuterRef('group_chat_id'),
+            id__gt=OuterRef('last_read_message_id'),
+        ).exclude(sender=OuterRef('user_id')).order_by().values('group_chat').annotate(total=Count('id')).values('total')
+        return queryset.annotate(unread_count=Coalesce(Subquery(unread), 0))
+    
+    @classmethod
+    def join(cls, activity_id, user_id):
+        """Add a user to an activity's group chat, if the chat exists"""
+        group_chat = ActivityGroupChat.objects.filter(activity_id=activity_id).values('id', 'last_message_id').first()
+        if group_chat is not None:
+            # Earlier history does not count as unread for a new member
+            cls.objects.get_or_create(
+                group_chat_id=group_chat['id'],
+                user_id=user_id,
+                defaults={'last_read_message_id': group_chat['last_message_id'] or 0}
+            )
+    
+    @classmethod
+    def leave(cls, activity_id, user_id):
+        cls.objects.filter(group_chat__activity_id=activity_id, user_id=user_id).delete()
 
 
 class ActivityGroupMessage(models.Model):
@@ -503,11 +716,36 @@ class ActivityGroupMessage(models.Model):
         ordering = ['created_at']
         verbose_name = "Activity Group Message"
         verbose_name_plural = "Activity Group Messages"
+        indexes = [
+            # Incremental sync: ?after= / ?before= windows within one group chat
+            models.Index(fields=['group_chat', 'id'], name='groupmessage_sync_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.get_full_name()}: {self.message[:50]}..."
 
 
+class ArchivedGroupMessage(models.Model):
+    """Group chat message moved to cold storage; keeps its original id (see config/archive.py)"""
+    id = models.BigIntegerField(primary_key=True)
+    group_chat = models.ForeignKey(ActivityGroupChat, on_delete=models.CASCADE, related_name='archived_messages')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=ActivityGroupMessage.MESSAGE_STATUS_CHOICES, default='sent')
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Archived Group Message"
+        verbose_name_plural = "Archived Group Messages"
+        indexes = [
+            models.Index(fields=['group_chat', 'id'], name='archivedgroup_history_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.sender_id}: {self.message[:50]}..."
+
+
 class Newsletter(models.Model):
     """Model for newsletter subscriptions"""
     email = models.EmailField(unique=True)
@@ -524,8 +762,63 @@ class Newsletter(models.Model):
         return f"{self.email} - {'Active' if self.is_active else 'Inactive'}"
 
 
+def default_preference_mask():
+    """Preference mask of a NotificationSettings row with every flag at its default"""
+    mask = 0
+    for bit, field in enumerate(NotificationSettings.PREFERENCE_FIELDS):
+        if NotificationSettings._meta.get_field(field).get_default():
+            mask |= 1 << bit
+    return mask
+
+
 class NotificationSettings(models.Model):
-    """Model for user notification preferences"""
+    """Model for user notification preferences
+
+    The push-related flags are also compiled into ``preference_mask`` (one
+    bit per entry of PREFERENCE_FIELDS) on every save, so fan-outs can select
+    eligible recipients in SQL with ``push_allowed_q``. Bulk ``update()``
+    calls bypass save() and must set the mask themselves.
+    """
+    # Bit positions are stored in preference_mask: append, never reorder
+    PREFERENCE_FIELDS = (
+        'push_enabled',
+        'friend_requests',
+        'friend_request_accepted',
+        'friend_new_activity',
+        'activity_join_request',
+        'activity_participant_left',
+        'activity_comment',
+        'activity_update',
+        'activity_cancelled',
+        'activity_reminder',
+        'new_activities_nearby',
+        'new_activities_interests',
+        'new_message',
+        'system_updates',
+        'promotional',
+    )
+    
+    # Notification type -> preference flag that controls its pushes
+    NOTIFICATION_TYPE_FIELDS = {
+        'friend_request': 'friend_requests',
+        'friend_accepted': 'friend_request_accepted',
+        'friend_rejected': 'friend_request_accepted',
+        'friend_new_activity': 'friend_new_activity',
+        'activity_join_request': 'activity_join_request',
+        'activity_participant_joined': 'activity_join_request',
+        'activity_participant_left': 'activity_participant_left',
+        'activity_comment': 'activity_comment',
+        'activity_update': 'activity_update',
+        'activity_cancelled': 'activity_cancelled',
+        'activity_reminder': 'activity_reminder',
+        'activity_starting_soon': 'activity_reminder',
+        'new_activity_nearby': 'new_activities_nearby',
+        'new_activity_interest': 'new_activities_interests',
+        'new_message': 'new_message',
+        'system': 'system_updates',
+        'promotional': 'promotional',
+    }
+    
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='notification_settings')
     
     # Friend-related notifications
@@ -563,6 +856,9 @@ class NotificationSettings(models.Model):
     quiet_hours_start = models.TimeField(default='22:00', help_text="Səssiz saatların başlanğıcı")
     quiet_hours_end = models.TimeField(default='08:00', help_text="Səssiz saatların sonu")
     
+    # Compiled from PREFERENCE_FIELDS on save
+    preference_mask = models.PositiveIntegerField(default=default_preference_mask, db_index=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -572,6 +868,82 @@ class NotificationSettings(models.Model):
     
     def __str__(self):
         return f"Notification Settings for {self.user.get_full_name()}"
+    
+    def save(self, *args, **kwargs):
+        self.preference_mask = self.compute_preference_mask()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'preference_mask' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'preference_mask']
+        super().save(*args, **kwargs)
+    
+    def compute_preference_mask(self):
+        mask = 0
+        for bit, field in enumerate(self.PREFERENCE_FIELDS):
+            if getattr(self, field):
+                mask |= 1 << bit
+        return mask
+    
+    @classmethod
+    def preference_bits(cls, notification_type):
+        """Mask bits a user needs set to get pushes of `notification_type`"""
+        bits = 1 << cls.PREFERENCE_FIELDS.index('push_enabled')
+        field = cls.NOTIFICATION_TYPE_FIELDS.get(notification_type)
+        if field:
+            bits |= 1 << cls.PREFERENCE_FIELDS.index(field)
+        return bits
+    
+    @classmethod
+    def preference_q(cls, notification_type, prefix=''):
+        """Q selecting users whose preferences accept pushes of `notification_type`.
+
+        `prefix` is the lookup path from the queried model to the settings row
+        (e.g. ``'user__notification_settings__'`` on PushToken); with a prefix,
+        users without a settings row are matched on the defaults.
+        """
+        bits = cls.preference_bits(notification_type)
+        allowed = models.Q(Exact(F(f'{prefix}preference_mask').bitand(bits), bits))
+        if prefix and default_preference_mask() & bits == bits:
+            allowed |= models.Q(**{f'{prefix.rstrip("_")}__isnull': True})
+        return allowed
+    
+    @classmethod
+    def quiet_hours_q(cls, prefix='', now=None):
+        """Q selecting settings rows whose quiet hours include `now` (local time)"""
+        now = now or timezone.localtime().time()
+        start, end = f'{prefix}quiet_hours_start', f'{prefix}quiet_hours_end'
+        return models.Q(**{f'{prefix}quiet_hours_enabled': True}) & (
+            # Same-day window, e.g. 13:00 - 15:00
+            models.Q(**{f'{start}__lt': F(end), f'{start}__lte': now, f'{end}__gte': now})
+            # Overnight window, e.g. 22:00 - 08:00
+            | (
+                models.Q(**{f'{start}__gte': F(end)})
+                & (models.Q(**{f'{start}__lte': now}) | models.Q(**{f'{end}__gte': now}))
+            )
+        )
+    
+    @classmethod
+    def push_allowed_q(cls, notification_type, prefix='', now=None):
+        """Q selecting users who accept pushes of `notification_type` right now"""
+        # The negated quiet-hours test also holds for users without settings
+        return cls.preference_q(notification_type, prefix) & ~cls.quiet_hours_q(prefix, now)
+    
+    def in_quiet_hours(self, now=None):
+        if not self.quiet_hours_enabled or not self.quiet_hours_start or not self.quiet_hours_end:
+            return False
+        now = now or timezone.localtime().time()
+        # Unsaved instances still hold the string defaults
+        start, end = (
+            parse_time(value) if isinstance(value, str) else value
+            for value in (self.quiet_hours_start, self.quiet_hours_end)
+        )
+        if start < end:
+            return start <= now <= end
+        return now >= start or now <= end
+    
+    def allows_push(self, notification_type, now=None):
+        """Single-user counterpart of push_allowed_q"""
+        bits = self.preference_bits(notification_type)
+        return self.preference_mask & bits == bits and not self.in_quiet_hours(now)
 
 
 class PushToken(models.Model):
@@ -665,9 +1037,221 @@ class Notification(models.Model):
         self.save(update_fields=['is_read'])
 
 
+class PushOutbox(models.Model):
+    """Push notification waiting to be delivered to Expo by the push worker.
+
+    Rows are written in the same transaction as the message or notification
+    that triggers them, and the run_push_worker command sends them after
+    commit, so API requests never wait on Expo. Claiming a row leases it by
+    moving next_attempt_at past the send; a row whose worker died mid-send
+    becomes due again when the lease runs out. Failed sends are retried with
+    exponential backoff until PUSH_OUTBOX_MAX_ATTEMPTS is reached.
+
+    Chat pushes carry a ``collapse_key``; further messages of the same chat
+    for the same recipient are merged into a still-unsent row instead of
+    adding rows (see PushNotificationService.queue_chat_push).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    tokens = models.JSONField(default=list)
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    channel_id = models.CharField(max_length=50, default='default')
+    priority = models.CharField(max_length=10, default='high')
+    sound = models.CharField(max_length=50, default='default')
+    badge = models.PositiveIntegerField(null=True, blank=True)
+    notification = models.ForeignKey(
+        Notification, on_delete=models.SET_NULL, null=True, blank=True, related_name='push_outbox'
+    )
+    # Quiet-hours digests: ids of the notifications the summary push stands for
+    notification_ids = models.JSONField(default=list, blank=True)
+    # Chat pushes: one pending row per (conversation, recipient) absorbs a burst
+    collapse_key = models.CharField(max_length=100, blank=True, db_index=True)
+    coalesced_count = models.PositiveIntegerField(default=1)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        verbose_name = "Push Outbox Entry"
+        verbose_name_plural = "Push Outbox"
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='pushoutbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.status}, {len(self.tokens)} tokens)"
+
+    @classmethod
+    def claim_due(cls, batch_size, lease):
+        """Lease up to `batch_size` due rows to the calling worker and return them"""
+        now = timezone.now()
+        lease_until = now + lease
+        with transaction.atomic():
+            # Row locks where the database has them; elsewhere the lease
+            # filter below keeps two workers from claiming the same row
+            ids = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return []
+            cls.objects.filter(id__in=ids, next_attempt_at__lte=now).update(
+                next_attempt_at=lease_until,
+                attempts=F('attempts') + 1,
+            )
+        return list(cls.objects.filter(id__in=ids, next_attempt_at=lease_until).select_related('notification'))
+
+    def mark_sent(self):
+        now = timezone.now()
+        self.status = 'sent'
+        self.sent_at = now
+        self.last_error = ''
+        self.save(update_fields=['status', 'sent_at', 'last_error'])
+        notification_ids = [*self.notification_ids, *([self.notification_id] if self.notification_id else [])]
+        if notification_ids:
+            Notification.objects.filter(pk__in=notification_ids).update(is_pushed=True, pushed_at=now)
+
+    def mark_failed(self, error, max_attempts, retry_delay, max_retry_delay, tokens=None):
+        """Schedule a retry with exponential backoff, or give up after `max_attempts`.
+
+        `tokens` narrows the retry to the tokens that were not delivered.
+        """
+        self.last_error = error
+        if tokens is not None:
+            self.tokens = tokens
+        if self.attempts >= max_attempts:
+            self.status = 'failed'
+        else:
+            delay = min(retry_delay * 2 ** (self.attempts - 1), max_retry_delay)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.save(update_fields=['tokens', 'status', 'next_attempt_at', 'last_error'])
+
+    def mark_undeliverable(self, error):
+        """Give up without retrying: Expo rejected every token"""
+        self.status = 'failed'
+        self.last_error = error
+        self.save(update_fields=['status', 'last_error'])
+
+
+class PushTicket(models.Model):
+    """Expo push ticket whose delivery receipt has not been checked yet.
+
+    Expo answers a send with a ticket per message; the final outcome (for
+    example DeviceNotRegistered after an uninstall) is only available as a
+    receipt some minutes later. process_push_receipts fetches receipts for
+    these tickets in bulk, deactivates dead tokens and deletes the tickets.
+    """
+    ticket_id = models.CharField(max_length=64, unique=True)
+    token = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = "Push Ticket"
+        verbose_name_plural = "Push Tickets"
+
+    def __str__(self):
+        return f"{self.ticket_id} ({self.token[:20]}...)"
+
+
+class DeferredPush(models.Model):
+    """Push held back by the recipient's quiet hours.
+
+    Rows are filed under ``release_bucket``, the minute their release time
+    falls in; release times are the end of the user's quiet-hours window plus
+    a per-user offset, so a common 08:00 end spreads over several buckets.
+    The push worker releases due buckets a bounded number of users at a time
+    and coalesces each user's pending rows into a single push.
+    """
+    BUCKET_SECONDS = 60
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='deferred_pushes')
+    notification = models.ForeignKey(
+        Notification, on_delete=models.SET_NULL, null=True, blank=True, related_name='deferred_pushes'
+    )
+    notification_type = models.CharField(max_length=30)
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    channel_id = models.CharField(max_length=50, default='default')
+
+    release_at = models.DateTimeField()
+    release_bucket = models.PositiveIntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['release_at', 'id']
+        verbose_name = "Deferred Push"
+        verbose_name_plural = "Deferred Pushes"
+
+    def __str__(self):
+        return f"{self.title} for user {self.user_id} at {self.release_at:%Y-%m-%d %H:%M}"
+
+    @classmethod
+    def bucket_for(cls, moment):
+        return int(moment.timestamp()) // cls.BUCKET_SECONDS
+
+
 # Signal to create NotificationSettings when a new User is created
 @receiver(post_save, sender=User)
 def create_notification_settings(sender, instance, created, **kwargs):
     """Create NotificationSettings for new users"""
     if created:
         NotificationSettings.objects.get_or_create(user=instance)
+
+
+# Deletes are published by the views that delete messages: a post_delete
+# receiver would turn conversation/activity cascades into per-row deletes
+@receiver(post_save, sender=DirectMessage)
+def publish_direct_message_on_save(sender, instance, created, raw=False, **kwargs):
+    """Push new and edited direct messages to both participants' WebSockets"""
+    if raw:
+        return
+    from .realtime import publish_direct_message
+    if created:
+        Conversation.record_message(instance)
+    publish_direct_message('created' if created else 'updated', instance)
+
+
+@receiver(post_save, sender=ActivityGroupMessage)
+def publish_group_message_on_save(sender, instance, created, raw=False, **kwargs):
+    """Push new and edited group chat messages to the activity's room"""
+    if raw:
+        return
+    from .realtime import publish_group_message
+    if created:
+        ActivityGroupChat.record_message(instance)
+    publish_group_message('created' if created else 'updated', instance)
+
+
+# Search index removals also happen in the deleting views, for the same reason
+@receiver(post_save, sender=DirectMessage)
+def index_direct_message_on_save(sender, instance, raw=False, **kwargs):
+    """Add new and edited direct messages to the message search index"""
+    if raw:
+        return
+    from .message_search import get_message_search_backend
+    get_message_search_backend().index('direct', instance)
+
+
+@receiver(post_save, sender=ActivityGroupMessage)
+def index_group_message_on_save(sender, instance, raw=False, **kwargs):
+    """Add new and edited group chat messages to the message search index"""
+    if raw:
+        return
+    from .message_search import get_message_search_backend
+    get_message_search_backend().index('group', instance)
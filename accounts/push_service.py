@@ -2,20 +2,168 @@
 Push Notification Service for Acteezer
 
 This service handles sending push notifications via Expo's push notification service.
+
+Request handlers queue pushes in the PushOutbox table (queue_push_notification)
+inside their own transaction; the run_push_worker command delivers them in
+batches, retrying failures with backoff.
+
+Sends go through send_push_messages: one pooled HTTP session per process,
+messages split into Expo's 100-per-request batches, large bodies gzipped,
+batches posted concurrently from a small thread pool, and a result per
+message (Expo's push ticket, or the transport error) in input order.
+
+Pushes that land in a recipient's quiet hours are kept as DeferredPush rows
+and released by the worker, one summary push per user, once the window ends.
+
+Ticket ids are kept as PushTicket rows; the process_push_receipts command
+later fetches their receipts in bulk and deactivates tokens Expo reports as
+dead. Both Expo endpoints can be overridden (EXPO_PUSH_URL and
+EXPO_PUSH_RECEIPTS_URL settings), e.g. to point at a local stand-in.
 """
 
+import gzip
+import json
 import requests
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from typing import List, Dict, Any, Optional
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from requests.adapters import HTTPAdapter
 from django.utils import timezone
 
-from .models import User, PushToken, Notification, NotificationSettings
+from .models import (
+    User, PushToken, Notification, NotificationSettings, PushOutbox, PushTicket, DeferredPush,
+    default_preference_mask
+)
 
 logger = logging.getLogger(__name__)
 
-# Expo Push Notification API endpoint
+# Expo Push Notification API endpoints (overridable in settings)
 EXPO_PUSH_URL = 'https://exp.host/--/api/v2/push/send'
+EXPO_PUSH_RECEIPTS_URL = 'https://exp.host/--/api/v2/push/getReceipts'
+
+# Expo accepts at most 100 messages per request
+EXPO_PUSH_BATCH_SIZE = 100
+
+# Expo accepts at most 1000 ticket ids per receipts request
+EXPO_RECEIPTS_BATCH_SIZE = 1000
+
+# Ticket and receipt errors meaning the token will never work again
+DEAD_TOKEN_ERRORS = {'DeviceNotRegistered', 'InvalidProviderToken'}
+
+# Request bodies above this size are gzip-compressed
+EXPO_GZIP_MIN_BYTES = 1024
+
+PUSH_OUTBOX_BATCH_SIZE = 50
+
+# Users whose deferred pushes are released per worker tick
+PUSH_DEFERRED_RELEASE_BATCH = 200
+
+_session = None
+_executor = None
+_lock = threading.Lock()
+
+
+def get_push_session() -> requests.Session:
+    """Return the process-wide HTTP session with a connection pool sized for the send threads"""
+    global _session
+    with _lock:
+        if _session is None:
+            workers = getattr(settings, 'PUSH_TRANSPORT_MAX_WORKERS', 4)
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+            session.headers.update({
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip, deflate',
+            })
+            _session = session
+        return _session
+
+
+def get_push_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PUSH_TRANSPORT_MAX_WORKERS', 4),
+                thread_name_prefix='expo-push',
+            )
+        return _executor
+
+
+def _post(url: str, payload: Any) -> requests.Response:
+    """POST a JSON payload to Expo, gzipped when large"""
+    body = json.dumps(payload).encode()
+    headers = {}
+    if len(body) >= EXPO_GZIP_MIN_BYTES:
+        body = gzip.compress(body)
+        headers['Content-Encoding'] = 'gzip'
+    response = get_push_session().post(
+        url,
+        data=body,
+        headers=headers,
+        timeout=(
+            getattr(settings, 'PUSH_CONNECT_TIMEOUT', 5),
+            getattr(settings, 'PUSH_REQUEST_TIMEOUT', 10),
+        ),
+    )
+    response.raise_for_status()
+    return response
+
+
+def _post_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Post one batch to Expo and return a result per message"""
+    try:
+        response = _post(getattr(settings, 'EXPO_PUSH_URL', EXPO_PUSH_URL), batch)
+        tickets = response.json()['data']
+        if len(tickets) != len(batch):
+            raise ValueError(f'Expected {len(batch)} push tickets, got {len(tickets)}')
+    except Exception as e:
+        logger.error(f'Error sending push notification batch: {e}')
+        # Rejected requests other than rate limiting will fail the same way again
+        status_code = getattr(getattr(e, 'response', None), 'status_code', None)
+        retryable = status_code is None or status_code == 429 or status_code >= 500
+        return [{'status': 'error', 'message': str(e), 'retryable': retryable} for _ in batch]
+    return tickets
+
+
+def send_push_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Send Expo push messages, batched and concurrently
+    
+    Returns:
+        One result per message, in order: Expo's push ticket ({'status': 'ok', 'id': ...}
+        or {'status': 'error', 'message': ..., 'details': ...}), or for a failed request
+        {'status': 'error', 'message': ..., 'retryable': bool}
+    """
+    batches = [messages[i:i + EXPO_PUSH_BATCH_SIZE] for i in range(0, len(messages), EXPO_PUSH_BATCH_SIZE)]
+    if len(batches) <= 1:
+        batch_results = [_post_batch(batch) for batch in batches]
+    else:
+        batch_results = get_push_executor().map(_post_batch, batches)
+    return [result for results in batch_results for result in results]
+
+
+def fetch_push_receipts(ticket_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch Expo receipts for ticket ids, in batches
+    
+    Returns:
+        {ticket_id: receipt} for the receipts Expo has ready; ids missing
+        from the result are not ready yet (or have expired)
+    """
+    url = getattr(settings, 'EXPO_PUSH_RECEIPTS_URL', EXPO_PUSH_RECEIPTS_URL)
+    receipts = {}
+    for i in range(0, len(ticket_ids), EXPO_RECEIPTS_BATCH_SIZE):
+        response = _post(url, {'ids': ticket_ids[i:i + EXPO_RECEIPTS_BATCH_SIZE]})
+        receipts.update(response.json()['data'])
+    return receipts
 
 
 class PushNotificationService:
@@ -44,52 +192,63 @@ class PushNotificationService:
     def should_send_notification(user: User, notification_type: str) -> bool:
         """Check if user should receive this type of notification"""
         settings = PushNotificationService.get_notification_settings(user)
+        return bool(settings) and settings.allows_push(notification_type)
+
+    @staticmethod
+    def eligible_tokens(recipient_ids, notification_type: str, now=None) -> List[str]:
+        """
+        Active push tokens of the recipients who accept `notification_type` now
         
-        if not settings or not settings.push_enabled:
-            return False
-        
-        # Check quiet hours
-        if settings.quiet_hours_enabled:
-            now = timezone.localtime().time()
-            start = settings.quiet_hours_start
-            end = settings.quiet_hours_end
-            
-            if start and end:
-                if start < end:
-                    # Normal case: e.g., 22:00 - 08:00
-                    if start <= now <= end:
-                        return False
-                else:
-                    # Overnight case: e.g., 22:00 - 08:00 (next day)
-                    if now >= start or now <= end:
-                        return False
-        
-        # Map notification types to settings fields
-        notification_type_map = {
-            'friend_request': 'friend_requests',
-            'friend_accepted': 'friend_request_accepted',
-            'friend_rejected': 'friend_request_accepted',
-            'friend_new_activity': 'friend_new_activity',
-            'activity_join_request': 'activity_join_request',
-            'activity_participant_joined': 'activity_join_request',
-            'activity_participant_left': 'activity_participant_left',
-            'activity_comment': 'activity_comment',
-            'activity_update': 'activity_update',
-            'activity_cancelled': 'activity_cancelled',
-            'activity_reminder': 'activity_reminder',
-            'activity_starting_soon': 'activity_reminder',
-            'new_activity_nearby': 'new_activities_nearby',
-            'new_activity_interest': 'new_activities_interests',
-            'new_message': 'new_message',
-            'system': 'system_updates',
-            'promotional': 'promotional',
+        Preferences and quiet hours (at local time `now`) are checked in the
+        same query through the settings' preference mask; recipients without
+        settings get the defaults.
+        """
+        tokens = PushNotificationService.eligible_tokens_by_user(recipient_ids, notification_type, now)
+        return [token for user_tokens in tokens.values() for token in user_tokens]
+
+    @staticmethod
+    def eligible_tokens_by_user(recipient_ids, notification_type: str, now=None) -> Dict[int, List[str]]:
+        """eligible_tokens grouped by recipient id"""
+        recipient_ids = set(recipient_ids)
+        if not recipient_ids:
+            return {}
+        tokens = {}
+        for user_id, token in PushToken.objects.filter(
+            NotificationSettings.push_allowed_q(notification_type, prefix='user__notification_settings__', now=now),
+            user_id__in=recipient_ids,
+            is_active=True
+        ).values_list('user_id', 'token'):
+            tokens.setdefault(user_id, []).append(token)
+        return tokens
+
+    @staticmethod
+    def build_message(
+        token: str,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        channel_id: str = 'default',
+        priority: str = 'high',
+        sound: str = 'default',
+        badge: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Build the Expo message for one push token"""
+        message = {
+            'to': token,
+            'title': title,
+            'body': body,
+            'sound': sound,
+            'priority': priority,
+            'channelId': channel_id,
         }
         
-        settings_field = notification_type_map.get(notification_type)
-        if settings_field:
-            return getattr(settings, settings_field, True)
+        if data:
+            message['data'] = data
+        
+        if badge is not None:
+            message['badge'] = badge
         
-        return True
+        return message
 
     @staticmethod
     def send_push_notification(
@@ -116,48 +275,473 @@ class PushNotificationService:
             badge: Badge count to display on app icon (iOS)
         
         Returns:
-            Response from Expo push API
+            'success' (False if any request to Expo failed), the first request
+            'error' if any, and 'results': one push ticket per token, with the
+            token added under 'token'
         """
         if not tokens:
             return {'success': False, 'message': 'No tokens provided'}
         
-        messages = []
-        for token in tokens:
-            message = {
-                'to': token,
-                'title': title,
-                'body': body,
-                'sound': sound,
-                'priority': priority,
-                'channelId': channel_id,
-            }
+        messages = [
+            PushNotificationService.build_message(token, title, body, data, channel_id, priority, sound, badge)
+            for token in tokens
+        ]
+        results = [
+            dict(result, token=token)
+            for token, result in zip(tokens, send_push_messages(messages))
+        ]
+        logger.info(f'Push notification sent: {results}')
+        PushNotificationService.record_tickets(results)
+        
+        errors = [result['message'] for result in results if result.get('retryable') is not None]
+        if errors:
+            return {'success': False, 'error': errors[0], 'results': results}
+        return {'success': True, 'results': results}
+
+    @staticmethod
+    def queue_push_notification(
+        tokens: List[str],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        channel_id: str = 'default',
+        priority: str = 'high',
+        sound: str = 'default',
+        badge: Optional[int] = None,
+        notification: Optional[Notification] = None,
+        notification_ids: Optional[List[int]] = None
+    ) -> Optional[PushOutbox]:
+        """
+        Queue a push notification for the push worker
+        
+        Takes the same arguments as send_push_notification, plus the Notification
+        (or, for a push shared by several recipients, the notification ids) to
+        mark as pushed once delivered. The outbox row joins the caller's
+        transaction, so it is only delivered if the triggering change commits.
+        
+        Returns:
+            Created PushOutbox row or None if there are no tokens
+        """
+        if not tokens:
+            return None
+        
+        return PushOutbox.objects.create(
+            tokens=list(tokens),
+            title=title,
+            body=body,
+            data=data or {},
+            channel_id=channel_id,
+            priority=priority,
+            sound=sound,
+            badge=badge,
+            notification=notification,
+            notification_ids=notification_ids or []
+        )
+
+    @staticmethod
+    def queue_fan_out(
+        recipient_ids,
+        notification_type: str,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        channel_id: str = 'default',
+        notification: Optional[Notification] = None
+    ) -> Optional[PushOutbox]:
+        """
+        Queue one push notification for one or many recipients
+        
+        Selects the active tokens of every recipient who accepts
+        `notification_type` right now in one query (see eligible_tokens) and
+        queues a single outbox row holding them all; the worker splits it
+        into Expo batches. Recipients who would accept it but are inside their
+        quiet hours get it deferred to the end of the window instead.
+        
+        Returns:
+            Created PushOutbox row or None if no recipient has a token
+        """
+        recipient_ids = set(recipient_ids)
+        if not recipient_ids:
+            return None
+        now = timezone.localtime()
+        
+        PushNotificationService.defer_for_quiet_hours(
+            recipient_ids, notification_type, now,
+            title=title,
+            body=body,
+            data=data,
+            channel_id=channel_id,
+            notification=notification
+        )
+        
+        return PushNotificationService.queue_push_notification(
+            tokens=PushNotificationService.eligible_tokens(recipient_ids, notification_type, now=now.time()),
+            title=title,
+            body=body,
+            data=data,
+            channel_id=channel_id,
+            notification=notification
+        )
+
+    @staticmethod
+    def queue_chat_push(
+        recipient_ids,
+        chat_key: str,
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None,
+        channel_id: str = 'messages'
+    ) -> int:
+        """
+        Queue a new-message push per recipient, coalescing bursts per chat
+        
+        Each (chat, recipient) pair has a collapse key. The first message
+        goes out right away. Messages arriving within
+        PUSH_CHAT_COALESCE_SECONDS are merged into a single unsent outbox row
+        per recipient, sent when the window ends. That row keeps the latest
+        title and preview and counts the merged messages. The collapse key
+        also goes into the push data so the app can replace the chat's
+        previous notification.
+        
+        Returns:
+            Number of recipients whose push was queued or merged
+        """
+        recipient_ids = set(recipient_ids)
+        if not recipient_ids:
+            return 0
+        now = timezone.localtime()
+        window = timedelta(seconds=getattr(settings, 'PUSH_CHAT_COALESCE_SECONDS', 15))
+        
+        PushNotificationService.defer_for_quiet_hours(
+            recipient_ids, 'new_message', now,
+            title=title,
+            body=body,
+            data=data,
+            channel_id=channel_id
+        )
+        tokens = PushNotificationService.eligible_tokens_by_user(recipient_ids, 'new_message', now=now.time())
+        if not tokens:
+            return 0
+        
+        keys = {user_id: f'{chat_key}:{user_id}' for user_id in tokens}
+        latest = {}
+        for entry in PushOutbox.objects.filter(
+            collapse_key__in=keys.values(),
+            created_at__gte=now - window
+        ).only('id', 'collapse_key', 'status', 'attempts', 'created_at').order_by('id'):
+            latest[entry.collapse_key] = entry
+        
+        mergeable = {
+            user_id: latest[key].id for user_id, key in keys.items()
+            if key in latest and latest[key].status == 'pending' and latest[key].attempts == 0
+        }
+        merged = PushNotificationService._merge_chat_pushes(mergeable, title, body)
+        
+        new_entries = []
+        for user_id, key in keys.items():
+            if user_id in merged:
+                continue
+            entry = latest.get(key)
+            new_entries.append(PushOutbox(
+                tokens=tokens[user_id],
+                title=title,
+                body=body,
+                data=dict(data or {}, collapseKey=key),
+                channel_id=channel_id,
+                collapse_key=key,
+                # A push of this chat went out moments ago: hold this one
+                # back to the end of the window so later messages join it
+                next_attempt_at=entry.created_at + window if entry is not None else now
+            ))
+        
+        PushOutbox.objects.bulk_create(new_entries)
+        return len(merged) + len(new_entries)
+
+    @staticmethod
+    def _merge_chat_pushes(entry_ids: Dict[int, int], title: str, body: str) -> set:
+        """
+        Merge a message into unsent outbox rows, given as {user_id: row id}
+        
+        The worker may claim a row after it was read, so only rows that are
+        still unsent are merged. Returns the ids of the users whose row took
+        the message; the others need a new row.
+        """
+        if not entry_ids:
+            return set()
+        
+        def merge(ids):
+            return PushOutbox.objects.filter(id__in=ids, status='pending', attempts=0).update(
+                title=title,
+                body=body,
+                coalesced_count=F('coalesced_count') + 1
+            )
+        
+        with transaction.atomic():
+            if merge(entry_ids.values()) == len(entry_ids):
+                return set(entry_ids)
+            # Some rows were claimed meanwhile: undo and merge row by row
+            transaction.set_rollback(True)
+        return {user_id for user_id, entry_id in entry_ids.items() if merge([entry_id])}
+
+    @staticmethod
+    def defer_for_quiet_hours(recipient_ids, notification_type: str, now, **push) -> int:
+        """
+        Keep the push for recipients inside their quiet hours at local time
+        `now` until their window ends; returns the number of deferred pushes
+        """
+        quiet = NotificationSettings.objects.filter(
+            NotificationSettings.preference_q(notification_type),
+            NotificationSettings.quiet_hours_q(now=now.time()),
+            user_id__in=recipient_ids,
+            user__push_tokens__is_active=True
+        ).values_list('user_id', 'quiet_hours_end').distinct()
+        
+        spread = getattr(settings, 'PUSH_DEFERRED_SPREAD_MINUTES', 15) * 60
+        deferred = []
+        for user_id, end in quiet:
+            release_at = now.replace(hour=end.hour, minute=end.minute, second=0, microsecond=0)
+            if release_at <= now:
+                release_at += timedelta(days=1)
+            # Spread users sharing a window end over the following minutes
+            if spread:
+                release_at += timedelta(seconds=user_id % spread)
+            deferred.append(DeferredPush(
+                user_id=user_id,
+                notification_type=notification_type,
+                release_at=release_at,
+                release_bucket=DeferredPush.bucket_for(release_at),
+                title=push['title'],
+                body=push['body'],
+                data=push.get('data') or {},
+                channel_id=push.get('channel_id', 'default'),
+                notification=push.get('notification')
+            ))
+        DeferredPush.objects.bulk_create(deferred)
+        return len(deferred)
+
+    @staticmethod
+    def release_deferred(max_users: int = PUSH_DEFERRED_RELEASE_BATCH) -> int:
+        """
+        Queue the deferred pushes of up to `max_users` users whose release time
+        has passed, oldest bucket first; a user's pending pushes of the types
+        they still accept are coalesced into one summary push, which marks
+        every notification it stands for as pushed once sent. Returns the
+        number of users released.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            user_ids = [
+                row['user_id'] for row in
+                DeferredPush.objects.filter(
+                    release_bucket__lte=DeferredPush.bucket_for(now),
+                    release_at__lte=now
+                )
+                .values('user_id')
+                .annotate(first_bucket=Min('release_bucket'))
+                .order_by('first_bucket', 'user_id')[:max_users]
+            ]
+            if not user_ids:
+                return 0
             
-            if data:
-                message['data'] = data
+            pending = {}
+            for item in (
+                DeferredPush.objects.select_for_update(skip_locked=True)
+                .filter(user_id__in=user_ids, release_at__lte=now)
+                .order_by('created_at', 'id')
+            ):
+                pending.setdefault(item.user_id, []).append(item)
             
-            if badge is not None:
-                message['badge'] = badge
+            # Preferences may have changed since the push was deferred: the
+            # mask is loaded with the tokens and checked per item type
+            tokens = {}
+            masks = {}
+            for user_id, token, mask in PushToken.objects.filter(
+                NotificationSettings.preference_q(None, prefix='user__notification_settings__'),
+                user_id__in=pending,
+                is_active=True
+            ).values_list('user_id', 'token', 'user__notification_settings__preference_mask'):
+                tokens.setdefault(user_id, []).append(token)
+                masks[user_id] = default_preference_mask() if mask is None else mask
             
-            messages.append(message)
+            def accepts(user_id, item):
+                bits = NotificationSettings.preference_bits(item.notification_type)
+                return masks[user_id] & bits == bits
+            
+            outbox = []
+            for user_id, items in pending.items():
+                if user_id not in tokens:
+                    continue
+                items = [item for item in items if accepts(user_id, item)]
+                if not items:
+                    continue
+                if len(items) == 1:
+                    item = items[0]
+                    outbox.append(PushOutbox(
+                        tokens=tokens[user_id],
+                        title=item.title,
+                        body=item.body,
+                        data=item.data,
+                        channel_id=item.channel_id,
+                        notification_id=item.notification_id
+                    ))
+                else:
+                    outbox.append(PushOutbox(
+                        tokens=tokens[user_id],
+                        title='Yeni bildirişlər 🔔',
+                        body=f'Səssiz saatlarda {len(items)} bildiriş gəldi. Son: {items[-1].title}',
+                        data={'screen': 'Notifications', 'type': 'quiet_hours_digest', 'count': len(items)},
+                        notification_ids=[item.notification_id for item in items if item.notification_id]
+                    ))
+            PushOutbox.objects.bulk_create(outbox)
+            DeferredPush.objects.filter(id__in=[item.id for items in pending.values() for item in items]).delete()
+        return len(pending)
+
+    @staticmethod
+    def process_outbox(batch_size: int = PUSH_OUTBOX_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Deliver one batch of due outbox rows
         
-        try:
-            response = requests.post(
-                EXPO_PUSH_URL,
-                json=messages,
-                headers={
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json',
-                    'Accept-Encoding': 'gzip, deflate',
-                }
+        Returns:
+            Counts of sent, retried and failed rows
+        """
+        max_attempts = getattr(settings, 'PUSH_OUTBOX_MAX_ATTEMPTS', 5)
+        retry_delay = getattr(settings, 'PUSH_OUTBOX_RETRY_DELAY', 30)
+        max_retry_delay = getattr(settings, 'PUSH_OUTBOX_MAX_RETRY_DELAY', 3600)
+        lease = timedelta(seconds=getattr(settings, 'PUSH_OUTBOX_LEASE', 600))
+        
+        entries = PushOutbox.claim_due(batch_size, lease)
+        
+        # Every token of every claimed row goes out in one batched send
+        messages = [
+            PushNotificationService.build_message(
+                token, *PushNotificationService.outbox_content(entry),
+                entry.channel_id, entry.priority, entry.sound, entry.badge
             )
+            for entry in entries
+            for token in entry.tokens
+        ]
+        results = iter(send_push_messages(messages) if messages else [])
+        
+        counts = {'sent': 0, 'retried': 0, 'failed': 0}
+        tickets = []
+        for entry in entries:
+            entry_results = [next(results) for _ in entry.tokens]
+            tickets.extend(dict(result, token=token) for token, result in zip(entry.tokens, entry_results))
+            retry_tokens = [
+                token for token, result in zip(entry.tokens, entry_results) if result.get('retryable')
+            ]
+            errors = [result.get('message', '') for result in entry_results if result['status'] != 'ok']
             
-            result = response.json()
-            logger.info(f'Push notification sent: {result}')
-            return {'success': True, 'data': result}
+            if retry_tokens:
+                entry.mark_failed(errors[0], max_attempts, retry_delay, max_retry_delay, tokens=retry_tokens)
+                counts['failed' if entry.status == 'failed' else 'retried'] += 1
+            elif any(result['status'] == 'ok' for result in entry_results):
+                entry.mark_sent()
+                counts['sent'] += 1
+            else:
+                entry.mark_undeliverable(errors[0] if errors else 'No tokens')
+                counts['failed'] += 1
+        
+        PushNotificationService.record_tickets(tickets)
+        return counts
+
+    @staticmethod
+    def outbox_content(entry: PushOutbox):
+        """Title, body and data to send for an outbox row, summarising merged chat messages"""
+        if entry.coalesced_count <= 1:
+            return entry.title, entry.body, entry.data
+        return (
+            f'{entry.title} ({entry.coalesced_count} yeni mesaj)',
+            entry.body,
+            dict(entry.data, count=entry.coalesced_count)
+        )
+
+    @staticmethod
+    def record_tickets(results: List[Dict[str, Any]]) -> None:
+        """
+        Keep the ids of accepted tickets for receipt checks and deactivate
+        tokens that Expo already rejected as dead
+        
+        Args:
+            results: per-token send results, each with the token under 'token'
+        """
+        PushTicket.objects.bulk_create(
+            [
+                PushTicket(ticket_id=result['id'], token=result['token'])
+                for result in results
+                if result['status'] == 'ok' and result.get('id')
+            ],
+            ignore_conflicts=True
+        )
+        PushNotificationService.deactivate_tokens(
+            result['token'] for result in results
+            if (result.get('details') or {}).get('error') in DEAD_TOKEN_ERRORS
+        )
+
+    @staticmethod
+    def deactivate_tokens(tokens) -> int:
+        """Mark tokens inactive in a single UPDATE; returns the number deactivated"""
+        tokens = set(tokens)
+        if not tokens:
+            return 0
+        return PushToken.objects.filter(token__in=tokens, is_active=True).update(is_active=False)
+
+    @staticmethod
+    def process_receipts(min_age: timedelta, max_age: timedelta) -> Counter:
+        """
+        Check the receipts of tickets older than `min_age`
+        
+        Dead tokens are deactivated, tickets with a receipt are deleted and
+        tickets older than `max_age` (Expo keeps receipts for about a day)
+        are dropped unchecked.
+        
+        Returns:
+            Counts per receipt outcome ('ok', error names, 'pending', 'expired')
+            plus 'deactivated' tokens
+        """
+        now = timezone.now()
+        counts = Counter()
+        expired, _ = PushTicket.objects.filter(created_at__lt=now - max_age).delete()
+        if expired:
+            counts['expired'] = expired
+        
+        dead_tokens = set()
+        last_id = 0
+        while True:
+            chunk = list(
+                PushTicket.objects.filter(created_at__lte=now - min_age, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'ticket_id', 'token')[:EXPO_RECEIPTS_BATCH_SIZE]
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            tickets = {ticket_id: token for _, ticket_id, token in chunk}
+            receipts = fetch_push_receipts(list(tickets))
             
-        except Exception as e:
-            logger.error(f'Error sending push notification: {e}')
-            return {'success': False, 'error': str(e)}
+            for ticket_id, receipt in receipts.items():
+                if receipt.get('status') == 'ok':
+                    counts['ok'] += 1
+                    continue
+                error = (receipt.get('details') or {}).get('error') or 'error'
+                counts[error] += 1
+                if error in DEAD_TOKEN_ERRORS and ticket_id in tickets:
+                    dead_tokens.add(tickets[ticket_id])
+            counts['pending'] += len(tickets) - len(receipts)
+            PushTicket.objects.filter(ticket_id__in=list(receipts)).delete()
+        
+        counts['deactivated'] = PushNotificationService.deactivate_tokens(dead_tokens)
+        logger.info(f'Push receipts processed: {dict(counts)}')
+        return counts
+
+    @staticmethod
+    def purge_outbox(older_than: timedelta) -> int:
+        """Delete sent outbox rows older than `older_than`; returns the number deleted"""
+        deleted, _ = PushOutbox.objects.filter(
+            status='sent',
+            sent_at__lt=timezone.now() - older_than
+        ).delete()
+        return deleted
 
     @staticmethod
     def create_and_send_notification(
@@ -172,7 +756,7 @@ class PushNotificationService:
         channel_id: str = 'default'
     ) -> Optional[Notification]:
         """
-        Create a notification in the database and send push notification
+        Create a notification in the database and queue its push notification
         
         Args:
             user: Target user to receive notification
@@ -200,35 +784,22 @@ class PushNotificationService:
             data=data or {}
         )
         
-        # Check if user should receive push notification
-        if not PushNotificationService.should_send_notification(user, notification_type):
-            logger.info(f'Push notification skipped for user {user.id} - disabled in settings')
-            return notification
-        
-        # Get user's push tokens
-        tokens = PushNotificationService.get_user_push_tokens(user)
+        # Add notification ID to data
+        push_data = data.copy() if data else {}
+        push_data['notification_id'] = notification.id
+        push_data['notification_type'] = notification_type
         
-        if tokens:
-            # Add notification ID to data
-            push_data = data.copy() if data else {}
-            push_data['notification_id'] = notification.id
-            push_data['notification_type'] = notification_type
-            
-            # Send push notification
-            result = PushNotificationService.send_push_notification(
-                tokens=tokens,
-                title=title,
-                body=message,
-                data=push_data,
-                channel_id=channel_id
-            )
-            
-            if result.get('success'):
-                notification.is_pushed = True
-                notification.pushed_at = timezone.now()
-                notification.save(update_fields=['is_pushed', 'pushed_at'])
-        else:
-            logger.info(f'No push tokens found for user {user.id}')
+        # Queue push notification if the user accepts it; the worker marks
+        # the notification as pushed
+        PushNotificationService.queue_fan_out(
+            [user.id],
+            notification_type,
+            title=title,
+            body=message,
+            data=push_data,
+            channel_id=channel_id,
+            notification=notification
+        )
         
         return notification
 
@@ -286,6 +857,60 @@ class PushNotificationService:
             data={'screen': 'ActivityDetail', 'activityId': activity_id}
         )
 
+    @staticmethod
+    def send_activity_reminders(user_ids, activity_id: int, activity_title: str, starts_in: str) -> Dict[int, str]:
+        """
+        Batched send_activity_reminder for every recipient of one activity
+
+        Creates the notifications in one insert and queues a single push for
+        the recipients who accept reminders; the worker marks their
+        notifications as pushed. Reminders are not deferred past quiet
+        hours: a late reminder of a start is worse than none.
+
+        Returns:
+            {user_id: 'queued' | 'quiet_hours' | 'not_pushed'}; 'not_pushed'
+            covers disabled reminders and users without an active token
+        """
+        user_ids = set(user_ids)
+        title = 'Aktivitə xatırlatması'
+        message = f'"{activity_title}" aktivitəsi {starts_in} başlayır'
+        data = {'screen': 'ActivityDetail', 'activityId': activity_id}
+        now = timezone.localtime().time()
+
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=user_id,
+                notification_type='activity_reminder',
+                title=title,
+                message=message,
+                related_activity_id=activity_id,
+                data=data
+            )
+            for user_id in user_ids
+        ])
+
+        tokens = PushNotificationService.eligible_tokens_by_user(user_ids, 'activity_reminder', now=now)
+        # Recipients who accept reminders and have a device, but are in quiet hours
+        quiet = set(PushToken.objects.filter(
+            NotificationSettings.preference_q('activity_reminder', prefix='user__notification_settings__'),
+            NotificationSettings.quiet_hours_q(prefix='user__notification_settings__', now=now),
+            user_id__in=user_ids - set(tokens),
+            is_active=True
+        ).values_list('user_id', flat=True))
+
+        PushNotificationService.queue_push_notification(
+            tokens=[token for user_tokens in tokens.values() for token in user_tokens],
+            title=title,
+            body=message,
+            data={**data, 'notification_type': 'activity_reminder'},
+            channel_id='activity-reminders',
+            notification_ids=[notification.id for notification in notifications if notification.user_id in tokens]
+        )
+        return {
+            user_id: 'queued' if user_id in tokens else 'quiet_hours' if user_id in quiet else 'not_pushed'
+            for user_id in user_ids
+        }
+
     @staticmethod
     def send_activity_join_request_notification(
         organizer: User, 
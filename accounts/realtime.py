@@ -0,0 +1,273 @@
+"""
+Real-time chat delivery over a raw ASGI WebSocket endpoint (``/ws/chat/``).
+
+A connection authenticates with the same credentials as the REST API (a DRF
+token in ``?token=`` or an ``Authorization: Token <key>`` header, or the
+session cookie), then receives JSON events for:
+
+- its direct conversations, published to ``user:<id>`` for both participants
+- every activity it organizes or is an approved participant of, published to
+  ``activity:<id>`` (group chat and web chat messages)
+
+Events are ``direct_message.*``, ``group_message.*`` and ``activity_message.*``
+with ``created`` / ``updated`` / ``deleted`` suffixes, published by the model
+receivers in accounts/models.py and activities/models.py, plus
+``direct_message.read`` when a participant's read watermark moves. ``room.joined`` /
+``room.left`` on the user channel keep activity subscriptions in step with
+participation changes. A client that falls too far behind gets
+``sync.required`` and should catch up with ``?after=`` on the REST endpoints.
+"""
+
+import asyncio
+import json
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http.request import validate_host
+
+from config.pubsub import get_pubsub, publish_on_commit
+
+CHAT_WEBSOCKET_PATH = '/ws/chat/'
+
+# Application close codes (4000-4999 are reserved for applications)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def activity_channel(activity_id):
+    return f'activity:{activity_id}'
+
+
+def chat_channels_for_user(user):
+    """Channels a user may read: their own plus every activity chat they belong to"""
+    from activities.models import Activity, ActivityParticipant
+
+    activity_ids = set(Activity.objects.filter(organizer=user).values_list('id', flat=True))
+    activity_ids.update(ActivityParticipant.objects.filter(
+        user=user,
+        status='approved'
+    ).values_list('activity_id', flat=True))
+    return [user_channel(user.pk)] + [activity_channel(activity_id) for activity_id in activity_ids]
+
+
+def publish_direct_message(kind, message):
+    """Publish a direct message event to both participants"""
+    from .serializers import DirectMessageSerializer
+
+    if kind == 'deleted':
+        payload = {'id': message.pk, 'conversation': message.conversation_id}
+    else:
+        payload = DirectMessageSerializer(message).data
+    conversation = message.conversation
+    publish_on_commit(
+        [user_channel(conversation.participant1_id), user_channel(conversation.participant2_id)],
+        {'type': f'direct_message.{kind}', 'conversation': conversation.pk, 'message': payload},
+    )
+
+
+def publish_group_message(kind, message):
+    """Publish an activity group chat message event to the activity's room"""
+    from .serializers import ActivityGroupMessageSerializer
+
+    if kind == 'deleted':
+        payload = {'id': message.pk, 'group_chat': message.group_chat_id}
+    else:
+        payload = ActivityGroupMessageSerializer(message).data
+    activity_id = message.group_chat.activity_id
+    publish_on_commit(
+        [activity_channel(activity_id)],
+        {'type': f'group_message.{kind}', 'activity': activity_id, 'group_chat': message.group_chat_id, 'message': payload},
+    )
+
+
+def publish_activity_message(kind, message):
+    """Publish a web activity chat message event, shaped like chat_views.get_messages"""
+    from activities.chat_membership import get_chat_members
+
+    if kind == 'deleted':
+        payload = {'id': message.pk}
+    else:
+        payload = {
+            'id': message.pk,
+            'user_name': message.user.get_full_name(),
+            'user_id': message.user_id,
+            'message': message.message,
+            'created_at': message.created_at.strftime('%d.%m.%Y %H:%M'),
+            'is_edited': message.is_edited,
+        }
+    publish_on_commit(
+        [activity_channel(message.activity_id)],
+        {
+            'type': f'activity_message.{kind}',
+            'activity': message.activity_id,
+            'organizer_id': get_chat_members(message.activity_id).organizer_id,
+            'message': payload,
+        },
+    )
+
+
+def publish_read_receipt(conversation, user_id, last_read_id):
+    """Tell both participants how far `user_id` has read a conversation"""
+    publish_on_commit(
+        [user_channel(conversation.participant1_id), user_channel(conversation.participant2_id)],
+        {
+            'type': 'direct_message.read',
+            'conversation': conversation.pk,
+            'user': user_id,
+            'last_read_id': last_read_id,
+        },
+    )
+
+
+def publish_room_membership(user_id, activity_id, joined):
+    """Tell a user's open connections to join or leave an activity room"""
+    publish_on_commit(
+        [user_channel(user_id)],
+        {'type': 'room.joined' if joined else 'room.left', 'activity': activity_id},
+    )
+
+
+def personalize_event(event, user_id):
+    """Add the per-recipient flags the REST endpoints return (is_me, can_edit, ...)"""
+    message = event.get('message')
+    if not isinstance(message, dict):
+        return event
+    if 'sender' in message:
+        message = dict(message, is_me=message['sender']['id'] == user_id)
+    elif 'user_id' in message:
+        is_author = message['user_id'] == user_id
+        message = dict(
+            message,
+            can_edit=is_author,
+            can_delete=is_author or event.get('organizer_id') == user_id,
+        )
+    else:
+        return event
+    # Events are shared between connections; never mutate them in place
+    return dict(event, message=message)
+
+
+def _headers(scope):
+    return {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope.get('headers', [])}
+
+
+def _token_user(key):
+    from rest_framework.authtoken.models import Token
+
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        return None
+    return token.user if token.user.is_active else None
+
+
+def _origin_allowed(headers):
+    origin = headers.get('origin')
+    if not origin:
+        return True
+    if origin in getattr(settings, 'CSRF_TRUSTED_ORIGINS', []):
+        return True
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    return validate_host(urlparse(origin).hostname or '', allowed_hosts)
+
+
+def _session_user(headers):
+    from django.contrib.auth import get_user
+
+    cookie = SimpleCookie()
+    cookie.load(headers.get('cookie', ''))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    # Cookies ride along on cross-site WebSocket handshakes, so check the origin
+    if morsel is None or not _origin_allowed(headers):
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+    user = get_user(SimpleNamespace(session=session))
+    return user if user.is_authenticated else None
+
+
+def authenticate_websocket(scope):
+    """Return the user for a WebSocket handshake, or None"""
+    headers = _headers(scope)
+    query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+
+    key = (query.get('token') or [None])[0]
+    authorization = headers.get('authorization', '')
+    if not key and authorization.lower().startswith('token '):
+        key = authorization.split(' ', 1)[1].strip()
+    if key:
+        return _token_user(key)
+    return _session_user(headers)
+
+
+async def _send_json(send, data):
+    await send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+
+async def chat_websocket(scope, receive, send):
+    """ASGI application for a chat WebSocket connection"""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if scope.get('path') != CHAT_WEBSOCKET_PATH:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    user = await sync_to_async(authenticate_websocket)(scope)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    # Subscribe before accepting so nothing written in between is missed
+    channels = await sync_to_async(chat_channels_for_user)(user)
+    subscription = get_pubsub().subscribe(channels)
+    receiving = events = None
+    try:
+        await send({'type': 'websocket.accept'})
+        receiving = asyncio.ensure_future(receive())
+        events = asyncio.ensure_future(subscription.get())
+        while True:
+            done, _ = await asyncio.wait({receiving, events}, return_when=asyncio.FIRST_COMPLETED)
+
+            if receiving in done:
+                message = receiving.result()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message['type'] == 'websocket.receive':
+                    await _handle_client_message(send, message)
+                receiving = asyncio.ensure_future(receive())
+
+            if events in done:
+                event = events.result()
+                if event['type'] in ('room.joined', 'room.left'):
+                    channel = activity_channel(event['activity'])
+                    if event['type'] == 'room.joined':
+                        subscription.add([channel])
+                    else:
+                        subscription.remove([channel])
+                await _send_json(send, personalize_event(event, user.pk))
+                events = asyncio.ensure_future(subscription.get())
+    finally:
+        for task in (receiving, events):
+            if task is not None and not task.done():
+                task.cancel()
+        subscription.close()
+
+
+async def _handle_client_message(send, message):
+    """Clients only talk to keep the connection alive; messages are sent over REST"""
+    try:
+        data = json.loads(message.get('text') or '{}')
+    except ValueError:
+        return
+    if isinstance(data, dict) and data.get('type') == 'ping':
+        await _send_json(send, {'type': 'pong'})
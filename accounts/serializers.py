@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from .models import (
     Language, Interest, InterestCategory, UserImage, OTPVerification, 
     Friendship, BlogPost, BlogCategory, NotificationSettings, PushToken, Notification,
-    Conversation, DirectMessage
+    Conversation, DirectMessage, ActivityGroupChatMember
 )
+from config.serializers import SparseFieldsetMixin
 
 User = get_user_model()
 
@@ -173,6 +175,47 @@ class UserPublicSerializer(serializers.ModelSerializer):
         return obj.get_full_name()
 
 
+class UserReferenceSerializer(serializers.ModelSerializer):
+    """Compact user reference embedded by default (use ?expand= for the full profile)"""
+    full_name = serializers.SerializerMethodField()
+    avatar_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = User
+        fields = ['id', 'full_name', 'avatar_url']
+    
+    def get_full_name(self, obj):
+        return obj.get_full_name()
+    
+    def get_avatar_url(self, obj):
+        # Reads prefetched images; see user_reference_hints()
+        images = list(obj.images.all())
+        avatar = next((image for image in images if image.is_primary), images[0] if images else None)
+        if avatar and avatar.image:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(avatar.image.url)
+            return avatar.image.url
+        return None
+
+
+def user_reference_hints(path):
+    """Queryset needs of a UserReferenceSerializer embedded at `path`"""
+    return {
+        'select_related': [path],
+        'prefetch_related': [f'{path}__images'],
+        'only': [path, f'{path}__first_name', f'{path}__last_name', f'{path}__phone'],
+    }
+
+
+def user_public_hints(path):
+    """Extra queryset needs when `path` is expanded to UserPublicSerializer"""
+    return {
+        'prefetch_related': [f'{path}__languages', f'{path}__interests'],
+        'only': [f'{path}__bio', f'{path}__city', f'{path}__birthday', f'{path}__gender'],
+    }
+
+
 class OTPSendSerializer(serializers.Serializer):
     phone = serializers.CharField(max_length=17)
     purpose = serializers.ChoiceField(choices=['registration', 'login', 'password_reset'], default='registration')
@@ -308,9 +351,9 @@ class PushTokenSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for notifications"""
-    related_user = UserPublicSerializer(read_only=True)
+    related_user = UserReferenceSerializer(read_only=True)
     notification_type_display = serializers.CharField(source='get_notification_type_display', read_only=True)
     
     class Meta:
@@ -330,11 +373,29 @@ class NotificationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'notification_type', 'title', 'message', 'related_user', 
                           'related_activity_id', 'related_friendship_id', 'data', 'created_at']
+        expandable_fields = {'related_user': UserPublicSerializer}
+        field_hints = {
+            'related_user': user_reference_hints('related_user'),
+            'notification_type_display': {'only': ['notification_type']},
+        }
+        expand_hints = {'related_user': user_public_hints('related_user')}
+
 
+# Read state of a direct message comes from its conversation's watermarks
+DIRECT_MESSAGE_READ_HINTS = {
+    'select_related': ['conversation'],
+    'only': [
+        'sender', 'status', 'is_read', 'conversation', 'conversation__participant1', 'conversation__participant2',
+        'conversation__participant1_last_read_id', 'conversation__participant2_last_read_id',
+    ],
+}
 
-class DirectMessageSerializer(serializers.ModelSerializer):
+
+class DirectMessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for direct messages"""
-    sender = UserPublicSerializer(read_only=True)
+    sender = UserReferenceSerializer(read_only=True)
+    status = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
     is_me = serializers.SerializerMethodField()
     
     class Meta:
@@ -344,15 +405,30 @@ class DirectMessageSerializer(serializers.ModelSerializer):
             'is_read', 'read_at', 'created_at', 'is_me'
         ]
         read_only_fields = ['id', 'sender', 'status', 'is_read', 'read_at', 'created_at']
+        expandable_fields = {'sender': UserPublicSerializer}
+        field_hints = {
+            'sender': user_reference_hints('sender'),
+            'status': DIRECT_MESSAGE_READ_HINTS,
+            'is_read': DIRECT_MESSAGE_READ_HINTS,
+            'is_me': {'only': ['sender']},
+        }
+        expand_hints = {'sender': user_public_hints('sender')}
+    
+    def get_status(self, obj):
+        return 'read' if self.get_is_read(obj) else obj.status
+    
+    def get_is_read(self, obj):
+        # Derived from the conversation's read watermarks; legacy rows kept their flag
+        return obj.is_read or obj.is_read_by_recipient()
     
     def get_is_me(self, obj):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return obj.sender == request.user
+            return obj.sender_id == request.user.id
         return False
 
 
-class ConversationSerializer(serializers.ModelSerializer):
+class ConversationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for conversations"""
     other_user = serializers.SerializerMethodField()
     last_message = serializers.SerializerMethodField()
@@ -365,36 +441,66 @@ class ConversationSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {'other_user': None}
+        field_hints = {
+            'other_user': {
+                'select_related': ['participant1', 'participant2'],
+                'prefetch_related': ['participant1__images', 'participant2__images'],
+            },
+            'last_message': {
+                'only': [
+                    'participant1', 'participant2', 'participant1_last_read_id', 'participant2_last_read_id',
+                    'last_message_id', 'last_message_preview', 'last_message_sender', 'last_message_at',
+                ],
+            },
+            'unread_count': {
+                'only': ['participant1', 'participant2', 'participant1_last_read_id', 'participant2_last_read_id'],
+            },
+        }
+        expand_hints = {
+            'other_user': {
+                'prefetch_related': [
+                    'participant1__languages', 'participant1__interests',
+                    'participant2__languages', 'participant2__interests',
+                ],
+            },
+        }
     
     def get_other_user(self, obj):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             other = obj.get_other_participant(request.user)
-            return UserPublicSerializer(other, context=self.context).data
+            serializer_class = UserPublicSerializer if self.is_expanded('other_user') else UserReferenceSerializer
+            return serializer_class(other, context=self.context).data
         return None
     
     def get_last_message(self, obj):
-        last_msg = obj.get_last_message()
-        if last_msg:
-            return {
-                'id': last_msg.id,
-                'message': last_msg.message,
-                'sender_id': last_msg.sender_id,
-                'is_read': last_msg.is_read,
-                'created_at': last_msg.created_at.isoformat()
-            }
-        return None
+        # Denormalized on the conversation; see Conversation.record_message
+        if obj.last_message_id is None:
+            return None
+        recipient_id = obj.other_participant_id(obj.last_message_sender_id)
+        return {
+            'id': obj.last_message_id,
+            'message': obj.last_message_preview,
+            'sender_id': obj.last_message_sender_id,
+            'is_read': obj.last_message_id <= obj.get_last_read_id(recipient_id),
+            'created_at': obj.last_message_at.isoformat()
+        }
     
     def get_unread_count(self, obj):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
+            # Annotated for the requesting user by Conversation.with_unread_counts
+            unread_count = getattr(obj, 'unread_count', None)
+            if unread_count is not None:
+                return unread_count
             return obj.get_unread_count(request.user)
         return 0
 
 
-class ActivityGroupMessageSerializer(serializers.ModelSerializer):
+class ActivityGroupMessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for activity group messages"""
-    sender = UserPublicSerializer(read_only=True)
+    sender = UserReferenceSerializer(read_only=True)
     is_me = serializers.SerializerMethodField()
     
     class Meta:
@@ -405,11 +511,17 @@ class ActivityGroupMessageSerializer(serializers.ModelSerializer):
             'created_at', 'is_me'
         ]
         read_only_fields = ['id', 'sender', 'status', 'created_at']
+        expandable_fields = {'sender': UserPublicSerializer}
+        field_hints = {
+            'sender': user_reference_hints('sender'),
+            'is_me': {'only': ['sender']},
+        }
+        expand_hints = {'sender': user_public_hints('sender')}
     
     def get_is_me(self, obj):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return obj.sender == request.user
+            return obj.sender_id == request.user.id
         return False
 
 
@@ -419,32 +531,61 @@ class ActivityGroupChatSerializer(serializers.ModelSerializer):
     activity_image = serializers.SerializerMethodField()
     participants_count = serializers.SerializerMethodField()
     last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
     
     class Meta:
         from .models import ActivityGroupChat
         model = ActivityGroupChat
         fields = [
             'id', 'activity', 'activity_title', 'activity_image',
-            'participants_count', 'last_message', 'created_at', 'updated_at'
+            'participants_count', 'last_message', 'unread_count', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        """Load the activity, last sender, gallery and the requesting user's membership up front"""
+        return queryset.select_related('activity', 'last_message_sender').prefetch_related(
+            'activity__images',
+            Prefetch(
+                'members',
+                queryset=ActivityGroupChatMember.with_unread_counts(
+                    ActivityGroupChatMember.objects.filter(user=request.user)
+                ),
+                to_attr='my_membership',
+            ),
+        )
+    
     def get_activity_image(self, obj):
-        if obj.activity.images.exists():
-            return obj.activity.images.first().image_url
-        return None
+        activity = obj.activity
+        image = activity.main_image or next((image.image for image in activity.images.all()), None)
+        if not image:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(image.url) if request else image.url
     
     def get_participants_count(self, obj):
-        return obj.get_participants().count()
+        # Approved participants plus the organizer
+        return obj.activity.approved_count + 1
     
     def get_last_message(self, obj):
-        last_msg = obj.messages.order_by('-created_at').first()
-        if last_msg:
-            return {
-                'id': last_msg.id,
-                'message': last_msg.message,
-                'sender_name': last_msg.sender.get_full_name(),
-                'sender_id': last_msg.sender_id,
-                'created_at': last_msg.created_at.isoformat()
-            }
-        return None
+        # Denormalized on the chat; see ActivityGroupChat.record_message
+        if obj.last_message_id is None:
+            return None
+        sender = obj.last_message_sender
+        return {
+            'id': obj.last_message_id,
+            'message': obj.last_message_preview,
+            'sender_name': sender.get_full_name() if sender else '',
+            'sender_id': obj.last_message_sender_id,
+            'created_at': obj.last_message_at.isoformat()
+        }
+    
+    def get_unread_count(self, obj):
+        membership = getattr(obj, 'my_membership', None)
+        if membership is None:
+            request = self.context.get('request')
+            if not request or not request.user.is_authenticated:
+                return 0
+            membership = list(ActivityGroupChatMember.with_unread_counts(obj.members.filter(user=request.user)))
+        return membership[0].unread_count if membership else 0
@@ -1,3 +1,59 @@
+from datetime import timedelta
+from urllib import parse
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from config.pagination import KeysetCursorPagination
+
+from .models import BlogCategory, BlogPost, User
+
+
+class KeysetCursorPaginationNullTests(TestCase):
+    """Paging over a nullable sort key reaches every row in both directions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(phone='+994500000001', first_name='A', last_name='B')
+        category = BlogCategory.objects.create(name='News', slug='news')
+        now = timezone.now()
+        published = [now - timedelta(days=2), None, now - timedelta(days=1), None]
+        for index, published_at in enumerate(published):
+            BlogPost.objects.create(
+                title=f'p{index}', slug=f'p{index}', author=author, category=category,
+                excerpt='', content='', published_at=published_at,
+            )
+
+    def page(self, queryset, cursor_url=None):
+        query = parse.urlsplit(cursor_url).query if cursor_url else ''
+        request = Request(APIRequestFactory().get(f'/posts/?page_size=1&{query}'))
+        paginator = KeysetCursorPagination()
+        results = paginator.paginate_queryset(queryset, request)
+        return results, paginator.get_next_link(), paginator.get_previous_link()
+
+    def walk(self, queryset):
+        forward, url = [], None
+        while True:
+            results, url, previous = self.page(queryset, url)
+            forward.extend(post.title for post in results)
+            if url is None:
+                break
+        backward, url = [], previous
+        while url is not None:
+            results, _, url = self.page(queryset, url)
+            backward[:0] = [post.title for post in results]
+        return forward, backward
+
+    def test_descending_nullable_key(self):
+        queryset = BlogPost.objects.order_by('-published_at', '-created_at')
+        forward, backward = self.walk(queryset)
+        self.assertEqual(forward, ['p2', 'p0', 'p3', 'p1'])
+        self.assertEqual(backward, forward[:-1])
 
-# Create your tests here.
+    def test_ascending_nullable_key(self):
+        queryset = BlogPost.objects.order_by('published_at', 'created_at')
+        forward, backward = self.walk(queryset)
+        self.assertEqual(forward, ['p1', 'p3', 'p0', 'p2'])
+        self.assertEqual(backward, forward[:-1])
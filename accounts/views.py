@@ -10,6 +10,7 @@ from datetime import timedelta
 import random
 import json
 
+from config.response_cache import fragment_cache_context
 from .models import User, Language, Interest, InterestCategory, UserImage, OTPVerification, Newsletter, Friendship
 
 
@@ -42,9 +43,11 @@ def home(request):
     # Get popular categories
     popular_categories = ActivityCategory.objects.all()[:8]
     
+    # Querysets stay lazy; they only run when the cached fragments miss
     context = {
         'latest_activities': latest_activities,
         'popular_categories': popular_categories,
+        **fragment_cache_context(('activity', 'activity_participant')),
     }
     
     return render(request, 'core/home.html', context)
@@ -569,6 +572,8 @@ def edit_profile(request):
                 # Set new primary image
                 UserImage.objects.filter(user=user, id=primary_image_id).update(is_primary=True)
                 UserImage.objects.filter(user=user).exclude(id=primary_image_id).update(is_primary=False)
+                from activities.models import ActivityCard
+                ActivityCard.refresh_organizer_avatar(user.pk)
                 messages.success(request, 'Əsas şəkil dəyişdirildi!')
             except Exception:
                 pass
@@ -56,7 +56,7 @@ class ActivityAdmin(admin.ModelAdmin):
             'fields': ('location_name', 'address', 'district', 'latitude', 'longitude')
         }),
         ('Capacity & Pricing', {
-            'fields': ('max_participants', 'min_participants', 'price', 'is_free')
+            'fields': ('max_participants', 'min_participants', 'approved_count', 'pending_count', 'price', 'is_free')
         }),
         ('Activity Details', {
             'fields': ('difficulty_level', 'requirements', 'what_included')
@@ -72,15 +72,13 @@ class ActivityAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['approved_count', 'pending_count', 'created_at', 'updated_at']
     filter_horizontal = ['required_languages']
     
     def participants_info(self, obj):
-        approved = obj.participants.filter(status='approved').count()
-        pending = obj.participants.filter(status='pending').count()
         return format_html(
             '<span style="color: green;">{}</span>/<span style="color: orange;">{}</span>/<span style="color: blue;">{}</span>',
-            approved, pending, obj.max_participants
+            obj.approved_count, obj.pending_count, obj.max_participants
         )
     participants_info.short_description = "Participants (Approved/Pending/Max)"
 
@@ -104,13 +102,13 @@ class ActivityParticipantAdmin(admin.ModelAdmin):
     actions = ['approve_requests', 'reject_requests']
     
     def approve_requests(self, request, queryset):
-        queryset.update(status='approved')
-        self.message_user(request, f"{queryset.count()} requests approved.")
+        updated = queryset.set_status('approved')
+        self.message_user(request, f"{updated} requests approved.")
     approve_requests.short_description = "Approve selected requests"
     
     def reject_requests(self, request, queryset):
-        queryset.update(status='rejected')
-        self.message_user(request, f"{queryset.count()} requests rejected.")
+        updated = queryset.set_status('rejected')
+        self.message_user(request, f"{updated} requests rejected.")
     reject_requests.short_description = "Reject selected requests"
 
 
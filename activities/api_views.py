@@ -5,14 +5,19 @@ from django.db.models import Q
 from django.utils import timezone
 from .models import (
     ActivityCategory, Activity, ActivityParticipant,
-    ActivityImage, ActivityReview, ActivityComment, ActivityMessage
+    ActivityImage, ActivityReview, ActivityComment, ActivityMessage, ActivityCard
 )
 from .serializers import (
-    ActivityCategorySerializer, ActivityListSerializer, ActivityDetailSerializer,
+    ActivityCategorySerializer, ActivityListSerializer, ActivityCardSerializer, ActivityDetailSerializer,
     ActivityWriteSerializer, ActivityParticipantSerializer, ActivityReviewSerializer,
     ActivityCommentSerializer, ActivityMessageSerializer, LanguageSerializer
 )
+from .chat_membership import is_chat_member
+from .search import search_activities
 from accounts.models import Language
+from config.conditional import ConditionalGetMixin
+from config.geo import filter_by_location
+from config.response_cache import AnonymousResponseCacheMixin
 
 
 class LanguageViewSet(viewsets.ReadOnlyModelViewSet):
@@ -20,6 +25,7 @@ class LanguageViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Language.objects.all()
     serializer_class = LanguageSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Small lookup table, always returned whole
 
 
 class ActivityCategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -27,14 +33,22 @@ class ActivityCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ActivityCategory.objects.all()
     serializer_class = ActivityCategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Small lookup table, always returned whole
 
 
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(AnonymousResponseCacheMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for activities"""
     queryset = Activity.objects.filter(status='published')
     permission_classes = [permissions.AllowAny]
+    response_cache_scopes = ('activity', 'activity_participant')
+    max_eligibility_ids = 100
+    # Lists are served from ActivityCard, which is touched on every card change
+    list_modified_field = 'refreshed_at'
+    validator_counter_fields = ('approved_count', 'pending_count')
     
     def get_serializer_class(self):
+        if self.action == 'list':
+            return ActivityCardSerializer
         if self.action == 'retrieve':
             return ActivityDetailSerializer
         elif self.action in ['create', 'update', 'partial_update']:
@@ -42,29 +56,25 @@ class ActivityViewSet(viewsets.ModelViewSet):
         return ActivityListSerializer
     
     def get_queryset(self):
+        # Lists are served from the denormalized feed table, one query per page
+        is_list = self.action == 'list'
+        model = ActivityCard if is_list else Activity
+        category_lookup = 'category_type' if is_list else 'category__category_type'
+        
         # For authenticated users, show their own activities regardless of status
         if self.request.user.is_authenticated:
-            queryset = Activity.objects.filter(
+            queryset = model.objects.filter(
                 Q(status='published') | Q(organizer=self.request.user)
             )
         else:
-            queryset = Activity.objects.filter(status='published')
+            queryset = model.objects.filter(status='published')
         
-        # Search
         search = self.request.query_params.get('search', None)
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search) |
-                Q(short_description__icontains=search) |
-                Q(location_name__icontains=search) |
-                Q(address__icontains=search)
-            )
         
         # Category filter
         category = self.request.query_params.get('category', None)
         if category:
-            queryset = queryset.filter(category__category_type=category)
+            queryset = queryset.filter(**{category_lookup: category})
         
         # District filter
         district = self.request.query_params.get('district', None)
@@ -91,9 +101,21 @@ class ActivityViewSet(viewsets.ModelViewSet):
         if difficulty:
             queryset = queryset.filter(difficulty_level=difficulty)
         
+        # Location filters (?near=lat,lng&radius_km= and ?bbox=)
+        queryset, has_distance = filter_by_location(queryset, self.request.query_params)
+        
+        # Search last, so only hits that pass every filter count towards its cap
+        if search:
+            queryset = search_activities(queryset, search)
+        
         # Sorting
-        sort_by = self.request.query_params.get('sort', 'featured')
-        if sort_by == 'date':
+        # Searches default to relevance order
+        sort_by = self.request.query_params.get('sort', 'relevance' if search else 'featured')
+        if sort_by == 'relevance' and search:
+            queryset = queryset.order_by('search_rank')
+        elif sort_by == 'distance' and has_distance:
+            queryset = queryset.order_by('distance_km')
+        elif sort_by == 'date':
             queryset = queryset.order_by('start_date')
         elif sort_by == 'price_low':
             queryset = queryset.order_by('price')
@@ -104,13 +126,39 @@ class ActivityViewSet(viewsets.ModelViewSet):
         else:  # featured
             queryset = queryset.order_by('-is_featured', 'start_date')
         
-        return queryset.select_related('category', 'organizer').prefetch_related('images')
+        if is_list:
+            return ActivityCardSerializer.optimize_queryset(queryset, self.request)
+        queryset = queryset.select_related('category', 'organizer').prefetch_related('images')
+        if self.action == 'retrieve':
+            # Embedded in the detail response and covered by its validators
+            queryset = queryset.prefetch_related(
+                'required_languages', 'organizer__images', 'organizer__languages', 'organizer__interests'
+            )
+        return queryset
     
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
     
+    def get_object_validators(self, obj):
+        state, last_modified = super().get_object_validators(obj)
+        # The organizer profile, category and languages are embedded in the
+        # detail response; profile images do not touch User.updated_at
+        organizer = obj.organizer
+        embedded = (
+            tuple(image.pk for image in obj.images.all()),
+            tuple(language.pk for language in obj.required_languages.all()),
+            (obj.category_id, obj.category.updated_at),
+            (
+                organizer.updated_at,
+                tuple(image.pk for image in organizer.images.all()),
+                tuple(language.pk for language in organizer.languages.all()),
+                tuple(interest.pk for interest in organizer.interests.all()),
+            ),
+        )
+        return (state, embedded), max(last_modified, organizer.updated_at, obj.category.updated_at)
+    
     def perform_create(self, serializer):
         serializer.save(organizer=self.request.user)
     
@@ -130,6 +178,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
         ).exclude(
             organizer=request.user  # Exclude activities they organized
         ).order_by('-start_date')
+        activities = ActivityListSerializer.optimize_queryset(activities, request)
         
         serializer = self.get_serializer(activities, many=True)
         return Response(serializer.data)
@@ -174,17 +223,12 @@ class ActivityViewSet(viewsets.ModelViewSet):
         """Send push notification to activity organizer about new join request"""
         try:
             from accounts.push_service import push_service
-            from accounts.models import NotificationSettings, Notification
+            from accounts.models import Notification
             
             organizer = activity.organizer
             
-            # Check if organizer has this notification type enabled
-            settings = NotificationSettings.objects.filter(user=organizer).first()
-            if settings and not settings.activity_join_request:
-                return
-            
             # Create notification in database
-            Notification.objects.create(
+            notification = Notification.objects.create(
                 user=organizer,
                 notification_type='activity_join_request',
                 title='Yeni qoşulma sorğusu 🙋',
@@ -194,20 +238,20 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 data={'activity_id': activity.id, 'requester_id': requester.id}
             )
             
-            # Send push notification
-            tokens = push_service.get_user_push_tokens(organizer)
-            if tokens:
-                push_service.send_push_notification(
-                    tokens=tokens,
-                    title='Yeni qoşulma sorğusu 🙋',
-                    body=f'{requester.get_full_name()} "{activity.title}" aktivitəsinə qoşulmaq istəyir',
-                    data={
-                        'screen': 'ActivityDetail',
-                        'activityId': activity.id,
-                        'type': 'activity_join_request'
-                    },
-                    channel_id='default'
-                )
+            # Queue push notification (deferred during quiet hours) if the organizer accepts join request pushes
+            push_service.queue_fan_out(
+                [organizer.id],
+                'activity_join_request',
+                title='Yeni qoşulma sorğusu 🙋',
+                body=f'{requester.get_full_name()} "{activity.title}" aktivitəsinə qoşulmaq istəyir',
+                data={
+                    'screen': 'ActivityDetail',
+                    'activityId': activity.id,
+                    'type': 'activity_join_request'
+                },
+                channel_id='default',
+                notification=notification
+            )
         except Exception as e:
             print(f"Failed to send join request notification: {e}")
     
@@ -215,7 +259,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
         """Send push notification to participant about their request status"""
         try:
             from accounts.push_service import push_service
-            from accounts.models import NotificationSettings, Notification
+            from accounts.models import Notification
             
             # Determine notification type and message
             if status_type == 'approved':
@@ -228,7 +272,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 message = f'"{activity.title}" aktivitəsinə qoşulma sorğunuz rədd edildi'
             
             # Create notification in database
-            Notification.objects.create(
+            notification = Notification.objects.create(
                 user=participant_user,
                 notification_type=notification_type,
                 title=title,
@@ -237,20 +281,20 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 data={'activity_id': activity.id, 'status': status_type}
             )
             
-            # Send push notification
-            tokens = push_service.get_user_push_tokens(participant_user)
-            if tokens:
-                push_service.send_push_notification(
-                    tokens=tokens,
-                    title=title,
-                    body=message,
-                    data={
-                        'screen': 'ActivityDetail',
-                        'activityId': activity.id,
-                        'type': notification_type
-                    },
-                    channel_id='default'
-                )
+            # Queue push notification (deferred during quiet hours) if the participant accepts this type of push
+            push_service.queue_fan_out(
+                [participant_user.id],
+                notification_type,
+                title=title,
+                body=message,
+                data={
+                    'screen': 'ActivityDetail',
+                    'activityId': activity.id,
+                    'type': notification_type
+                },
+                channel_id='default',
+                notification=notification
+            )
         except Exception as e:
             print(f"Failed to send participant status notification: {e}")
     
@@ -291,6 +335,7 @@ class ActivityViewSet(viewsets.ModelViewSet):
             participants = activity.participants.filter(status='approved')
         else:
             participants = activity.participants.all()
+        participants = ActivityParticipantSerializer.optimize_queryset(participants, request)
         
         serializer = ActivityParticipantSerializer(participants, many=True, context={'request': request})
         return Response(serializer.data)
@@ -357,6 +402,52 @@ class ActivityViewSet(viewsets.ModelViewSet):
             'can_join': can_join,
             'message': message
         })
+    
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def eligibility(self, request):
+        """Check if user can join each of many activities (batch version of can_join)"""
+        activity_ids = request.data.get('activity_ids')
+        if not isinstance(activity_ids, list) or not activity_ids:
+            return Response({
+                'success': False,
+                'message': 'activity_ids must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(activity_ids) > self.max_eligibility_ids:
+            return Response({
+                'success': False,
+                'message': f'At most {self.max_eligibility_ids} activity_ids are allowed'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            activity_ids = list(dict.fromkeys(int(activity_id) for activity_id in activity_ids))
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': 'activity_ids must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Same visibility as can_join: published activities and the user's own
+        activities = Activity.objects.filter(
+            Q(status='published') | Q(organizer=request.user),
+            id__in=activity_ids
+        )
+        results = Activity.bulk_can_user_join(activities, request.user)
+        
+        return Response({
+            'results': [
+                {
+                    'activity_id': activity_id,
+                    'can_join': results[activity_id][0],
+                    'message': results[activity_id][1],
+                } if activity_id in results else {
+                    'activity_id': activity_id,
+                    'can_join': False,
+                    'message': 'Activity not found',
+                }
+                for activity_id in activity_ids
+            ]
+        })
 
 
 class ActivityCommentViewSet(viewsets.ModelViewSet):
@@ -383,24 +474,10 @@ class ActivityMessageViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         activity_id = self.request.query_params.get('activity', None)
-        if activity_id:
+        if activity_id and activity_id.isdigit():
             # Check if user is participant or organizer
-            try:
-                activity = Activity.objects.get(id=activity_id)
-                if activity.organizer == self.request.user:
-                    return ActivityMessage.objects.filter(activity_id=activity_id)
-                
-                # Check if user is approved participant
-                is_participant = ActivityParticipant.objects.filter(
-                    activity=activity,
-                    user=self.request.user,
-                    status='approved'
-                ).exists()
-                
-                if is_participant:
-                    return ActivityMessage.objects.filter(activity_id=activity_id)
-            except Activity.DoesNotExist:
-                pass
+            if is_chat_member(int(activity_id), self.request.user.pk):
+                return ActivityMessage.objects.filter(activity_id=activity_id)
         
         return ActivityMessage.objects.none()
     
@@ -0,0 +1,62 @@
+"""
+Cached chat membership per activity: the organizer plus approved participants.
+
+Membership checks on the chat read/send paths and group fan-out recipient
+lists read one cache entry instead of querying Activity and
+ActivityParticipant. The entry is dropped whenever someone is approved or
+revoked or the organizer changes (see chat_membership_changed and the
+receivers in activities/models.py) and rebuilt on the next read.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+MEMBERSHIP_KEY_PREFIX = 'chat-members'
+
+ChatMembers = namedtuple('ChatMembers', ['organizer_id', 'member_ids'])
+
+
+def get_cache():
+    return caches[getattr(settings, 'CHAT_MEMBERSHIP_CACHE_ALIAS', 'default')]
+
+
+def _key(activity_id):
+    return f'{MEMBERSHIP_KEY_PREFIX}:{activity_id}'
+
+
+def get_chat_members(activity_id):
+    """Return the activity's ChatMembers, or None if the activity does not exist"""
+    from .models import Activity, ActivityParticipant
+
+    cache = get_cache()
+    members = cache.get(_key(activity_id))
+    if members is not None:
+        return members
+
+    organizer_id = Activity.objects.filter(pk=activity_id).values_list('organizer_id', flat=True).first()
+    if organizer_id is None:
+        return None
+    member_ids = set(ActivityParticipant.objects.filter(
+        activity_id=activity_id,
+        status='approved'
+    ).values_list('user_id', flat=True))
+    member_ids.add(organizer_id)
+    members = ChatMembers(organizer_id, frozenset(member_ids))
+    cache.set(_key(activity_id), members, getattr(settings, 'CHAT_MEMBERSHIP_CACHE_TTL', 3600))
+    return members
+
+
+def is_chat_member(activity_id, user_id):
+    members = get_chat_members(activity_id)
+    return members is not None and user_id in members.member_ids
+
+
+def invalidate_chat_members(activity_id):
+    """Drop the cached member set now and again on commit"""
+    key = _key(activity_id)
+    get_cache().delete(key)
+    # A reader that ran before the commit may have cached the old set meanwhile
+    transaction.on_commit(lambda: get_cache().delete(key))
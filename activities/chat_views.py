@@ -1,24 +1,27 @@
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.http import require_POST
-from .models import Activity, ActivityParticipant, ActivityMessage
+from accounts.realtime import publish_activity_message
+from .chat_membership import get_chat_members
+from .models import Activity, ActivityMessage, ArchivedActivityMessage
+
+
+def get_chat_members_or_404(activity_id):
+    members = get_chat_members(activity_id)
+    if members is None:
+        raise Http404('No Activity matches the given query.')
+    return members
 
 
 @login_required
 @require_POST
 def send_message(request, activity_id):
     """Send a chat message in activity group chat"""
-    activity = get_object_or_404(Activity, id=activity_id)
+    members = get_chat_members_or_404(activity_id)
     
     # Check if user is an approved participant or organizer
-    user_participation = ActivityParticipant.objects.filter(
-        activity=activity, 
-        user=request.user, 
-        status='approved'
-    ).first()
-    
-    if not user_participation and request.user != activity.organizer:
+    if request.user.pk not in members.member_ids:
         return JsonResponse({'error': 'Yalnız qoşulmuş iştirakçılar mesaj yaza bilər'}, status=403)
     
     message_text = request.POST.get('message', '').strip()
@@ -29,7 +32,7 @@ def send_message(request, activity_id):
         return JsonResponse({'error': 'Mesaj çox uzundur'}, status=400)
     
     message = ActivityMessage.objects.create(
-        activity=activity,
+        activity_id=activity_id,
         user=request.user,
         message=message_text
     )
@@ -50,20 +53,19 @@ def send_message(request, activity_id):
 @login_required
 def get_messages(request, activity_id):
     """Get chat messages for activity"""
-    activity = get_object_or_404(Activity, id=activity_id)
+    members = get_chat_members_or_404(activity_id)
     
     # Check if user is an approved participant or organizer
-    user_participation = ActivityParticipant.objects.filter(
-        activity=activity, 
-        user=request.user, 
-        status='approved'
-    ).first()
-    
-    if not user_participation and request.user != activity.organizer:
+    if request.user.pk not in members.member_ids:
         return JsonResponse({'error': 'Bu söhbətə girişiniz yoxdur'}, status=403)
     
-    # Get last 50 messages
-    messages = ActivityMessage.objects.filter(activity=activity).select_related('user').order_by('-created_at')[:50]
+    # Get last 50 messages, continuing into the archive for quiet chats
+    messages = list(ActivityMessage.objects.filter(activity_id=activity_id).select_related('user').order_by('-created_at')[:50])
+    if len(messages) < 50:
+        archived = ArchivedActivityMessage.objects.filter(activity_id=activity_id).select_related('user')
+        if messages:
+            archived = archived.filter(id__lt=messages[-1].pk)
+        messages.extend(archived.order_by('-id')[:50 - len(messages)])
     messages = list(reversed(messages))  # Show oldest first
     
     messages_data = []
@@ -75,8 +77,9 @@ def get_messages(request, activity_id):
             'message': message.message,
             'created_at': message.created_at.strftime('%d.%m.%Y %H:%M'),
             'is_edited': message.is_edited,
-            'can_edit': message.can_edit(request.user),
-            'can_delete': message.can_delete(request.user)
+            # Same rules as ActivityMessage.can_edit/can_delete, without loading the activity per row
+            'can_edit': message.user_id == request.user.pk,
+            'can_delete': message.user_id == request.user.pk or request.user.pk == members.organizer_id
         })
     
     return JsonResponse({'messages': messages_data})
@@ -123,6 +126,7 @@ def delete_message(request, activity_id, message_id):
     if not message.can_delete(request.user):
         return JsonResponse({'error': 'Bu mesajı silmək icazəniz yoxdur'}, status=403)
     
+    publish_activity_message('deleted', message)
     message.delete()
     
     return JsonResponse({'success': True})
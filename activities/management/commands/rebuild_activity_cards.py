@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from activities.models import ActivityCard
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized ActivityCard feed table from activities'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of activities refreshed per upsert (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding activity cards...')
+        count = ActivityCard.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} activity cards'))
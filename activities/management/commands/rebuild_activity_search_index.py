@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from activities.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the activity full-text search index from scratch'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding activity search index ({backend.__class__.__name__})...')
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} activities'))
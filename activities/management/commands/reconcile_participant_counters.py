@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from activities.models import Activity
+
+
+class Command(BaseCommand):
+    help = 'Recompute Activity approved/pending participant counters and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--activity',
+            type=int,
+            action='append',
+            dest='activity_ids',
+            help='Only reconcile the given activity ID (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        queryset = Activity.objects.all()
+        if options['activity_ids']:
+            queryset = queryset.filter(id__in=options['activity_ids'])
+        
+        self.stdout.write(f'Checking participant counters for {queryset.count()} activities...')
+        repaired = Activity.reconcile_participant_counters(queryset)
+        
+        for activity_id, (old_approved, old_pending), (new_approved, new_pending) in repaired:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'  Activity {activity_id}: approved {old_approved} -> {new_approved}, '
+                    f'pending {old_pending} -> {new_pending}'
+                )
+            )
+        
+        if repaired:
+            self.stdout.write(self.style.SUCCESS(f'Repaired counters for {len(repaired)} activities'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All participant counters are in sync'))
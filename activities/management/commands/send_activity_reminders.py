@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.reminders import reminder_windows, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Remind organizers and approved participants of activities starting soon (run every few minutes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            type=int,
+            action='append',
+            dest='windows',
+            help='Reminder window in minutes before the start (can be repeated; default: ACTIVITY_REMINDER_WINDOWS)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many reminders are due',
+        )
+
+    def handle(self, *args, **options):
+        windows = options['windows'] or reminder_windows()
+        if any(window < 1 for window in windows):
+            raise CommandError('--window must be at least 1 minute')
+
+        self.stdout.write(f'Checking reminder windows: {", ".join(str(window) for window in sorted(set(windows)))} minutes...')
+        counts = send_due_reminders(windows, dry_run=options['dry_run'])
+
+        if counts['skipped']:
+            self.stdout.write(self.style.WARNING(
+                f'  {counts["skipped"]} activities were being reminded by another worker'
+            ))
+        if options['dry_run']:
+            self.stdout.write(f'  {counts["reminders"]} reminders due for {counts["activities"]} activities')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Sent {counts["reminders"]} reminders for {counts["activities"]} activities'
+            ))
+            self.stdout.write(
+                f'  pushed: {counts["queued"]}, quiet hours: {counts["quiet_hours"]}, '
+                f'not pushed: {counts["not_pushed"]}'
+            )
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:32
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_participant_counters(apps, schema_editor):
+    Activity = apps.get_model('activities', 'Activity')
+    counts = Activity.objects.annotate(
+        approved=Count('participants', filter=Q(participants__status='approved')),
+        pending=Count('participants', filter=Q(participants__status='pending')),
+    ).values_list('id', 'approved', 'pending')
+    for activity_id, approved, pending in counts:
+        Activity.objects.filter(pk=activity_id).update(approved_count=approved, pending_count=pending)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0006_make_fields_optional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of approved participants'),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of pending join requests'),
+        ),
+        migrations.RunPython(populate_participant_counters, migrations.RunPython.noop),
+    ]
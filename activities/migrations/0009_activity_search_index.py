@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:10
+
+from django.db import migrations
+
+from activities.search import SEARCH_FIELDS, fold_text
+
+FTS_TABLE = 'activities_activity_fts'
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases use the fallback search backend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    columns = [name for name, _ in SEARCH_FIELDS]
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{', '.join(columns)}, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    Activity = apps.get_model('activities', 'Activity')
+    placeholders = ', '.join(['%s'] * (len(columns) + 1))
+    for row in Activity.objects.values_list('id', *columns):
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(columns)}) VALUES ({placeholders})",
+            [row[0], *[fold_text(value) for value in row[1:]]],
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0008_activity_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_activity_cards(apps, schema_editor):
+    Activity = apps.get_model('activities', 'Activity')
+    ActivityCard = apps.get_model('activities', 'ActivityCard')
+    UserImage = apps.get_model('accounts', 'UserImage')
+
+    avatars = {}
+    for image in UserImage.objects.order_by('user_id', '-is_primary', 'order', 'uploaded_at'):
+        avatars.setdefault(image.user_id, image.image.url)
+
+    copied = [
+        'title', 'short_description', 'status', 'start_date', 'end_date', 'duration_hours',
+        'location_name', 'address', 'district', 'latitude', 'longitude', 'geohash',
+        'max_participants', 'min_participants', 'is_unlimited_participants', 'price', 'is_free',
+        'difficulty_level', 'is_featured', 'approved_count', 'pending_count', 'created_at',
+        'category_id', 'organizer_id',
+    ]
+    cards = []
+    for activity in Activity.objects.select_related('category', 'organizer'):
+        category = activity.category
+        organizer = activity.organizer
+        if organizer.first_name and organizer.last_name:
+            organizer_name = f'{organizer.first_name} {organizer.last_name}'
+        else:
+            organizer_name = organizer.phone
+        cards.append(ActivityCard(
+            activity_id=activity.pk,
+            main_image_url=activity.main_image.url if activity.main_image else '',
+            category_name=category.name,
+            category_type=category.category_type,
+            category_icon=category.icon or '',
+            category_icon_url=category.icon_image.url if category.icon_image else '',
+            category_color=category.color or '',
+            organizer_name=organizer_name,
+            organizer_avatar_url=avatars.get(organizer.pk, ''),
+            **{field: getattr(activity, field) for field in copied},
+        ))
+    ActivityCard.objects.bulk_create(cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0009_activity_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityCard',
+            fields=[
+                ('activity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='activities.activity')),
+                ('title', models.CharField(max_length=200)),
+                ('short_description', models.CharField(blank=True, max_length=300)),
+                ('status', models.CharField(choices=[('draft', 'Qaralama'), ('published', 'Yayımlanmış'), ('cancelled', 'Ləğv edilmiş'), ('completed', 'Tamamlanmış')], max_length=20)),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('duration_hours', models.PositiveIntegerField(blank=True, null=True)),
+                ('location_name', models.CharField(max_length=200)),
+                ('address', models.CharField(max_length=300)),
+                ('district', models.CharField(choices=[('nizami', 'Nizami'), ('sabail', 'Sabail'), ('yasamal', 'Yasamal'), ('binagadi', 'Binagadi'), ('khazar', 'Xəzər'), ('sabunchu', 'Sabunçu'), ('surakhani', 'Suraxanı'), ('khatai', 'Xətai'), ('narimanov', 'Nərimanov'), ('nasimi', 'Nəsimi'), ('pirallahi', 'Pirallahı'), ('other', 'Digər')], max_length=20)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('geohash', models.CharField(blank=True, db_index=True, max_length=12)),
+                ('max_participants', models.PositiveIntegerField()),
+                ('min_participants', models.PositiveIntegerField(default=1)),
+                ('is_unlimited_participants', models.BooleanField(default=False)),
+                ('price', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('is_free', models.BooleanField(default=True)),
+                ('difficulty_level', models.CharField(choices=[('beginner', 'Başlanğıc'), ('intermediate', 'Orta'), ('advanced', 'İrəliləmiş'), ('expert', 'Ekspert')], max_length=20)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('main_image_url', models.CharField(blank=True, max_length=500)),
+                ('approved_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('category_type', models.CharField(choices=[('sports', 'İdman'), ('culture', 'Mədəniyyət'), ('nature', 'Təbiət'), ('art', 'Sənət'), ('food', 'Yemək'), ('education', 'Təhsil'), ('social', 'Sosial'), ('entertainment', 'Əyləncə'), ('technology', 'Texnologiya'), ('music', 'Musiqi'), ('photography', 'Fotoqrafiya'), ('travel', 'Səyahət'), ('business', 'Biznes'), ('health', 'Sağlamlıq'), ('other', 'Digər')], db_index=True, max_length=20)),
+                ('category_icon', models.CharField(blank=True, max_length=50)),
+                ('category_icon_url', models.CharField(blank=True, max_length=500)),
+                ('category_color', models.CharField(blank=True, max_length=7)),
+                ('organizer_name', models.CharField(max_length=301)),
+                ('organizer_avatar_url', models.CharField(blank=True, max_length=500)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='activities.activitycategory')),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', '-is_featured', 'start_date'], name='activitycard_feed_idx')],
+            },
+        ),
+        migrations.RunPython(populate_activity_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0011_chat_message_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_minutes', models.PositiveIntegerField(help_text='Reminder window, in minutes before the start')),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='activities.activity')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Activity Reminder',
+                'verbose_name_plural': 'Activity Reminders',
+                'constraints': [models.UniqueConstraint(fields=('activity', 'user', 'window_minutes'), name='unique_activity_reminder')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0013_category_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activityreminder',
+            name='push_status',
+            field=models.CharField(choices=[('queued', 'Göndərilib'), ('quiet_hours', 'Sakit saatlar'), ('not_pushed', 'Göndərilməyib')], default='queued', help_text='Whether the push was queued, skipped for quiet hours, or not sent (disabled or no device)', max_length=20),
+        ),
+    ]
@@ -1,9 +1,18 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from PIL import Image
 
+from config.geo import geohash_for
+from config.response_cache import bump_cache_version
+from accounts.realtime import publish_activity_message, publish_room_membership
+from .chat_membership import invalidate_chat_members
+
 User = get_user_model()
 
 
@@ -34,6 +43,7 @@ class ActivityCategory(models.Model):
     color = models.CharField(max_length=7, default='#5DD3BE')  # Hex color for category badge
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Activity Categories"
@@ -95,6 +105,7 @@ class Activity(models.Model):
     district = models.CharField(max_length=20, choices=DISTRICT_CHOICES, default='other')
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False, help_text="Spatial index key derived from coordinates")
     
     # Capacity and Pricing
     max_participants = models.PositiveIntegerField()
@@ -124,6 +135,10 @@ class Activity(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     is_featured = models.BooleanField(default=False, help_text="Show in featured activities")
     
+    # Denormalized participant counters (kept in sync by ActivityParticipant signals)
+    approved_count = models.PositiveIntegerField(default=0, help_text="Number of approved participants")
+    pending_count = models.PositiveIntegerField(default=0, help_text="Number of pending join requests")
+    
     # Contact Information
     contact_phone = models.CharField(max_length=20, blank=True)
     contact_email = models.EmailField(blank=True)
@@ -142,6 +157,13 @@ class Activity(models.Model):
     def __str__(self):
         return f"{self.title} - {self.start_date.strftime('%d/%m/%Y')}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored organizer so post_save can move chat membership
+        instance._loaded_organizer_id = instance.__dict__.get('organizer_id')
+        return instance
+    
     def get_absolute_url(self):
         return reverse('activities:activity_detail', kwargs={'pk': self.pk})
     
@@ -170,23 +192,60 @@ class Activity(models.Model):
         if not user.is_authenticated:
             return False, "İlk öncə daxil olmalısınız."
         
+        existing_participation = self.participants.filter(user=user).first()
+        return self.evaluate_join_rules(
+            user,
+            participation_status=existing_participation.status if existing_participation else None,
+            user_languages=None,
+            required_languages=None,
+        )
+    
+    @classmethod
+    def bulk_can_user_join(cls, activities, user):
+        """Evaluate can_user_join for many activities in a constant number of queries.
+        
+        Returns {activity_id: (can_join, message)}.
+        """
+        activities = list(activities.prefetch_related('required_languages'))
+        if not user.is_authenticated:
+            return {activity.pk: (False, "İlk öncə daxil olmalısınız.") for activity in activities}
+        
+        statuses = dict(
+            ActivityParticipant.objects.filter(
+                user=user, activity__in=[activity.pk for activity in activities]
+            ).values_list('activity_id', 'status')
+        )
+        user_languages = set(user.languages.all())
+        return {
+            activity.pk: activity.evaluate_join_rules(
+                user,
+                participation_status=statuses.get(activity.pk),
+                user_languages=user_languages,
+                required_languages=set(activity.required_languages.all()),
+            )
+            for activity in activities
+        }
+    
+    def evaluate_join_rules(self, user, participation_status, user_languages, required_languages):
+        """Apply the join rules to already-loaded data.
+        
+        `user_languages` / `required_languages` may be None to load them lazily.
+        """
         # Check if user is organizer
-        if user == self.organizer:
+        if user.pk == self.organizer_id:
             return False, "Öz aktivitənizə qoşula bilməzsiniz."
         
         # Check if activity is full
-        if self.participants.filter(status='approved').count() >= self.max_participants:
+        if self.is_full:
             return False, "Aktivitə doludur."
         
         # Check if user already joined or has pending request
-        existing_participation = self.participants.filter(user=user).first()
-        if existing_participation:
-            if existing_participation.status == 'approved':
-                return False, "Artıq bu aktivitəyə qoşulmusunuz."
-            elif existing_participation.status == 'pending':
-                return False, "Sorğunuz gözləyir."
-            elif existing_participation.status == 'rejected':
-                return False, "Sorğunuz rədd edilib."
+        if participation_status == 'approved':
+            return False, "Artıq bu aktivitəyə qoşulmusunuz."
+        elif participation_status == 'pending':
+            return False, "Sorğunuz gözləyir."
+        elif participation_status == 'rejected':
+            return False, "Sorğunuz rədd edilib."
         
         # Check age requirements
         if user.age is not None:
@@ -207,9 +266,11 @@ class Activity(models.Model):
             return False, "Bu aktivitə üçün cinsiyyət məhdudiyyəti var. Profildə cinsiyyətinizi göstərin."
         
         # Check language requirements
-        if self.required_languages.exists():
-            user_languages = set(user.languages.all())
+        if required_languages is None and self.required_languages.exists():
             required_languages = set(self.required_languages.all())
+        if required_languages:
+            if user_languages is None:
+                user_languages = set(user.languages.all())
             if not required_languages.issubset(user_languages):
                 missing_languages = required_languages - user_languages
                 missing_names = [lang.name for lang in missing_languages]
@@ -223,20 +284,65 @@ class Activity(models.Model):
     
     @property
     def is_full(self):
-        return self.participants.filter(status='approved').count() >= self.max_participants
+        return self.approved_count >= self.max_participants
     
     @property
     def available_spots(self):
-        approved_count = self.participants.filter(status='approved').count()
-        return max(0, self.max_participants - approved_count)
+        return max(0, self.max_participants - self.approved_count)
     
     @property
     def participants_count(self):
-        return self.participants.filter(status='approved').count()
+        return self.approved_count
     
     @property
     def pending_requests_count(self):
-        return self.participants.filter(status='pending').count()
+        return self.pending_count
+    
+    @classmethod
+    def adjust_participant_counters(cls, activity_id, old_status=None, new_status=None, amount=1):
+        """Move `amount` participations from old_status to new_status in the counter columns"""
+        if old_status == new_status or not amount:
+            return
+        updates = {}
+        old_field = ActivityParticipant.COUNTER_FIELDS.get(old_status)
+        if old_field:
+            updates[old_field] = Greatest(F(old_field) - amount, 0)
+        new_field = ActivityParticipant.COUNTER_FIELDS.get(new_status)
+        if new_field:
+            updates[new_field] = F(new_field) + amount
+        if updates:
+            now = timezone.now()
+            cls.objects.filter(pk=activity_id).update(updated_at=now, **updates)
+            ActivityCard.objects.filter(pk=activity_id).update(refreshed_at=now, **updates)
+    
+    @classmethod
+    def reconcile_participant_counters(cls, queryset=None):
+        """Recompute counters from ActivityParticipant rows and fix any drift.
+        
+        Returns a list of (activity_id, old_counters, new_counters) for repaired rows.
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        actual = queryset.annotate(
+            actual_approved=Count('participants', filter=Q(participants__status='approved')),
+            actual_pending=Count('participants', filter=Q(participants__status='pending')),
+        ).values_list('id', 'approved_count', 'pending_count', 'actual_approved', 'actual_pending')
+        
+        repaired = []
+        for activity_id, approved, pending, actual_approved, actual_pending in actual:
+            if (approved, pending) != (actual_approved, actual_pending):
+                now = timezone.now()
+                cls.objects.filter(pk=activity_id).update(
+                    approved_count=actual_approved,
+                    pending_count=actual_pending,
+                    updated_at=now,
+                )
+                ActivityCard.objects.filter(pk=activity_id).update(
+                    approved_count=actual_approved,
+                    pending_count=actual_pending,
+                    refreshed_at=now,
+                )
+                repaired.append((activity_id, (approved, pending), (actual_approved, actual_pending)))
+        return repaired
     
     def get_status_badge_class(self):
         """Return Bootstrap badge class for status"""
@@ -260,6 +366,12 @@ class Activity(models.Model):
     
     
     def save(self, *args, **kwargs):
+        # Keep the spatial index key in sync with the coordinates
+        self.geohash = geohash_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        
         super().save(*args, **kwargs)
         
         # Resize image if it exists
@@ -270,6 +382,47 @@ class Activity(models.Model):
                 img.save(self.main_image.path)
 
 
+def chat_membership_changed(user_id, activity_id, joined):
+    """Sync the cached member set, group chat member rows and open WebSockets after an approval or revocation"""
+    from accounts.models import ActivityGroupChatMember
+    invalidate_chat_members(activity_id)
+    if joined:
+        ActivityGroupChatMember.join(activity_id, user_id)
+    else:
+        ActivityGroupChatMember.leave(activity_id, user_id)
+    publish_room_membership(user_id, activity_id, joined)
+
+
+class ActivityParticipantQuerySet(models.QuerySet):
+    
+    def set_status(self, status):
+        """Bulk status update that keeps the Activity counters in sync"""
+        with transaction.atomic():
+            changing = self.exclude(status=status)
+            moves = list(
+                changing.values('activity_id', 'status').annotate(total=Count('id')).order_by()
+            )
+            # Approvals and revocations move users in or out of activity chat rooms
+            joined = status == 'approved'
+            room_changes = []
+            if joined or any(move['status'] == 'approved' for move in moves):
+                members = changing if joined else changing.filter(status='approved')
+                room_changes = list(members.values_list('user_id', 'activity_id'))
+            updated = ActivityParticipant.objects.filter(
+                pk__in=changing.values('pk')
+            ).update(status=status)
+            for move in moves:
+                Activity.adjust_participant_counters(
+                    move['activity_id'], move['status'], status, amount=move['total']
+                )
+            for user_id, activity_id in room_changes:
+                chat_membership_changed(user_id, activity_id, joined)
+        # Queryset updates bypass the post_save cache invalidation
+        if updated:
+            bump_cache_version('activity_participant')
+        return updated
+
+
 class ActivityParticipant(models.Model):
     """Model for tracking activity participants and join requests"""
     
@@ -280,6 +433,12 @@ class ActivityParticipant(models.Model):
         ('cancelled', 'Ləğv edilmiş'),
     ]
     
+    # Statuses that are mirrored into Activity counter columns
+    COUNTER_FIELDS = {
+        'approved': 'approved_count',
+        'pending': 'pending_count',
+    }
+    
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='participants')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_participations')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
@@ -292,6 +451,8 @@ class ActivityParticipant(models.Model):
     # Organizer response
     organizer_response = models.TextField(blank=True, help_text="Response from organizer")
     
+    objects = ActivityParticipantQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['activity', 'user']
         ordering = ['-join_requested_at']
@@ -299,6 +460,41 @@ class ActivityParticipant(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.activity.title} ({self.status})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so post_save can shift the right counter
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        old_status = getattr(self, '_loaded_status', None)
+        update_fields = kwargs.get('update_fields')
+        if (self._state.adding or old_status is None or old_status == self.status
+                or (update_fields is not None and 'status' not in update_fields)):
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # Move the status only away from the one it was loaded with; if a
+            # concurrent request moved it first, shift the counters from the
+            # status actually replaced instead of counting the move twice
+            while not ActivityParticipant.objects.filter(pk=self.pk, status=old_status).update(status=self.status):
+                old_status = ActivityParticipant.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+                if old_status is None:
+                    # Deleted meanwhile: saving would bring the participation back
+                    raise ActivityParticipant.DoesNotExist('The participation was deleted meanwhile')
+            self._loaded_status = old_status
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Release the counter slot of the status the row has when deleted
+            stored_status = ActivityParticipant.objects.select_for_update().filter(
+                pk=self.pk
+            ).values_list('status', flat=True).first()
+            if stored_status is not None:
+                self.status = stored_status
+            return super().delete(*args, **kwargs)
+    
     def get_status_badge_class(self):
         status_classes = {
             'pending': 'bg-warning',
@@ -409,4 +605,414 @@ class ActivityMessage(models.Model):
     
     def can_delete(self, user):
         """Check if user can delete this message"""
-        return self.user == user or user == self.activity.organizer
\ No newline at end of file
+        return self.user == user or user == self.activity.organizer
+
+
+class ArchivedActivityMessage(models.Model):
+    """Web chat message moved to cold storage; keeps its original id (see config/archive.py)"""
+    id = models.BigIntegerField(primary_key=True)
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='archived_chat_messages')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    message = models.TextField()
+    is_edited = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Archived Activity Message"
+        verbose_name_plural = "Archived Activity Messages"
+        indexes = [
+            models.Index(fields=['activity', 'id'], name='archivedactivity_history_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} in {self.activity_id}: {self.message[:50]}..."
+
+
+class ActivityReminder(models.Model):
+    """Ledger of start reminders already sent, one row per activity, user and window (see activities/reminders.py)"""
+    PUSH_STATUS_CHOICES = [
+        ('queued', 'Göndərilib'),
+        ('quiet_hours', 'Sakit saatlar'),
+        ('not_pushed', 'Göndərilməyib'),
+    ]
+    
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='reminders')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    window_minutes = models.PositiveIntegerField(help_text="Reminder window, in minutes before the start")
+    push_status = models.CharField(
+        max_length=20,
+        choices=PUSH_STATUS_CHOICES,
+        default='queued',
+        help_text="Whether the push was queued, skipped for quiet hours, or not sent (disabled or no device)"
+    )
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Activity Reminder"
+        verbose_name_plural = "Activity Reminders"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['activity', 'user', 'window_minutes'],
+                name='unique_activity_reminder'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} reminded of {self.activity_id} ({self.window_minutes} min)"
+
+
+class ActivityCard(models.Model):
+    """Denormalized feed row per activity, holding exactly what activity lists render.
+    
+    Rebuilt incrementally from Activity, ActivityCategory, organizer and counter
+    changes (see the receivers below) and fully by `rebuild_activity_cards`.
+    """
+    activity = models.OneToOneField(Activity, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    
+    # Activity columns used by list filters, sorting and cards
+    title = models.CharField(max_length=200)
+    short_description = models.CharField(max_length=300, blank=True)
+    status = models.CharField(max_length=20, choices=Activity.STATUS_CHOICES)
+    start_date = models.DateTimeField()
+    end_date = models.DateTimeField(null=True, blank=True)
+    duration_hours = models.PositiveIntegerField(null=True, blank=True)
+    location_name = models.CharField(max_length=200)
+    address = models.CharField(max_length=300)
+    district = models.CharField(max_length=20, choices=Activity.DISTRICT_CHOICES)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True)
+    max_participants = models.PositiveIntegerField()
+    min_participants = models.PositiveIntegerField(default=1)
+    is_unlimited_participants = models.BooleanField(default=False)
+    price = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    is_free = models.BooleanField(default=True)
+    difficulty_level = models.CharField(max_length=20, choices=Activity.DIFFICULTY_CHOICES)
+    is_featured = models.BooleanField(default=False)
+    main_image_url = models.CharField(max_length=500, blank=True)
+    approved_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    
+    # Category snapshot
+    category = models.ForeignKey(ActivityCategory, on_delete=models.CASCADE, related_name='+')
+    category_name = models.CharField(max_length=100)
+    category_type = models.CharField(max_length=20, choices=ActivityCategory.CATEGORY_CHOICES, db_index=True)
+    category_icon = models.CharField(max_length=50, blank=True)
+    category_icon_url = models.CharField(max_length=500, blank=True)
+    category_color = models.CharField(max_length=7, blank=True)
+    
+    # Organizer snapshot
+    organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    organizer_name = models.CharField(max_length=301)
+    organizer_avatar_url = models.CharField(max_length=500, blank=True)
+    
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    CATEGORY_SOURCE_FIELDS = {
+        'category_name': 'name',
+        'category_type': 'category_type',
+        'category_icon': 'icon',
+        'category_color': 'color',
+    }
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-is_featured', 'start_date'], name='activitycard_feed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Card: {self.title}"
+    
+    @property
+    def is_upcoming(self):
+        return self.start_date > timezone.now()
+    
+    @property
+    def is_ongoing(self):
+        now = timezone.now()
+        return self.start_date <= now <= self.end_date
+    
+    @property
+    def is_past(self):
+        return self.end_date < timezone.now()
+    
+    @property
+    def available_spots(self):
+        return max(0, self.max_participants - self.approved_count)
+    
+    @property
+    def participants_count(self):
+        return self.approved_count
+    
+    @staticmethod
+    def file_url(file):
+        return file.url if file else ''
+    
+    @classmethod
+    def avatar_urls(cls, user_ids):
+        """Map user ID -> URL of the primary (or first) profile image"""
+        from accounts.models import UserImage
+        
+        avatars = {}
+        images = UserImage.objects.filter(user_id__in=user_ids).order_by('user_id', '-is_primary', 'order', 'uploaded_at')
+        for user_id, image in images.values_list('user_id', 'image'):
+            if user_id not in avatars:
+                avatars[user_id] = image
+        return {
+            user_id: UserImage._meta.get_field('image').storage.url(name)
+            for user_id, name in avatars.items()
+        }
+    
+    @classmethod
+    def category_values(cls, category):
+        values = {field: getattr(category, source) or '' for field, source in cls.CATEGORY_SOURCE_FIELDS.items()}
+        values['category_icon_url'] = cls.file_url(category.icon_image)
+        return values
+    
+    @classmethod
+    def build(cls, activity, avatar_url=''):
+        """Return an unsaved card for an activity (category and organizer should be loaded)"""
+        return cls(
+            activity_id=activity.pk,
+            title=activity.title,
+            short_description=activity.short_description,
+            status=activity.status,
+            start_date=activity.start_date,
+            end_date=activity.end_date,
+            duration_hours=activity.duration_hours,
+            location_name=activity.location_name,
+            address=activity.address,
+            district=activity.district,
+            latitude=activity.latitude,
+            longitude=activity.longitude,
+            geohash=activity.geohash,
+            max_participants=activity.max_participants,
+            min_participants=activity.min_participants,
+            is_unlimited_participants=activity.is_unlimited_participants,
+            price=activity.price,
+            is_free=activity.is_free,
+            difficulty_level=activity.difficulty_level,
+            is_featured=activity.is_featured,
+            main_image_url=cls.file_url(activity.main_image),
+            approved_count=activity.approved_count,
+            pending_count=activity.pending_count,
+            created_at=activity.created_at,
+            category_id=activity.category_id,
+            organizer_id=activity.organizer_id,
+            organizer_name=activity.organizer.get_full_name(),
+            organizer_avatar_url=avatar_url,
+            **cls.category_values(activity.category),
+        )
+    
+    @classmethod
+    def refresh(cls, activities):
+        """Upsert cards for the given activities; returns the number of cards written"""
+        activities = list(activities)
+        if not activities:
+            return 0
+        avatars = cls.avatar_urls({activity.organizer_id for activity in activities})
+        cards = [cls.build(activity, avatars.get(activity.organizer_id, '')) for activity in activities]
+        update_fields = [
+            field.name for field in cls._meta.concrete_fields
+            if not field.primary_key and field.name != 'refreshed_at'
+        ]
+        for card in cards:
+            card.refreshed_at = timezone.now()
+        cls.objects.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=['activity'],
+            update_fields=update_fields + ['refreshed_at'],
+        )
+        return len(cards)
+    
+    @classmethod
+    def rebuild(cls, batch_size=500):
+        """Re-create every card from the Activity table"""
+        queryset = Activity.objects.select_related('category', 'organizer').order_by('pk')
+        count = 0
+        batch = []
+        for activity in queryset.iterator(chunk_size=batch_size):
+            batch.append(activity)
+            if len(batch) >= batch_size:
+                count += cls.refresh(batch)
+                batch = []
+        count += cls.refresh(batch)
+        return count
+    
+    @classmethod
+    def refresh_organizer_avatar(cls, user_id, avatar_url=None):
+        if avatar_url is None:
+            avatar_url = cls.avatar_urls([user_id]).get(user_id, '')
+        updated = cls.objects.filter(organizer_id=user_id).exclude(organizer_avatar_url=avatar_url).update(
+            organizer_avatar_url=avatar_url, refreshed_at=timezone.now()
+        )
+        if updated:
+            bump_cache_version('activity')
+
+
+@receiver(post_save, sender=ActivityParticipant)
+def update_participant_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    """Keep Activity.approved_count/pending_count in sync with participant status"""
+    if raw:
+        return
+    old_status = None if created else getattr(instance, '_loaded_status', None)
+    Activity.adjust_participant_counters(instance.activity_id, old_status, instance.status)
+    # Later receivers (chat room membership) still need the previous status
+    instance._previous_status = old_status
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=ActivityParticipant)
+def update_participant_counters_on_delete(sender, instance, **kwargs):
+    """Release the counter slot held by a deleted participation"""
+    Activity.adjust_participant_counters(instance.activity_id, instance.status, None)
+
+
+@receiver(post_save, sender=Activity)
+def update_search_index_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Re-index an activity when its searchable text may have changed"""
+    from .search import SEARCH_FIELDS, get_search_backend
+    
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & {name for name, _ in SEARCH_FIELDS}:
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Activity)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    """Drop a deleted activity from the search index"""
+    from .search import get_search_backend
+    
+    get_search_backend().remove(instance.pk)
+
+
+
+@receiver(post_save, sender=Activity)
+def refresh_activity_card(sender, instance, raw=False, **kwargs):
+    """Rebuild the feed card of a saved activity"""
+    if raw:
+        return
+    ActivityCard.refresh([instance])
+
+
+@receiver(post_save, sender=ActivityCategory)
+def refresh_category_on_cards(sender, instance, created, raw=False, **kwargs):
+    """Propagate category name/icon/colour changes to feed cards"""
+    if raw or created:
+        return
+    ActivityCard.objects.filter(category=instance).update(
+        refreshed_at=timezone.now(), **ActivityCard.category_values(instance)
+    )
+
+
+@receiver(post_save, sender=User)
+def refresh_organizer_name_on_cards(sender, instance, created, raw=False, **kwargs):
+    """Propagate organizer name changes to feed cards"""
+    if raw or created:
+        return
+    name = instance.get_full_name()
+    updated = ActivityCard.objects.filter(organizer=instance).exclude(organizer_name=name).update(
+        organizer_name=name, refreshed_at=timezone.now()
+    )
+    if updated:
+        bump_cache_version('activity')
+
+
+@receiver(post_save, sender='accounts.UserImage')
+def refresh_organizer_avatar_on_image_save(sender, instance, raw=False, **kwargs):
+    """Propagate profile image changes to the organizer's feed cards"""
+    if raw:
+        return
+    if instance.is_primary:
+        # The other images are demoted only after this signal fires
+        ActivityCard.refresh_organizer_avatar(instance.user_id, ActivityCard.file_url(instance.image))
+    else:
+        ActivityCard.refresh_organizer_avatar(instance.user_id)
+
+
+@receiver(post_delete, sender='accounts.UserImage')
+def refresh_organizer_avatar_on_image_delete(sender, instance, **kwargs):
+    ActivityCard.refresh_organizer_avatar(instance.user_id)
+
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+@receiver(post_save, sender=ActivityCategory)
+@receiver(post_delete, sender=ActivityCategory)
+def invalidate_activity_response_cache(sender, **kwargs):
+    """Drop cached anonymous activity API responses"""
+    bump_cache_version('activity')
+
+
+@receiver(m2m_changed, sender=Activity.required_languages.through)
+def invalidate_activity_response_cache_on_languages(sender, action, **kwargs):
+    """Required languages are embedded in activity details"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_cache_version('activity')
+
+
+@receiver(post_save, sender=ActivityParticipant)
+@receiver(post_delete, sender=ActivityParticipant)
+def invalidate_participant_response_cache(sender, **kwargs):
+    """Drop cached anonymous activity API responses that show participant counters"""
+    bump_cache_version('activity_participant')
+
+
+@receiver(post_save, sender=ActivityParticipant)
+def update_chat_membership_on_save(sender, instance, created, raw=False, **kwargs):
+    """Move a participant's open WebSockets in or out of the activity's chat room"""
+    if raw:
+        return
+    was_approved = getattr(instance, '_previous_status', None) == 'approved'
+    is_approved = instance.status == 'approved'
+    if was_approved != is_approved:
+        chat_membership_changed(instance.user_id, instance.activity_id, is_approved)
+
+
+@receiver(post_delete, sender=ActivityParticipant)
+def update_chat_membership_on_delete(sender, instance, **kwargs):
+    if instance.status == 'approved':
+        chat_membership_changed(instance.user_id, instance.activity_id, False)
+
+
+@receiver(post_save, sender=Activity)
+def join_organizer_chat_room(sender, instance, created, raw=False, **kwargs):
+    """Subscribe the organizer's open WebSockets to a new activity's chat room"""
+    if created and not raw:
+        publish_room_membership(instance.organizer_id, instance.pk, True)
+
+
+@receiver(post_save, sender=Activity)
+def update_chat_membership_on_organizer_change(sender, instance, created, raw=False, **kwargs):
+    """Hand the activity chat over to a new organizer"""
+    old_organizer_id = getattr(instance, '_loaded_organizer_id', None)
+    instance._loaded_organizer_id = instance.organizer_id
+    if created or raw or old_organizer_id in (None, instance.organizer_id):
+        return
+    chat_membership_changed(instance.organizer_id, instance.pk, True)
+    # The previous organizer stays in the chat only as an approved participant
+    if not ActivityParticipant.objects.filter(
+        activity=instance,
+        user_id=old_organizer_id,
+        status='approved'
+    ).exists():
+        chat_membership_changed(old_organizer_id, instance.pk, False)
+
+
+@receiver(post_delete, sender=Activity)
+def invalidate_chat_members_on_delete(sender, instance, **kwargs):
+    invalidate_chat_members(instance.pk)
+
+
+# Deletes are published by chat_views.delete_message (see accounts/models.py)
+@receiver(post_save, sender=ActivityMessage)
+def publish_activity_message_on_save(sender, instance, created, raw=False, **kwargs):
+    """Push new and edited web chat messages to the activity's room"""
+    if not raw:
+        publish_activity_message('created' if created else 'updated', instance)
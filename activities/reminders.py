@@ -0,0 +1,130 @@
+"""
+Start reminders for the organizer and approved participants of an activity.
+
+``send_due_reminders`` runs periodically (see send_activity_reminders) and
+finds every published activity starting within the widest reminder window
+in one range query on the (status, start_date) index, then loads the
+approved participants and the sent-reminder ledger for all of them at once.
+
+Each recipient gets one reminder for the tightest window the activity is
+inside of; the ledger records every window it covers, so an activity
+created an hour before its start does not send a "24 hours" reminder
+afterwards. Each ledger row records whether the push was queued or skipped
+(quiet hours, reminders disabled, no device). The rows are inserted in the
+same transaction as the notifications and the queued push: a rerun skips
+what was already sent, and a concurrent worker that claimed the same rows
+first makes the insert fail and rolls back what this one queued.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+
+def reminder_windows():
+    return sorted(set(getattr(settings, 'ACTIVITY_REMINDER_WINDOWS', [24 * 60, 60])))
+
+
+def starts_in_text(delta):
+    """Human time until the start, e.g. "24 saat sonra" or "45 dəqiqə sonra\""""
+    minutes = max(1, round(delta.total_seconds() / 60))
+    if minutes >= 60:
+        return f'{round(minutes / 60)} saat sonra'
+    return f'{minutes} dəqiqə sonra'
+
+
+def due_reminders(windows=None, now=None):
+    """
+    Yield (activity, window, user ids, claims) for every activity with recipients still to remind
+
+    `window` is the tightest window the activity is inside of and the user
+    ids are the recipients not yet reminded for it; `claims` are the
+    (user id, window) ledger entries missing for them.
+    """
+    from .models import Activity, ActivityParticipant, ActivityReminder
+
+    windows = sorted(set(windows or reminder_windows()))
+    if not windows:
+        return
+    now = now or timezone.now()
+
+    activities = list(Activity.objects.filter(
+        status='published',
+        start_date__gt=now,
+        start_date__lte=now + timedelta(minutes=windows[-1])
+    ).only('id', 'title', 'start_date', 'organizer_id'))
+    if not activities:
+        return
+    activity_ids = [activity.id for activity in activities]
+
+    recipients = {activity.id: {activity.organizer_id} for activity in activities}
+    for activity_id, user_id in ActivityParticipant.objects.filter(
+        activity_id__in=activity_ids,
+        status='approved'
+    ).values_list('activity_id', 'user_id'):
+        recipients[activity_id].add(user_id)
+
+    sent = set(ActivityReminder.objects.filter(
+        activity_id__in=activity_ids,
+        window_minutes__in=windows
+    ).values_list('activity_id', 'user_id', 'window_minutes'))
+
+    for activity in activities:
+        remaining = activity.start_date - now
+        applicable = [window for window in windows if remaining <= timedelta(minutes=window)]
+        user_ids = {
+            user_id for user_id in recipients[activity.id]
+            if (activity.id, user_id, applicable[0]) not in sent
+        }
+        if user_ids:
+            claims = [
+                (user_id, window)
+                for user_id in user_ids
+                for window in applicable
+                if (activity.id, user_id, window) not in sent
+            ]
+            yield activity, applicable[0], user_ids, claims
+
+
+def send_due_reminders(windows=None, now=None, dry_run=False):
+    """
+    Send every due reminder
+
+    Returns a Counter of activities, reminders, reminders by push status
+    (queued, quiet_hours, not_pushed) and activities skipped as already claimed.
+    """
+    from accounts.push_service import push_service
+    from .models import ActivityReminder
+
+    now = now or timezone.now()
+    counts = Counter()
+    for activity, _, user_ids, claims in due_reminders(windows, now):
+        if dry_run:
+            counts['activities'] += 1
+            counts['reminders'] += len(user_ids)
+            continue
+        try:
+            with transaction.atomic():
+                push_status = push_service.send_activity_reminders(
+                    user_ids, activity.id, activity.title, starts_in_text(activity.start_date - now)
+                )
+                ActivityReminder.objects.bulk_create([
+                    ActivityReminder(
+                        activity_id=activity.id,
+                        user_id=user_id,
+                        window_minutes=window,
+                        push_status=push_status[user_id]
+                    )
+                    for user_id, window in claims
+                ])
+        except IntegrityError:
+            # Another worker reminded these users meanwhile
+            counts['skipped'] += 1
+            continue
+        counts['activities'] += 1
+        counts['reminders'] += len(user_ids)
+        counts.update(push_status.values())
+    return counts
@@ -0,0 +1,194 @@
+"""
+Full-text search for activities.
+
+Activity text is folded (lowercased, Azerbaijani letters and diacritics mapped to
+plain Latin) and kept in a search index that is updated incrementally from
+Activity post_save/post_delete signals. `search()` returns activity IDs in
+relevance order.
+
+The index covers every activity whatever its status, so `search_activities`
+keeps paging through the hits until it has collected enough that are visible
+in the caller's (already filtered) queryset; drafts, cancelled or past
+activities ranking above them never push them past the result cap.
+
+The backend is pluggable via the ACTIVITY_SEARCH_BACKEND setting. SQLite uses
+an FTS5 shadow table ranked by bm25; other databases fall back to the previous
+icontains matching until a dedicated backend (e.g. a Postgres tsvector column
+with a GIN index) is plugged in.
+"""
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+# Letters that Unicode decomposition does not reduce to plain ASCII
+AZ_FOLD_MAP = str.maketrans({
+    'ə': 'e', 'Ə': 'e',
+    'ı': 'i', 'I': 'i', 'İ': 'i',
+})
+
+# Indexed fields and their bm25 weights (title matches rank highest)
+SEARCH_FIELDS = [
+    ('title', 10.0),
+    ('short_description', 5.0),
+    ('description', 1.0),
+    ('location_name', 3.0),
+    ('address', 2.0),
+]
+
+MAX_SEARCH_RESULTS = 500
+
+
+def fold_text(text):
+    """Normalize text for indexing and querying: lowercase, no diacritics, ə→e, ı→i"""
+    if not text:
+        return ''
+    text = text.translate(AZ_FOLD_MAP)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return text.lower()
+
+
+def search_terms(query):
+    """Split a user query into folded search terms"""
+    return re.findall(r'\w+', fold_text(query))
+
+
+class BaseSearchBackend:
+    """Interface for activity search backends"""
+
+    def index(self, activity):
+        """Add or refresh an activity in the index"""
+        raise NotImplementedError
+
+    def remove(self, activity_id):
+        """Drop an activity from the index"""
+        raise NotImplementedError
+
+    def search(self, query, limit=MAX_SEARCH_RESULTS, offset=0):
+        """Return matching activity IDs, best match first, skipping the first `offset`"""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Re-index every activity; returns the number of indexed rows"""
+        from .models import Activity
+
+        count = 0
+        for activity in Activity.objects.only(*[name for name, _ in SEARCH_FIELDS]).iterator():
+            self.index(activity)
+            count += 1
+        return count
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """FTS5 virtual table keyed by activity ID, ranked with bm25"""
+
+    table = 'activities_activity_fts'
+
+    def index(self, activity):
+        values = [fold_text(getattr(activity, name)) for name, _ in SEARCH_FIELDS]
+        columns = ', '.join(name for name, _ in SEARCH_FIELDS)
+        placeholders = ', '.join(['%s'] * (len(SEARCH_FIELDS) + 1))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [activity.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, {columns}) VALUES ({placeholders})',
+                [activity.pk, *values],
+            )
+
+    def remove(self, activity_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [activity_id])
+
+    def search(self, query, limit=MAX_SEARCH_RESULTS, offset=0):
+        terms = search_terms(query)
+        if not terms:
+            return []
+        # Every term must match, each as a prefix ("fut" finds "futbol")
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for _, weight in SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}, {weights}), rowid LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        return super().rebuild()
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """Unindexed icontains matching for databases without a full-text backend"""
+
+    def index(self, activity):
+        pass
+
+    def remove(self, activity_id):
+        pass
+
+    def search(self, query, limit=MAX_SEARCH_RESULTS, offset=0):
+        from .models import Activity
+
+        if not query.strip():
+            return []
+        condition = Q()
+        for name, _ in SEARCH_FIELDS:
+            condition |= Q(**{f'{name}__icontains': query})
+        return list(
+            Activity.objects.filter(condition).order_by('id').values_list('id', flat=True)[offset:offset + limit]
+        )
+
+    def rebuild(self):
+        return 0
+
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured search backend instance"""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'ACTIVITY_SEARCH_BACKEND', None)
+        if backend_path:
+            _backend = import_string(backend_path)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = BasicSearchBackend()
+    return _backend
+
+
+def search_activities(queryset, query, limit=MAX_SEARCH_RESULTS):
+    """Restrict a queryset to its best `limit` search hits, annotated with `search_rank` (0 = best)
+
+    Apply it after the visibility filters: hits outside `queryset` do not
+    count towards `limit`.
+    """
+    backend = get_search_backend()
+    activity_ids = []
+    offset = 0
+    while len(activity_ids) < limit:
+        hits = backend.search(query, limit=limit, offset=offset)
+        visible = set(queryset.filter(pk__in=hits).values_list('pk', flat=True)) if hits else set()
+        activity_ids.extend(pk for pk in hits if pk in visible)
+        if len(hits) < limit:
+            break
+        offset += limit
+    activity_ids = activity_ids[:limit]
+    if not activity_ids:
+        return queryset.none().annotate(search_rank=Value(0, output_field=IntegerField()))
+    return queryset.filter(pk__in=activity_ids).annotate(
+        search_rank=Case(
+            *[When(pk=activity_id, then=Value(rank)) for rank, activity_id in enumerate(activity_ids)],
+            output_field=IntegerField(),
+        )
+    )
@@ -1,10 +1,13 @@
 from rest_framework import serializers
 from .models import (
     ActivityCategory, Activity, ActivityParticipant,
-    ActivityImage, ActivityReview, ActivityComment, ActivityMessage
+    ActivityImage, ActivityReview, ActivityComment, ActivityMessage, ActivityCard
+)
+from accounts.serializers import (
+    UserPublicSerializer, UserReferenceSerializer, user_public_hints, user_reference_hints
 )
-from accounts.serializers import UserPublicSerializer
 from accounts.models import Language
+from config.serializers import SparseFieldsetMixin
 
 
 class LanguageSerializer(serializers.ModelSerializer):
@@ -46,10 +49,10 @@ class ActivityImageSerializer(serializers.ModelSerializer):
         return None
 
 
-class ActivityListSerializer(serializers.ModelSerializer):
+class ActivityListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for activity lists"""
     category = ActivityCategorySerializer(read_only=True)
-    organizer = UserPublicSerializer(read_only=True)
+    organizer = UserReferenceSerializer(read_only=True)
     main_image_url = serializers.SerializerMethodField()
     participants_count = serializers.ReadOnlyField()
     available_spots = serializers.ReadOnlyField()
@@ -58,17 +61,31 @@ class ActivityListSerializer(serializers.ModelSerializer):
     is_upcoming = serializers.BooleanField(read_only=True)
     is_ongoing = serializers.BooleanField(read_only=True)
     is_past = serializers.BooleanField(read_only=True)
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = Activity
         fields = [
             'id', 'title', 'short_description', 'category', 'organizer',
             'start_date', 'end_date', 'duration_hours', 'location_name', 'address',
-            'district', 'latitude', 'longitude', 'max_participants', 'min_participants',
+            'district', 'latitude', 'longitude', 'distance_km', 'max_participants', 'min_participants',
             'price', 'is_free', 'difficulty_level', 'main_image', 'main_image_url',
             'status', 'is_featured', 'participants_count', 'available_spots',
             'is_upcoming', 'is_ongoing', 'is_past', 'created_at'
         ]
+        expandable_fields = {'organizer': UserPublicSerializer}
+        field_hints = {
+            'category': {'select_related': ['category'], 'only': ['category']},
+            'organizer': user_reference_hints('organizer'),
+            'main_image_url': {'only': ['main_image']},
+            'participants_count': {'only': ['approved_count']},
+            'available_spots': {'only': ['max_participants', 'approved_count']},
+            'is_upcoming': {'only': ['start_date']},
+            'is_ongoing': {'only': ['start_date', 'end_date']},
+            'is_past': {'only': ['end_date']},
+            'distance_km': {'only': []},
+        }
+        expand_hints = {'organizer': user_public_hints('organizer')}
     
     def get_main_image_url(self, obj):
         if obj.main_image:
@@ -77,6 +94,92 @@ class ActivityListSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.main_image.url)
             return obj.main_image.url
         return None
+    
+    def get_distance_km(self, obj):
+        # Only present when the list was filtered with ?near=
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 3) if distance is not None else None
+
+
+class ActivityCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Activity list item served straight from the denormalized ActivityCard table"""
+    id = serializers.IntegerField(source='activity_id', read_only=True)
+    category = serializers.SerializerMethodField()
+    organizer = serializers.SerializerMethodField()
+    main_image_url = serializers.SerializerMethodField()
+    participants_count = serializers.ReadOnlyField()
+    available_spots = serializers.ReadOnlyField()
+    is_upcoming = serializers.BooleanField(read_only=True)
+    is_ongoing = serializers.BooleanField(read_only=True)
+    is_past = serializers.BooleanField(read_only=True)
+    distance_km = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ActivityCard
+        fields = [
+            'id', 'title', 'short_description', 'category', 'organizer',
+            'start_date', 'end_date', 'duration_hours', 'location_name', 'address',
+            'district', 'latitude', 'longitude', 'distance_km', 'max_participants', 'min_participants',
+            'price', 'is_free', 'difficulty_level', 'main_image_url',
+            'status', 'is_featured', 'participants_count', 'available_spots',
+            'is_upcoming', 'is_ongoing', 'is_past', 'created_at'
+        ]
+        expandable_fields = {'organizer': UserPublicSerializer}
+        field_hints = {
+            'id': {'only': []},
+            'category': {'only': [
+                'category', 'category_name', 'category_type', 'category_icon',
+                'category_icon_url', 'category_color',
+            ]},
+            'organizer': {'only': ['organizer', 'organizer_name', 'organizer_avatar_url']},
+            'main_image_url': {'only': ['main_image_url']},
+            'participants_count': {'only': ['approved_count']},
+            'available_spots': {'only': ['max_participants', 'approved_count']},
+            'is_upcoming': {'only': ['start_date']},
+            'is_ongoing': {'only': ['start_date', 'end_date']},
+            'is_past': {'only': ['end_date']},
+            'distance_km': {'only': []},
+        }
+        # Expanding the organizer is the one case that joins the users table
+        expand_hints = {
+            'organizer': {
+                'select_related': ['organizer'],
+                'prefetch_related': ['organizer__images', 'organizer__languages', 'organizer__interests'],
+            },
+        }
+    
+    def _absolute_url(self, url):
+        if not url:
+            return None
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+    
+    def get_category(self, obj):
+        return {
+            'id': obj.category_id,
+            'name': obj.category_name,
+            'category_type': obj.category_type,
+            'icon': obj.category_icon,
+            'icon_image_url': self._absolute_url(obj.category_icon_url),
+            'color': obj.category_color,
+        }
+    
+    def get_organizer(self, obj):
+        return {
+            'id': obj.organizer_id,
+            'full_name': obj.organizer_name,
+            'avatar_url': self._absolute_url(obj.organizer_avatar_url),
+        }
+    
+    def get_main_image_url(self, obj):
+        return self._absolute_url(obj.main_image_url)
+    
+    def get_distance_km(self, obj):
+        # Only present when the list was filtered with ?near=
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 3) if distance is not None else None
 
 
 class ActivityDetailSerializer(serializers.ModelSerializer):
@@ -158,8 +261,8 @@ class ActivityWriteSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ActivityParticipantSerializer(serializers.ModelSerializer):
-    user = UserPublicSerializer(read_only=True)
+class ActivityParticipantSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    user = UserReferenceSerializer(read_only=True)
     
     class Meta:
         model = ActivityParticipant
@@ -168,6 +271,9 @@ class ActivityParticipantSerializer(serializers.ModelSerializer):
             'join_requested_at', 'status_updated_at'
         ]
         read_only_fields = ['id', 'join_requested_at', 'status_updated_at']
+        expandable_fields = {'user': UserPublicSerializer}
+        field_hints = {'user': user_reference_hints('user')}
+        expand_hints = {'user': user_public_hints('user')}
 
 
 class ActivityReviewSerializer(serializers.ModelSerializer):
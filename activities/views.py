@@ -2,12 +2,13 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import Activity, ActivityCategory, ActivityParticipant
+from .search import search_activities
+from config.response_cache import fragment_cache_context
 import logging
 
 # Setup logging for debugging
@@ -19,16 +20,7 @@ def activities_list(request):
     activities = Activity.objects.filter(status='published').select_related('category', 'organizer')
     categories = ActivityCategory.objects.all().order_by('name')
     
-    # Search functionality
     search_query = request.GET.get('search', '')
-    if search_query:
-        activities = activities.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(short_description__icontains=search_query) |
-            Q(location_name__icontains=search_query) |
-            Q(address__icontains=search_query)
-        )
     
     # Category filter
     category_filter = request.GET.get('category', '')
@@ -66,9 +58,16 @@ def activities_list(request):
     if difficulty_filter:
         activities = activities.filter(difficulty_level=difficulty_filter)
     
+    # Search last, so only hits that pass every filter count towards its cap
+    if search_query:
+        activities = search_activities(activities, search_query)
+    
     # Sorting
-    sort_by = request.GET.get('sort', 'featured')
-    if sort_by == 'date':
+    # Searches default to relevance order
+    sort_by = request.GET.get('sort') or ('relevance' if search_query else 'featured')
+    if sort_by == 'relevance' and search_query:
+        activities = activities.order_by('search_rank')
+    elif sort_by == 'date':
         activities = activities.order_by('start_date')
     elif sort_by == 'price_low':
         activities = activities.order_by('price')
@@ -114,6 +113,7 @@ def activities_list(request):
         'difficulty_filter': difficulty_filter,
         'sort_by': sort_by,
         'total_count': paginator.count,
+        **fragment_cache_context(('activity', 'activity_participant')),
     }
     
     return render(request, 'core/activities.html', context)
@@ -0,0 +1,35 @@
+"""
+Cold storage for old chat messages.
+
+Archived messages keep their primary key and move into compact archive tables
+(ArchivedDirectMessage, ArchivedGroupMessage, ArchivedActivityMessage) that
+leave out edit bookkeeping, so the live chat tables only hold recent traffic.
+History endpoints continue into the archive once a client scrolls back past
+the oldest live message (see ``message_sync_window``).
+
+Rows move in short batches, each in its own transaction: the copy and the
+delete of a batch commit together, and no lock is held across batches.
+"""
+
+from django.db import transaction
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def archive_batches(queryset, archive_model, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move the rows of `queryset` into `archive_model`, yielding the number moved per batch"""
+    model = queryset.model
+    fields = [field.attname for field in archive_model._meta.concrete_fields]
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        last_id = ids[-1]
+        with transaction.atomic():
+            rows = model.objects.filter(pk__in=ids).values(*fields)
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows])
+            moved, _ = model.objects.filter(pk__in=ids).delete()
+        yield moved
@@ -0,0 +1,98 @@
+"""
+Conditional GET (ETag / Last-Modified) for REST viewsets.
+
+Validators are computed from the loaded rows instead of the rendered body:
+lists use the ordered ids of the page with each row's ``updated_at`` and
+denormalized counters, plus the page links; details use the object's
+``updated_at`` plus its counters. The ETag also covers the query string and
+the requesting user, so a request carrying ``If-None-Match`` that still
+matches gets a 304 before any serializer runs.
+
+Lists carry no ``Last-Modified``: a row leaving the filtered set does not
+move any remaining timestamp, so ``If-Modified-Since`` alone cannot tell
+that a list changed. Details honour both validators.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """Adds ETag validation to the list action and ETag / Last-Modified validation to retrieve"""
+
+    # Timestamp column bumped on every change of the listed rows
+    list_modified_field = 'updated_at'
+    detail_modified_field = 'updated_at'
+    # Denormalized counters that change without touching the timestamp
+    validator_counter_fields = ()
+
+    def get_list_row_state(self, obj):
+        """Return the validator state of one listed row"""
+        counters = tuple(getattr(obj, field, None) for field in self.validator_counter_fields)
+        return obj.pk, getattr(obj, self.list_modified_field, None), counters
+
+    def get_list_validators(self, objects):
+        """Return the validator state of the listed rows, in order"""
+        return tuple(self.get_list_row_state(obj) for obj in objects)
+
+    def get_object_validators(self, obj):
+        """Return (state, last_modified) for a single object"""
+        last_modified = getattr(obj, self.detail_modified_field, None)
+        counters = tuple(getattr(obj, field) for field in self.validator_counter_fields)
+        return (obj.pk, last_modified, counters), last_modified
+
+    def build_etag(self, state):
+        request = self.request
+        key = repr((
+            self.__class__.__name__,
+            self.action,
+            sorted(request.query_params.lists()),
+            request.user.pk if request.user.is_authenticated else None,
+            request.headers.get('Accept-Language', ''),
+            state,
+        ))
+        return quote_etag(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+    def conditional_response(self, state, last_modified, render):
+        """Return a 304 if the client's validators match, else render() with validators attached"""
+        etag = self.build_etag(state)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(
+            self.request._request, etag=etag, last_modified=timestamp
+        )
+        if not_modified is not None:
+            response = Response(status=not_modified.status_code)
+        else:
+            response = render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(queryset) if page is None else page
+        state = self.get_list_validators(objects)
+        if page is not None:
+            # Links change when rows appear or vanish past either end of the page
+            state = (state, self.paginator.get_next_link(), self.paginator.get_previous_link())
+
+        def render():
+            serializer = self.get_serializer(objects, many=True)
+            if page is not None:
+                return self.get_paginated_response(serializer.data)
+            return Response(serializer.data)
+
+        return self.conditional_response(state, None, render)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        state, last_modified = self.get_object_validators(instance)
+        return self.conditional_response(
+            state, last_modified, lambda: Response(self.get_serializer(instance).data)
+        )
@@ -0,0 +1,180 @@
+"""
+Geospatial helpers shared by activities and places.
+
+Rows carry an indexed ``geohash`` column derived from latitude/longitude on save.
+Radius and bounding-box searches first narrow rows with a handful of geohash
+range scans on that index, then apply the exact bounding box and haversine
+distance in SQL so results can be filtered and ordered by ``distance_km``.
+"""
+
+import math
+
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 8  # ~38m x 19m cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+DEFAULT_RADIUS_KM = 5.0
+MAX_RADIUS_KM = 100.0
+MAX_COVER_CELLS = 32
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(geohash)
+
+
+def geohash_for(latitude, longitude):
+    """Return the stored geohash for a (possibly missing) coordinate"""
+    if latitude is None or longitude is None:
+        return ''
+    return encode_geohash(latitude, longitude)
+
+
+def cell_size(precision):
+    """Return (lat_degrees, lng_degrees) covered by one geohash cell"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def geohash_cover(min_lat, min_lng, max_lat, max_lng, max_cells=MAX_COVER_CELLS):
+    """Return the geohash prefixes covering a bounding box.
+
+    Uses the finest precision for which the box spans at most `max_cells` cells.
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    min_lng, max_lng = max(min_lng, -180.0), min(max_lng, 180.0)
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        rows = int(math.floor((max_lat + 90.0) / lat_step) - math.floor((min_lat + 90.0) / lat_step)) + 1
+        cols = int(math.floor((max_lng + 180.0) / lng_step) - math.floor((min_lng + 180.0) / lng_step)) + 1
+        if rows * cols <= max_cells:
+            break
+
+    first_row = math.floor((min_lat + 90.0) / lat_step)
+    first_col = math.floor((min_lng + 180.0) / lng_step)
+    prefixes = set()
+    for row in range(rows):
+        lat = min(-90.0 + (first_row + row + 0.5) * lat_step, 90.0)
+        for col in range(cols):
+            lng = min(-180.0 + (first_col + col + 0.5) * lng_step, 180.0)
+            prefixes.add(encode_geohash(lat, lng, precision))
+    return sorted(prefixes)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Return (min_lat, min_lng, max_lat, max_lng) enclosing a radius around a point"""
+    lat_delta = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_delta = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    return latitude - lat_delta, longitude - lng_delta, latitude + lat_delta, longitude + lng_delta
+
+
+def geohash_prefilter(min_lat, min_lng, max_lat, max_lng, field='geohash'):
+    """Index-friendly filter: one range scan per covering geohash prefix plus the exact box"""
+    cover = Q()
+    for prefix in geohash_cover(min_lat, min_lng, max_lat, max_lng):
+        # '~' sorts after every geohash character, so this is a prefix range scan
+        cover |= Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '~'})
+    return cover & Q(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+
+
+def haversine_expression(latitude, longitude):
+    """SQL expression for the great-circle distance (km) from a point to each row"""
+    row_lat = Radians(Cast(F('latitude'), FloatField()))
+    row_lng = Radians(Cast(F('longitude'), FloatField()))
+    lat = math.radians(latitude)
+    lng = math.radians(longitude)
+    a = (
+        Power(Sin((row_lat - lat) / 2), 2)
+        + math.cos(lat) * Cos(row_lat) * Power(Sin((row_lng - lng) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def parse_coordinates(value, count):
+    """Parse a comma-separated list of `count` floats, or return None"""
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except (AttributeError, ValueError):
+        return None
+    if len(numbers) != count or not all(math.isfinite(n) for n in numbers):
+        return None
+    return numbers
+
+
+def filter_by_location(queryset, query_params):
+    """Apply `?near=lat,lng&radius_km=` and `?bbox=min_lng,min_lat,max_lng,max_lat` filters.
+
+    Returns (queryset, has_distance). When `near` is given the queryset is
+    annotated with `distance_km` and limited to rows within the radius.
+    Malformed parameters are ignored, like the other list filters.
+    """
+    has_distance = False
+
+    bbox = parse_coordinates(query_params.get('bbox'), 4)
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        if min_lat <= max_lat and min_lng <= max_lng:
+            queryset = queryset.filter(geohash_prefilter(min_lat, min_lng, max_lat, max_lng))
+
+    near = parse_coordinates(query_params.get('near'), 2)
+    if near and -90 <= near[0] <= 90 and -180 <= near[1] <= 180:
+        latitude, longitude = near
+        try:
+            radius_km = float(query_params.get('radius_km', DEFAULT_RADIUS_KM))
+        except (TypeError, ValueError):
+            radius_km = DEFAULT_RADIUS_KM
+        if not math.isfinite(radius_km) or radius_km <= 0:
+            radius_km = DEFAULT_RADIUS_KM
+        radius_km = min(radius_km, MAX_RADIUS_KM)
+
+        queryset = queryset.filter(
+            geohash_prefilter(*bounding_box(latitude, longitude, radius_km))
+        ).annotate(
+            distance_km=haversine_expression(latitude, longitude)
+        ).filter(distance_km__lte=radius_km)
+        has_distance = True
+
+    return queryset, has_distance
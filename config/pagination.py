@@ -0,0 +1,307 @@
+"""
+Project-wide keyset (cursor) pagination for the REST API.
+
+Pages are addressed by the sort-column values of the last (or first) row of the
+previous page instead of an OFFSET, so every page costs the same regardless of
+how deep the client scrolls. The keyset is the queryset's own ordering with
+the primary key (usually ``id``) appended as a unique tie-breaker, e.g. ``(-is_featured, start_date, id)``
+for activities or ``(-created_at, id)`` for notifications.
+"""
+
+import base64
+import datetime
+import json
+from collections import OrderedDict
+from urllib import parse
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorValueEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that keeps full microsecond precision for keyset values"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetCursorPagination(BasePagination):
+    """Cursor pagination over a composite (sort columns + id) keyset"""
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+
+        cursor = self.decode_cursor(request)
+        reverse = False
+        if cursor is not None:
+            reverse, values = cursor
+            queryset = queryset.filter(self.get_keyset_filter(values, reverse))
+
+        ordering = [self._invert(field) for field in self.ordering] if reverse else self.ordering
+        results = list(queryset.order_by(*self.get_order_by(ordering))[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size:
+            try:
+                page_size = int(page_size)
+            except (TypeError, ValueError):
+                return self.page_size
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """Return the queryset ordering with the primary key appended as a unique tie-breaker"""
+        query = queryset.query
+        if query.order_by:
+            ordering = list(query.order_by)
+        elif query.default_ordering and queryset.model._meta.ordering:
+            ordering = list(queryset.model._meta.ordering)
+        else:
+            ordering = ['-id']
+
+        for field in ordering:
+            if not isinstance(field, str):
+                raise ImproperlyConfigured(
+                    f'{self.__class__.__name__} only supports field-name ordering, got {field!r}'
+                )
+
+        # `id` for most models, `activity_id` for one-to-one keyed tables like ActivityCard
+        pk_name = queryset.model._meta.pk.attname
+        ordering = [
+            pk_name if field == 'pk' else f'-{pk_name}' if field == '-pk' else field
+            for field in ordering
+        ]
+        if not any(field.lstrip('-') == pk_name for field in ordering):
+            ordering.append(pk_name)
+        return ordering
+
+    def get_order_by(self, ordering):
+        """Order expressions for `ordering`, placing NULLs below every value on every database"""
+        order_by = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if not self._is_nullable(name):
+                # Plain ordering keeps matching the column's index
+                order_by.append(field)
+            elif field.startswith('-'):
+                order_by.append(F(name).desc(nulls_last=True))
+            else:
+                order_by.append(F(name).asc(nulls_first=True))
+        return order_by
+
+    def get_keyset_filter(self, values, reverse=False):
+        """Build `(a, b, id) > (x, y, z)` as nested OR/AND lookups"""
+        keyset_filter = Q()
+        equal_prefix = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            # NULL is below every value (see get_order_by)
+            if value is None:
+                strict = Q(**{f'{name}__isnull': False}) if lookup == 'gt' else Q(pk__in=[])
+            elif lookup == 'lt':
+                strict = Q(**{f'{name}__lt': value}) | Q(**{f'{name}__isnull': True})
+            else:
+                strict = Q(**{f'{name}__gt': value})
+            keyset_filter |= equal_prefix & strict
+            equal_prefix &= Q(**{name: value})
+        return keyset_filter
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, obj, reverse):
+        payload = {
+            'o': self.ordering,
+            'v': [self._get_value(obj, field.lstrip('-')) for field in self.ordering],
+        }
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, cls=CursorValueEncoder, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(parse.unquote(encoded).encode('ascii')).decode('utf-8')
+            payload = json.loads(raw)
+            if payload['o'] != self.ordering or len(payload['v']) != len(self.ordering):
+                raise ValueError('Cursor does not match the current ordering')
+            values = [
+                self._to_python(field.lstrip('-'), value)
+                for field, value in zip(self.ordering, payload['v'])
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return bool(payload.get('r')), values
+
+    def _get_value(self, obj, name):
+        for part in name.split('__'):
+            if obj is None:
+                return None
+            obj = getattr(obj, part)
+        return obj
+
+    def _is_nullable(self, name):
+        model = self.model
+        for part in name.split('__'):
+            try:
+                field = model._meta.get_field(part)
+            except Exception:
+                # Annotation or unknown lookup: assume it can be NULL
+                return True
+            if field.null or not field.concrete:
+                return True
+            if field.is_relation and field.related_model is not None:
+                model = field.related_model
+        return False
+
+    def _to_python(self, name, value):
+        if value is None:
+            return None
+        model = self.model
+        field = None
+        for part in name.split('__'):
+            try:
+                field = model._meta.get_field(part)
+            except Exception:
+                # Annotation or unknown lookup: use the JSON value as-is
+                return value
+            if field.is_relation and field.related_model is not None:
+                model = field.related_model
+        if field.is_relation:
+            field = field.target_field
+        return field.to_python(value)
+
+    def _invert(self, field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def to_html(self):
+        return ''
+
+
+MESSAGE_SYNC_LIMIT = 50
+MAX_MESSAGE_SYNC_LIMIT = 200
+
+
+def _message_id_param(query_params, name):
+    value = query_params.get(name)
+    if value in (None, ''):
+        return None
+    value = int(value)
+    if value < 0:
+        raise ValueError(f'{name} must be a positive message id')
+    return value
+
+
+def message_sync_window(queryset, query_params, default_limit=MESSAGE_SYNC_LIMIT, max_limit=MAX_MESSAGE_SYNC_LIMIT,
+                        archive=None):
+    """Return (messages, has_more) for incremental chat sync, oldest message first.
+
+    ``?after=<id>`` returns the next messages newer than ``id`` (an unchanged
+    poll is a single empty index probe), ``?before=<id>`` scrolls back to the
+    messages just older than ``id``, and with neither the latest messages are
+    returned. ``?limit=`` caps the window. Messages are keyed on the
+    ``(chat, id)`` index, so every window costs the same however long the
+    chat is. Raises ValueError for malformed parameters.
+
+    ``archive`` is the same chat's archived messages (see config/archive.py).
+    Their ids are older than every live message, so a latest or scroll-back
+    window that runs out of live messages continues into it; ``?after=``
+    polls only ever read live messages.
+    """
+    after = _message_id_param(query_params, 'after')
+    before = _message_id_param(query_params, 'before')
+    limit = query_params.get('limit')
+    limit = min(int(limit), max_limit) if limit not in (None, '') else default_limit
+    if limit <= 0:
+        raise ValueError('limit must be positive')
+
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+
+    if after is not None:
+        # Catching up: oldest unseen messages first
+        messages = list(queryset.order_by('id')[:limit + 1])
+        has_more = len(messages) > limit
+        return messages[:limit], has_more
+
+    # Latest window or scroll-back: newest first, then flip to chronological order
+    messages = list(queryset.order_by('-id')[:limit + 1])
+    if archive is not None and len(messages) <= limit:
+        if before is not None:
+            archive = archive.filter(id__lt=before)
+        if messages:
+            archive = archive.filter(id__lt=messages[-1].pk)
+        messages.extend(archive.order_by('-id')[:limit + 1 - len(messages)])
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    messages.reverse()
+    return messages, has_more
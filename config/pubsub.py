@@ -0,0 +1,157 @@
+"""
+Publish/subscribe layer for real-time delivery over WebSockets.
+
+Writers publish JSON-serializable events to named channels (``user:<id>``,
+``activity:<id>``); every open WebSocket connection holds one subscription
+covering the channels its user may read. Events are published on transaction
+commit so subscribers never see rows that were rolled back.
+
+The backend is pluggable via the REALTIME_PUBSUB_BACKEND setting. The default
+in-process backend fans out to connections served by the same process, which
+is enough for a single ASGI worker and for local testing; multi-process
+deployments plug in a broker-backed backend (e.g. Redis PUBLISH/SUBSCRIBE)
+implementing the same interface.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Pending events per connection before the client is told to re-sync over REST
+MAX_PENDING_EVENTS = 1000
+SYNC_REQUIRED_EVENT = {'type': 'sync.required'}
+
+
+class Subscription:
+    """A connection's view of the pub/sub layer; consumed from its event loop"""
+
+    def __init__(self, pubsub, loop, max_pending=MAX_PENDING_EVENTS):
+        self.pubsub = pubsub
+        self.loop = loop
+        self.max_pending = max_pending
+        self.channels = set()
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def add(self, channels):
+        channels = set(channels) - self.channels
+        self.channels |= channels
+        self.pubsub._attach(self, channels)
+
+    def remove(self, channels):
+        channels = set(channels) & self.channels
+        self.channels -= channels
+        self.pubsub._detach(self, channels)
+
+    def close(self):
+        self.remove(set(self.channels))
+
+    def deliver(self, event):
+        """Hand an event to the subscriber; safe to call from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:
+            # The connection's loop is gone; it unsubscribes on the way out
+            pass
+
+    def _offer(self, event):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.max_pending:
+            # A stalled client gets one marker instead of an unbounded backlog
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(SYNC_REQUIRED_EVENT)
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        event = await self.queue.get()
+        if event is SYNC_REQUIRED_EVENT:
+            self.overflowed = False
+        return event
+
+
+class BasePubSub:
+    """Interface for pub/sub backends"""
+
+    def subscribe(self, channels=()):
+        """Return a Subscription bound to the running event loop"""
+        subscription = Subscription(self, asyncio.get_running_loop())
+        subscription.add(channels)
+        return subscription
+
+    def publish(self, channel, event):
+        """Deliver an event to every subscriber of `channel`"""
+        raise NotImplementedError
+
+    def _attach(self, subscription, channels):
+        raise NotImplementedError
+
+    def _detach(self, subscription, channels):
+        raise NotImplementedError
+
+
+class InProcessPubSub(BasePubSub):
+    """Fan-out to subscriptions living in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def _attach(self, subscription, channels):
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscription)
+
+    def _detach(self, subscription, channels):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+_pubsub = None
+
+
+def get_pubsub():
+    """Return the configured pub/sub backend instance"""
+    global _pubsub
+    if _pubsub is None:
+        backend_path = getattr(settings, 'REALTIME_PUBSUB_BACKEND', 'config.pubsub.InProcessPubSub')
+        _pubsub = import_string(backend_path)()
+    return _pubsub
+
+
+def publish_on_commit(channels, event):
+    """Publish `event` to each channel once the current transaction commits"""
+    channels = list(channels)
+
+    def publish():
+        pubsub = get_pubsub()
+        for channel in channels:
+            try:
+                pubsub.publish(channel, event)
+            except Exception:
+                # Real-time delivery is best effort; clients re-sync over REST
+                logger.exception('Failed to publish %s to %s', event.get('type'), channel)
+
+    transaction.on_commit(publish)
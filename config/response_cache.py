@@ -0,0 +1,131 @@
+"""
+Server-side response cache for anonymous REST list/detail requests.
+
+Entries are keyed on the view, action, object pk, normalized query parameters,
+active language, host and the current version number of every model scope the
+view depends on. Saving or deleting a model bumps its scope version (see the
+receivers in activities/models.py and places/models.py), which makes all keys
+built from the old version unreachable; the TTL evicts them.
+
+Server-rendered pages reuse the same scope versions as vary-on arguments of
+``{% cache %}`` fragments (see ``fragment_cache_context``).
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from django.utils.translation import get_language
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'api-cache-version'
+RESPONSE_KEY_PREFIX = 'api-response'
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def bump_cache_version(scope):
+    """Invalidate every cached response that depends on `scope`"""
+    cache = get_cache()
+    key = f'{VERSION_KEY_PREFIX}:{scope}'
+    # Version keys never expire; incr is atomic on memcached/redis backends
+    if cache.add(key, 2, timeout=None):
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def get_cache_versions(scopes):
+    versions = get_cache().get_many([f'{VERSION_KEY_PREFIX}:{scope}' for scope in scopes])
+    return tuple(versions.get(f'{VERSION_KEY_PREFIX}:{scope}', 1) for scope in scopes)
+
+
+def fragment_cache_context(scopes):
+    """Template context for `{% cache %}` fragments that depend on model scopes"""
+    return {
+        'fragment_cache_ttl': getattr(settings, 'TEMPLATE_FRAGMENT_CACHE_TTL', 300),
+        'fragment_cache_version': '.'.join(str(version) for version in get_cache_versions(scopes)),
+    }
+
+
+def normalize_query_params(query_params):
+    """Sorted (name, sorted values) pairs with blank values dropped"""
+    normalized = []
+    for name, values in query_params.lists():
+        values = sorted(value.strip() for value in values if value.strip())
+        if values:
+            normalized.append((name, values))
+    return sorted(normalized)
+
+
+class AnonymousResponseCacheMixin:
+    """Caches anonymous list/retrieve responses until a dependent model changes"""
+
+    # Model scopes whose changes invalidate this view's responses
+    response_cache_scopes = ()
+    response_cache_actions = ('list', 'retrieve')
+
+    def get_response_cache_timeout(self):
+        return getattr(settings, 'API_RESPONSE_CACHE_TTL', 60)
+
+    def get_response_cache_key(self):
+        request = self.request
+        key = repr((
+            self.__class__.__name__,
+            self.action,
+            self.kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+            normalize_query_params(request.query_params),
+            get_language(),
+            request.get_host(),
+            get_cache_versions(self.response_cache_scopes),
+        ))
+        return f'{RESPONSE_KEY_PREFIX}:{hashlib.md5(key.encode("utf-8")).hexdigest()}'
+
+    def is_response_cacheable(self, request):
+        return (
+            request.method == 'GET'
+            and self.action in self.response_cache_actions
+            and not request.user.is_authenticated
+        )
+
+    def cached_response(self, request, render):
+        if not self.is_response_cacheable(request):
+            return render()
+
+        cache = get_cache()
+        key = self.get_response_cache_key()
+        entry = cache.get(key)
+        if entry is not None:
+            headers = entry['headers']
+            # Answer conditional requests from the cached validators as well
+            not_modified = get_conditional_response(
+                request._request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+            )
+            response = Response(status=304) if not_modified is not None else Response(entry['data'])
+            for name, value in headers.items():
+                response[name] = value
+            return response
+
+        response = render()
+        if response.status_code == 200:
+            headers = {
+                name: response[name] for name in ('ETag', 'Last-Modified') if response.has_header(name)
+            }
+            cache.set(key, {'data': response.data, 'headers': headers}, self.get_response_cache_timeout())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        parent = super().list
+        return self.cached_response(request, lambda: parent(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        parent = super().retrieve
+        return self.cached_response(request, lambda: parent(request, *args, **kwargs))
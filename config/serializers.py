@@ -0,0 +1,145 @@
+"""
+Sparse fieldsets and on-demand expansion for API serializers.
+
+``?fields=id,title,organizer`` limits a response to the listed top-level fields
+and ``?expand=organizer`` swaps a compact embedded reference for its full
+serializer. ``optimize_queryset()`` turns the same parameters into the minimal
+``select_related`` / ``prefetch_related`` / ``only()`` for the queryset.
+
+Serializers describe what each field needs in their Meta:
+
+    expandable_fields = {'organizer': UserPublicSerializer}  # None: the field expands itself
+    field_hints = {'organizer': {'select_related': [...], 'prefetch_related': [...], 'only': [...]}}
+    expand_hints = {'organizer': {...}}  # extra needs when expanded
+
+Concrete model fields need no hint. ``only()`` is applied only when every
+requested field is a concrete field or has an ``only`` hint, so a field that
+reads an undeclared attribute never triggers per-row queries.
+"""
+
+from rest_framework.serializers import ListSerializer, SerializerMethodField
+
+FIELDS_QUERY_PARAM = 'fields'
+EXPAND_QUERY_PARAM = 'expand'
+
+
+def parse_list_param(request, name):
+    """Return the comma-separated values of a query param as a set, or None if absent"""
+    if request is None:
+        return None
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+class SparseFieldsetMixin:
+    """Adds ?fields= / ?expand= support to a ModelSerializer"""
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Requested top-level field names, or None for all fields"""
+        requested = parse_list_param(request, FIELDS_QUERY_PARAM)
+        if requested is None:
+            return None
+        # Unknown names are ignored like other malformed list parameters
+        known = requested & set(cls.Meta.fields)
+        return known or None
+
+    @classmethod
+    def expanded_fields(cls, request):
+        """Names of expandable fields the client asked to expand"""
+        expand = parse_list_param(request, EXPAND_QUERY_PARAM) or set()
+        return expand & set(getattr(cls.Meta, 'expandable_fields', {}))
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def is_expanded(self, field_name):
+        request = self.context.get('request')
+        return field_name in self.expanded_fields(request)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not self._is_root():
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in self.expanded_fields(request):
+            compact = fields.get(name)
+            expanded_class = expandable[name]
+            if compact is None or expanded_class is None:
+                # None: the (method) field renders its expanded form itself
+                continue
+            if isinstance(compact, SerializerMethodField):
+                fields[name] = expanded_class(read_only=True)
+            else:
+                fields[name] = expanded_class(*compact._args, **compact._kwargs)
+
+        requested = self.requested_fields(request)
+        if requested is not None:
+            for name in list(fields):
+                if name not in requested:
+                    fields.pop(name)
+        return fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        """Load only the relations and columns the requested fields need"""
+        model = queryset.model
+        requested = cls.requested_fields(request)
+        names = [name for name in cls.Meta.fields if requested is None or name in requested]
+        expanded = cls.expanded_fields(request)
+        field_hints = getattr(cls.Meta, 'field_hints', {})
+        expand_hints = getattr(cls.Meta, 'expand_hints', {})
+
+        select_related = []
+        prefetch_related = []
+        only = set()
+        can_restrict = True
+        for name in names:
+            hints = [field_hints.get(name)]
+            if name in expanded:
+                hints.append(expand_hints.get(name))
+            hints = [hint for hint in hints if hint]
+
+            if not hints:
+                try:
+                    field = model._meta.get_field(name)
+                except Exception:
+                    can_restrict = False
+                    continue
+                if field.concrete:
+                    only.add(name)
+                else:
+                    can_restrict = False
+                continue
+
+            for hint in hints:
+                select_related.extend(hint.get('select_related', []))
+                prefetch_related.extend(hint.get('prefetch_related', []))
+                if 'only' in hint:
+                    only.update(hint['only'])
+                else:
+                    can_restrict = False
+
+        if select_related:
+            queryset = queryset.select_related(*dict.fromkeys(select_related))
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch_related))
+        if can_restrict:
+            # Keep ordering columns loaded; the paginator reads them to build cursors
+            ordering = queryset.query.order_by or model._meta.ordering
+            ordering = [
+                field.lstrip('-') for field in ordering
+                if isinstance(field, str) and '__' not in field
+                and field.lstrip('-') not in ('pk', '?') and field.lstrip('-') not in queryset.query.annotations
+            ]
+            # Related-manager querysets (e.g. chat.messages) set the parent on every row
+            known_related = [field.name for field in getattr(queryset, '_known_related_objects', {})]
+            queryset = queryset.only(model._meta.pk.name, *sorted(only), *ordering, *known_related)
+        return queryset
@@ -200,8 +200,59 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Keyset pagination on each endpoint's sort columns + id (see config/pagination.py)
+    'DEFAULT_PAGINATION_CLASS': 'config.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': 20,
 }
 
+# Cache (per-process by default; point at memcached/redis in production so
+# response-cache invalidation is shared between workers)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'acteezer-default',
+    }
+}
+
+# Anonymous activity/place API responses (see config/response_cache.py)
+API_RESPONSE_CACHE_ALIAS = 'default'
+API_RESPONSE_CACHE_TTL = 60  # seconds
+
+# {% cache %} fragments on the home, activities and places pages
+TEMPLATE_FRAGMENT_CACHE_TTL = 300  # seconds
+
+# Organizer + approved participant ids per activity chat (see activities/chat_membership.py)
+CHAT_MEMBERSHIP_CACHE_ALIAS = 'default'
+CHAT_MEMBERSHIP_CACHE_TTL = 3600  # seconds
+
+# Age after which archive_chat_messages moves chat messages to cold storage
+CHAT_ARCHIVE_AFTER_DAYS = 180
+
+# Push notification outbox drained by run_push_worker (see accounts/push_service.py)
+PUSH_CONNECT_TIMEOUT = 5  # seconds
+PUSH_REQUEST_TIMEOUT = 10  # seconds to wait for Expo's response
+PUSH_TRANSPORT_MAX_WORKERS = 4  # concurrent requests per send (and pooled connections)
+PUSH_OUTBOX_MAX_ATTEMPTS = 5
+PUSH_OUTBOX_RETRY_DELAY = 30  # seconds, doubled after every failed attempt
+PUSH_OUTBOX_MAX_RETRY_DELAY = 3600  # seconds
+PUSH_OUTBOX_LEASE = 600  # seconds a claimed batch stays reserved for its worker
+PUSH_OUTBOX_RETENTION_DAYS = 7
+PUSH_CHAT_COALESCE_SECONDS = 15  # chat messages within this window share one push per recipient
+PUSH_DEFERRED_SPREAD_MINUTES = 15  # quiet-hours pushes are released over this long after the window ends
+
+# Expo endpoints; point at a local stand-in to test without the real service
+EXPO_PUSH_URL = 'https://exp.host/--/api/v2/push/send'
+EXPO_PUSH_RECEIPTS_URL = 'https://exp.host/--/api/v2/push/getReceipts'
+PUSH_RECEIPT_DELAY_MINUTES = 15  # Expo receipts are ready some minutes after sending
+
+# Minutes before an activity starts at which send_activity_reminders reminds
+# its organizer and approved participants
+ACTIVITY_REMINDER_WINDOWS = [24 * 60, 60]
+
+# Fan-out for real-time chat WebSockets (see config/pubsub.py); the in-process
+# backend only reaches connections served by the same ASGI worker
+REALTIME_PUBSUB_BACKEND = 'config.pubsub.InProcessPubSub'
+
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -2,6 +2,9 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q
+from config.conditional import ConditionalGetMixin
+from config.geo import filter_by_location
+from config.response_cache import AnonymousResponseCacheMixin
 from .models import PlaceCategory, Place, PlaceImage, PlaceReview, PlaceFavorite
 from .serializers import (
     PlaceCategorySerializer, PlaceListSerializer, PlaceDetailSerializer,
@@ -14,12 +17,15 @@ class PlaceCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = PlaceCategory.objects.all()
     serializer_class = PlaceCategorySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Small lookup table, always returned whole
 
 
-class PlaceViewSet(viewsets.ReadOnlyModelViewSet):
+class PlaceViewSet(AnonymousResponseCacheMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet for places"""
     queryset = Place.objects.filter(is_active=True)
     permission_classes = [permissions.AllowAny]
+    response_cache_scopes = ('place', 'place_review')
+    validator_counter_fields = ('rating', 'review_count')
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -67,9 +73,14 @@ class PlaceViewSet(viewsets.ReadOnlyModelViewSet):
         if verified == 'true':
             queryset = queryset.filter(is_verified=True)
         
+        # Location filters (?near=lat,lng&radius_km= and ?bbox=)
+        queryset, has_distance = filter_by_location(queryset, self.request.query_params)
+        
         # Sorting
         sort_by = self.request.query_params.get('sort', 'featured')
-        if sort_by == 'rating':
+        if sort_by == 'distance' and has_distance:
+            queryset = queryset.order_by('distance_km')
+        elif sort_by == 'rating':
             queryset = queryset.order_by('-rating', '-review_count')
         elif sort_by == 'name':
             queryset = queryset.order_by('name')
@@ -82,6 +93,13 @@ class PlaceViewSet(viewsets.ReadOnlyModelViewSet):
         
         return queryset.select_related('category').prefetch_related('images', 'reviews')
     
+    def get_object_validators(self, obj):
+        state, last_modified = super().get_object_validators(obj)
+        # Gallery images and the category are embedded in the detail response
+        images = tuple(image.pk for image in obj.images.all())
+        category = (obj.category_id, obj.category.updated_at)
+        return (state, images, category), max(last_modified, obj.category.updated_at)
+    
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def is_favorited(self, request, pk=None):
         """Check if place is favorited by current user"""
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+from config.geo import geohash_for
+
+
+def populate_geohash(apps, schema_editor):
+    Place = apps.get_model('places', 'Place')
+    rows = Place.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for pk, latitude, longitude in rows.values_list('id', 'latitude', 'longitude'):
+        Place.objects.filter(pk=pk).update(geohash=geohash_for(latitude, longitude))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0002_placefavorite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Spatial index key derived from coordinates', max_length=12),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
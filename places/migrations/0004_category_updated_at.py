@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('places', '0003_place_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='placecategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.urls import reverse
 from PIL import Image
 
+from config.geo import geohash_for
+from config.response_cache import bump_cache_version
+
 
 class PlaceCategory(models.Model):
     """Model for place categories like Restaurant, Pub, Activity Place, Club, etc."""
@@ -27,6 +32,7 @@ class PlaceCategory(models.Model):
     color = models.CharField(max_length=7, default='#5DD3BE')  # Hex color for category badge
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "Place Categories"
@@ -72,6 +78,7 @@ class Place(models.Model):
     district = models.CharField(max_length=20, choices=DISTRICT_CHOICES, default='other')
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False, help_text="Spatial index key derived from coordinates")
     
     # Contact Information
     phone = models.CharField(max_length=20, blank=True)
@@ -136,6 +143,12 @@ class Place(models.Model):
         return price_symbols.get(self.price_range, '$$')
     
     def save(self, *args, **kwargs):
+        # Keep the spatial index key in sync with the coordinates
+        self.geohash = geohash_for(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        
         super().save(*args, **kwargs)
         
         # Resize image if it exists
@@ -203,4 +216,22 @@ class PlaceFavorite(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.user.get_full_name()} liked {self.place.name}"
\ No newline at end of file
+        return f"{self.user.get_full_name()} liked {self.place.name}"
+
+
+@receiver(post_save, sender=Place)
+@receiver(post_delete, sender=Place)
+@receiver(post_save, sender=PlaceCategory)
+@receiver(post_delete, sender=PlaceCategory)
+@receiver(post_save, sender=PlaceImage)
+@receiver(post_delete, sender=PlaceImage)
+def invalidate_place_response_cache(sender, **kwargs):
+    """Drop cached anonymous place API responses"""
+    bump_cache_version('place')
+
+
+@receiver(post_save, sender=PlaceReview)
+@receiver(post_delete, sender=PlaceReview)
+def invalidate_place_review_response_cache(sender, **kwargs):
+    """Drop cached anonymous place API responses that depend on reviews"""
+    bump_cache_version('place_review')
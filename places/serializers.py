@@ -33,12 +33,13 @@ class PlaceListSerializer(serializers.ModelSerializer):
     price_display = serializers.SerializerMethodField()
     is_featured = serializers.BooleanField(read_only=True)
     is_verified = serializers.BooleanField(read_only=True)
+    distance_km = serializers.SerializerMethodField()
     
     class Meta:
         model = Place
         fields = [
             'id', 'name', 'short_description', 'category', 'address', 'district',
-            'latitude', 'longitude', 'price_range', 'price_display', 'rating',
+            'latitude', 'longitude', 'distance_km', 'price_range', 'price_display', 'rating',
             'review_count', 'main_image', 'main_image_url', 'is_featured',
             'is_verified', 'created_at'
         ]
@@ -53,6 +54,11 @@ class PlaceListSerializer(serializers.ModelSerializer):
     
     def get_price_display(self, obj):
         return obj.get_price_display()
+    
+    def get_distance_km(self, obj):
+        # Only present when the list was filtered with ?near=
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 3) if distance is not None else None
 
 
 class PlaceDetailSerializer(serializers.ModelSerializer):
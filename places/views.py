@@ -5,6 +5,8 @@ from django.db.models.functions import Coalesce
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
+from django.utils.functional import SimpleLazyObject
+from config.response_cache import fragment_cache_context
 from .models import Place, PlaceCategory, PlaceFavorite
 
 
@@ -96,12 +98,18 @@ def places_list(request):
     district_choices = Place.DISTRICT_CHOICES
     price_choices = Place.PRICE_RANGE_CHOICES
     
-    # Statistics
-    total_places = Place.objects.filter(is_active=True).count()
-    avg_rating = Place.objects.filter(is_active=True).aggregate(Avg('rating'))['rating__avg'] or 0
-    total_reviews = Place.objects.filter(is_active=True).aggregate(
-        total=Coalesce(Count('reviews'), 0)
-    )['total'] or 0
+    # Statistics (evaluated only when the cached hero fragments miss)
+    def get_place_stats():
+        active_places = Place.objects.filter(is_active=True)
+        stats = active_places.aggregate(total_places=Count('id'), avg_rating=Avg('rating'))
+        total_reviews = active_places.aggregate(
+            total=Coalesce(Count('reviews'), 0)
+        )['total'] or 0
+        return {
+            'total_places': stats['total_places'],
+            'avg_rating': round(stats['avg_rating'] or 0, 1),
+            'total_reviews': total_reviews,
+        }
     
     # Get favorited place IDs for current user
     favorited_place_ids = set()
@@ -129,10 +137,9 @@ def places_list(request):
         'sort_by': sort_by,
         'per_page': per_page,
         'total_count': paginator.count,
-        'total_places': total_places,
-        'avg_rating': round(avg_rating, 1),
-        'total_reviews': total_reviews,
+        'place_stats': SimpleLazyObject(get_place_stats),
         'favorited_place_ids': favorited_place_ids,
+        **fragment_cache_context(('place', 'place_review')),
     }
     
     return render(request, 'core/places.html', context)